@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多进程批量转换
+每个工作进程只创建一次自己的 DJIThermalConverter（SDK加载、后端测速、查找表和重映射表缓存
+都在进程内复用），之后逐个处理父进程分派的文件。工作进程按与SDK工作进程相同的策略回收
+（Config.WORKER_MAX_TASKS / WORKER_MAX_RSS_MB）；进程意外退出时只有正在处理的文件记为失败，
+进程重启后继续转换其余文件。替换进程在后台启动，就绪前其余进程照常处理文件
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from sdk_worker import check_rss_limit, current_rss_mb
+
+
+class BatchWorkerError(RuntimeError):
+    """批量转换工作进程无法启动"""
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """并行进程数：None 取 Config.MAX_CONCURRENT_CONVERSIONS，0 取CPU核数"""
+    if jobs is None:
+        jobs = Config.MAX_CONCURRENT_CONVERSIONS
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def _batch_worker_main(conn, converter_kwargs: Dict, flat_fields: Dict[Tuple[str, Tuple[int, int]], np.ndarray],
+                       measurement_params: Optional[Dict], screen_rjpeg: bool):
+    """
+    工作进程入口
+
+    创建转换器后循环处理父进程的请求：请求为 (输入路径, 输出路径)，None 表示退出；
+    回复为 (状态, 原因, 本进程的常驻内存)
+    """
+    from dji_thermal_converter import DJIThermalConverter, FrameBuffers
+
+    try:
+        converter = DJIThermalConverter(**converter_kwargs)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    # 平场偏移由父进程在第一阶段统计，所有工作进程共用
+    converter.flat_fields.update(flat_fields)
+    conn.send(('ready',))
+
+    buffers = FrameBuffers()
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except (EOFError, OSError):
+                break
+            if task is None:
+                break
+            input_path, output_path = task
+            status = converter.convert_batch_file(input_path, output_path, measurement_params,
+                                                  buffers, screen_rjpeg)
+            reason = converter.quarantined.get(input_path) or converter.timed_out.get(input_path)
+            conn.send((status, reason, current_rss_mb()))
+    finally:
+        converter.close()
+
+
+class _BatchWorker:
+    """单个批量转换工作进程的父进程端状态"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+        self.rss_mb = 0.0
+        self.task: Optional[Tuple[str, str]] = None
+        self.started = time.monotonic()
+
+
+class BatchWorkerPool:
+    """
+    批量转换进程池
+
+    imap() 按完成顺序逐个返回每个文件的结果；工作进程在第一次使用时全部启动，
+    close() 时结束。工作进程不是守护进程（其中的转换器可能再启动SDK工作进程），
+    需通过 close() 或 with 语句结束。
+    """
+
+    def __init__(self, converter_kwargs: Dict, jobs: int,
+                 flat_fields: Optional[Dict[Tuple[str, Tuple[int, int]], np.ndarray]] = None,
+                 measurement_params: Optional[Dict] = None, screen_rjpeg: bool = True,
+                 max_tasks: int = Config.WORKER_MAX_TASKS,
+                 max_rss_mb: float = Config.WORKER_MAX_RSS_MB, context=None):
+        """
+        Args:
+            converter_kwargs: 每个工作进程创建 DJIThermalConverter 的参数
+            jobs: 工作进程数量
+            flat_fields: 父进程统计好的平场偏移（(相机标识, 帧形状) -> 偏移图）
+            measurement_params: 本批次的测温参数
+            screen_rjpeg: 是否先只读文件头排除普通JPEG（见 DJIThermalConverter.convert_batch_file）
+            max_tasks: 每个进程处理的文件数上限，0表示不限制
+            max_rss_mb: 进程常驻内存上限（MB），0表示不限制
+            context: multiprocessing 上下文，默认使用 spawn（子进程不继承父进程的原生库状态）
+        """
+        self.converter_kwargs = converter_kwargs
+        self.jobs = max(1, jobs)
+        self.flat_fields = dict(flat_fields or {})
+        self.measurement_params = measurement_params
+        self.screen_rjpeg = screen_rjpeg
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.context = context or multiprocessing.get_context('spawn')
+        check_rss_limit(max_rss_mb)
+        self.recycled = 0
+        self._workers: List[_BatchWorker] = []
+        # 已请求退出、尚未回收的旧进程
+        self._retiring = []
+
+    def _spawn(self) -> _BatchWorker:
+        """启动工作进程（不等待就绪）"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_batch_worker_main,
+            args=(child_conn, self.converter_kwargs, self.flat_fields,
+                  self.measurement_params, self.screen_rjpeg))
+        process.start()
+        child_conn.close()
+        return _BatchWorker(process, parent_conn)
+
+    def _wait_ready(self, workers: List[_BatchWorker]):
+        """等待一组工作进程创建好转换器，任一失败时结束全部工作进程"""
+        try:
+            for worker in workers:
+                try:
+                    if not worker.conn.poll(Config.SDK_WORKER_START_TIMEOUT):
+                        raise BatchWorkerError(f"{Config.SDK_WORKER_START_TIMEOUT}秒内未就绪")
+                    reply = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(timeout=1.0)
+                    raise BatchWorkerError(f"工作进程启动时退出 (exitcode={worker.process.exitcode})")
+                if reply[0] != 'ready':
+                    raise BatchWorkerError(reply[1])
+        except BatchWorkerError as e:
+            for worker in workers:
+                self._stop(worker, graceful=False)
+            raise BatchWorkerError(f"批量转换工作进程启动失败: {e}") from e
+
+    @staticmethod
+    def _stop(worker: _BatchWorker, graceful: bool = True):
+        """结束工作进程并关闭管道，graceful 时先请求进程自行退出"""
+        if graceful and worker.process.is_alive():
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker.process.join(timeout=5.0)
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+    def _replace(self, worker: _BatchWorker, graceful: bool = True) -> _BatchWorker:
+        """
+        用新进程替换回收或崩溃的工作进程
+
+        不等待旧进程退出和新进程就绪：回收的旧进程收到退出请求后在 close() 时回收，
+        新进程由 imap() 在收到就绪消息后分派文件
+        """
+        if graceful:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker.conn.close()
+            self._retiring.append(worker.process)
+        else:
+            self._stop(worker, graceful=False)
+        replacement = self._spawn()
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def _discard(self, worker: _BatchWorker, reason: str):
+        """结束无法启动的替换进程；没有可用的工作进程时抛出 BatchWorkerError"""
+        self._stop(worker, graceful=False)
+        self._workers.remove(worker)
+        if not self._workers:
+            raise BatchWorkerError(f"批量转换工作进程启动失败: {reason}")
+        logging.getLogger('DJIThermalConverter').warning(
+            f"⚠️ 批量转换工作进程启动失败，剩余 {len(self._workers)} 个进程继续转换: {reason}")
+
+    def _needs_recycle(self, worker: _BatchWorker) -> bool:
+        return bool((self.max_tasks and worker.tasks >= self.max_tasks)
+                    or (self.max_rss_mb and worker.rss_mb >= self.max_rss_mb))
+
+    def imap(self, tasks: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        并行转换
+
+        Args:
+            tasks: (输入路径, 输出路径) 序列
+
+        Yields:
+            Tuple[str, str, Optional[str]]: (输入路径, 状态, 隔离/超时/崩溃原因)，按完成顺序
+        """
+        if not self._workers:
+            self._workers = [self._spawn() for _ in range(self.jobs)]
+            self._wait_ready(self._workers)
+
+        pending = iter(tasks)
+        busy: Dict[object, _BatchWorker] = {}
+        # 尚未发来就绪消息的替换进程
+        starting: Dict[object, _BatchWorker] = {}
+
+        def dispatch(worker: _BatchWorker):
+            worker.task = next(pending, None)
+            if worker.task is not None:
+                worker.conn.send(worker.task)
+                busy[worker.conn] = worker
+
+        for worker in self._workers:
+            dispatch(worker)
+
+        while busy or starting:
+            timeout = None
+            if starting:
+                deadline = min(worker.started for worker in starting.values()) + Config.SDK_WORKER_START_TIMEOUT
+                timeout = max(0.0, deadline - time.monotonic())
+            ready = wait(list(busy) + list(starting), timeout)
+
+            for conn in ready:
+                if conn in starting:
+                    worker = starting.pop(conn)
+                    try:
+                        reply = conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(timeout=1.0)
+                        reply = ('error', f"工作进程启动时退出 (exitcode={worker.process.exitcode})")
+                    if reply[0] == 'ready':
+                        dispatch(worker)
+                    else:
+                        self._discard(worker, reply[1])
+                    continue
+
+                worker = busy.pop(conn)
+                input_path = worker.task[0]
+                try:
+                    status, reason, worker.rss_mb = conn.recv()
+                    worker.tasks += 1
+                except (EOFError, OSError):
+                    # 转换器所在进程崩溃：该文件隔离，进程重启后继续
+                    worker.process.join(timeout=1.0)
+                    status = 'quarantined'
+                    reason = f"批量转换工作进程异常退出 (exitcode={worker.process.exitcode})"
+                    worker = self._replace(worker, graceful=False)
+                    starting[worker.conn] = worker
+                else:
+                    if self._needs_recycle(worker):
+                        worker = self._replace(worker)
+                        starting[worker.conn] = worker
+                        self.recycled += 1
+                yield input_path, status, reason
+                if worker.conn not in starting:
+                    dispatch(worker)
+
+            now = time.monotonic()
+            for conn, worker in list(starting.items()):
+                if now - worker.started >= Config.SDK_WORKER_START_TIMEOUT:
+                    del starting[conn]
+                    self._discard(worker, f"{Config.SDK_WORKER_START_TIMEOUT}秒内未就绪")
+
+    def close(self):
+        """结束全部工作进程"""
+        for worker in self._workers:
+            self._stop(worker)
+        self._workers = []
+        for process in self._retiring:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._retiring = []
+
+    def __enter__(self) -> 'BatchWorkerPool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
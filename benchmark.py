@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能与精度基准测试
+对比纯Python辐射定标路径与DJI Thermal SDK路径的速度和温度误差，
+以及逐像素内核的NumPy与Numba/numexpr实现
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config import Config
+from defect_correction import DefectCorrector
+from hotspots import label_hotspots
+from numba_kernels import kernel_backend, numba_enabled
+from numexpr_kernels import expression_backend, numexpr_enabled
+from rjpeg_parser import RJPEGSegments
+from synthetic_scene import generate_scene
+from thermal_calibration import (MeasurementParams, PlanckConstants, apply_temperature_lut,
+                                 get_temperature_lut, raw_to_temperature, scale_to_int16)
+from undistortion import get_remap_table
+
+
+def time_call(func: Callable, repeat: int) -> float:
+    """多次执行并返回单次最短耗时（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def find_images(input_path: str) -> List[Path]:
+    """查找待测试的R-JPEG文件"""
+    path = Path(input_path)
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.rglob('*') if Config.is_supported_input_format(p.name))
+
+
+def python_path(rjpeg_data: bytes, model: str) -> np.ndarray:
+    """纯Python路径：段解析 + 查找表辐射定标"""
+    segments = RJPEGSegments(rjpeg_data)
+    raw_data = segments.decode_raw_thermal()
+    params = MeasurementParams.from_dict(segments.measurement_params)
+    return apply_temperature_lut(raw_data, get_temperature_lut(model, params))
+
+
+def accuracy_stats(result: np.ndarray, reference: np.ndarray) -> Dict[str, float]:
+    """计算相对参考结果的温度误差"""
+    error = result.astype(np.float64) - reference
+    abs_error = np.abs(error)
+    return {
+        'mae': float(abs_error.mean()),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'max': float(abs_error.max()),
+        'within_0_5': float(np.mean(abs_error <= 0.5) * 100.0),
+    }
+
+
+def benchmark_calibration(args):
+    """对比纯Python定标与SDK测温"""
+    from dji_thermal_converter import DJIThermalConverter
+
+    converter = DJIThermalConverter(sdk_path=args.sdk_path)
+    try:
+        images = find_images(args.input)
+        if not images:
+            print(f"未找到R-JPEG文件: {args.input}")
+            return
+
+        print(f"测试文件数: {len(images)}，重复次数: {args.repeat}")
+        print(f"{'文件':<32}{'Python(ms)':>12}{'SDK(ms)':>10}{'MAE':>8}{'RMSE':>8}{'最大误差':>10}{'≤0.5°C':>9}")
+
+        for image in images:
+            rjpeg_data = image.read_bytes()
+            try:
+                python_ms = time_call(lambda: python_path(rjpeg_data, args.model), args.repeat)
+                python_result = python_path(rjpeg_data, args.model)
+            except Exception as e:
+                print(f"{image.name:<32} 纯Python解析失败: {e}")
+                continue
+
+            if not converter.is_initialized:
+                print(f"{image.name:<32}{python_ms:>12.2f}{'-':>10}")
+                continue
+
+            with converter.dirp_pool.session() as session:
+                sdk_ms = time_call(lambda: session.measure(rjpeg_data), args.repeat)
+                sdk_result = session.measure(rjpeg_data).copy()
+
+            stats = accuracy_stats(python_result, sdk_result)
+            print(f"{image.name:<32}{python_ms:>12.2f}{sdk_ms:>10.2f}{stats['mae']:>8.2f}"
+                  f"{stats['rmse']:>8.2f}{stats['max']:>10.2f}{stats['within_0_5']:>8.1f}%")
+    finally:
+        converter.close()
+
+
+def benchmark_synthetic(args):
+    """在合成原始帧上测试定标吞吐量（无需样本文件和SDK）"""
+    width, height = Config.get_model_config(args.model)['resolution']
+    rng = np.random.default_rng(0)
+    raw_data = rng.integers(14000, 22000, size=(height, width), dtype=np.uint16)
+    planck = PlanckConstants.for_model(args.model)
+    out = np.empty(raw_data.shape, dtype=np.float32)
+
+    params = MeasurementParams()
+
+    direct_ms = time_call(lambda: raw_to_temperature(raw_data, planck, params, out=out), args.repeat)
+    lut = get_temperature_lut(args.model, params)
+    lut_ms = time_call(lambda: apply_temperature_lut(raw_data, lut, out=out), args.repeat)
+
+    print(f"{args.model} {width}×{height} 辐射定标:")
+    print(f"  逐像素计算: {direct_ms:.2f} ms/帧 ({1000.0 / direct_ms:.1f} 帧/秒)")
+    print(f"  查找表:     {lut_ms:.2f} ms/帧 ({1000.0 / lut_ms:.1f} 帧/秒)")
+
+
+def _compare_kernels(title: str, flag: str, enabled: Callable[[], bool], kernels: Dict, repeat: int):
+    """在关闭/开启 Config 开关的情况下分别计时一组内核"""
+    print(title)
+    setting = getattr(Config, flag)
+    setattr(Config, flag, True)
+    available = enabled()
+    setattr(Config, flag, setting)
+    if not available:
+        print("  加速实现不可用，只测试NumPy实现")
+    print(f"  {'内核':<24}{'NumPy(ms)':>12}{'加速(ms)':>12}{'加速比':>10}")
+
+    try:
+        for name, kernel in kernels.items():
+            setattr(Config, flag, False)
+            numpy_ms = time_call(kernel, repeat)
+            if not available:
+                print(f"  {name:<24}{numpy_ms:>12.2f}{'-':>12}")
+                continue
+            setattr(Config, flag, True)
+            kernel()  # 首次调用触发JIT编译或表达式解析，不计时
+            fast_ms = time_call(kernel, repeat)
+            print(f"  {name:<24}{numpy_ms:>12.2f}{fast_ms:>12.2f}{numpy_ms / fast_ms:>9.1f}x")
+    finally:
+        setattr(Config, flag, setting)
+
+
+def benchmark_kernels(args):
+    """在合成温度帧上对比逐像素内核和逐元素表达式的NumPy与加速实现"""
+    width, height = Config.get_model_config(args.model)['resolution']
+    frame = generate_scene(width, height, 'hotspots', seed=0)
+    rng = np.random.default_rng(0)
+    defect_mask = np.zeros(frame.shape, dtype=bool)
+    defect_mask.flat[rng.choice(frame.size, frame.size // 1000, replace=False)] = True
+    remap = get_remap_table(args.model, width, height)
+    corrector = DefectCorrector(defect_mask)
+    remap_out = np.empty_like(frame)
+    threshold = float(np.percentile(frame, 90))
+
+    print(f"{args.model} {width}×{height}")
+    _compare_kernels(f"逐像素内核（{kernel_backend()}）:", 'USE_NUMBA', numba_enabled, {
+        '双线性重映射': lambda: remap.apply(frame, remap_out),
+        f'坏点中值 ({corrector.defect_count}点)': lambda: corrector.apply(frame.copy()),
+        '热点连通域标记': lambda: label_hotspots(frame, threshold),
+    }, args.repeat)
+
+    planck = PlanckConstants.for_model(args.model)
+    params = MeasurementParams()
+    raw_data = rng.integers(20000, 40000, size=(height, width), dtype=np.uint16)
+    temperature = np.empty(frame.shape, dtype=np.float32)
+    scaled = np.empty(frame.shape, dtype=np.int16)
+    _compare_kernels(f"逐元素表达式（{expression_backend()}）:", 'USE_NUMEXPR', numexpr_enabled, {
+        '直接辐射定标': lambda: raw_to_temperature(raw_data, planck, params, out=temperature),
+        'TIFF缩放 (×10→int16)': lambda: scale_to_int16(frame, 10, out=scaled),
+    }, args.repeat)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="热红外转换性能与精度基准测试")
+    parser.add_argument('-i', '--input', help='R-JPEG文件或目录（不指定时使用合成数据）')
+    parser.add_argument('--sdk-path', help='DJI Thermal SDK库文件路径')
+    parser.add_argument('-m', '--model', default=Config.DEFAULT_DRONE_MODEL,
+                        choices=Config.get_supported_models(), help='无人机型号')
+    parser.add_argument('--repeat', type=int, default=5, help='每项测试的重复次数')
+    parser.add_argument('--kernels', action='store_true',
+                        help='对比逐像素内核（重映射、坏点校正、热点标记）的NumPy与Numba实现')
+    args = parser.parse_args()
+
+    if args.kernels:
+        benchmark_kernels(args)
+    elif args.input:
+        if not os.path.exists(args.input):
+            print(f"输入路径不存在: {args.input}")
+            sys.exit(1)
+        benchmark_calibration(args)
+    else:
+        benchmark_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,13 @@ class Config:
             'format_support': ['jpg', 'jpeg'],
             'spectral_range': (8.0, 14.0),  # 光谱范围 μm
             'thermal_sensitivity': 0.05,  # 热敏感度 °C
-            'description': '大疆M30T无人机内置热红外相机'
+            'description': '大疆M30T无人机内置热红外相机',
+            # 普朗克标定常数（标称值，无SDK时的辐射定标使用，可按实测标定结果替换）
+            'planck_constants': {'r1': 21106.77, 'r2': 0.012545258, 'b': 1501.0, 'f': 1.0, 'o': -7340.0},
+            'planck_calibrated': False,  # 普朗克常数是否为该型号的实测标定值，False时纯Python定标的结果标记为近似值
+            # 镜头内参（像素，标称分辨率下，主点为None时取图像中心）和Brown-Conrady畸变系数（标称值，可按实测标定结果替换）
+            'intrinsics': {'fx': 1391.0, 'fy': 1391.0, 'cx': None, 'cy': None, 'k1': -0.05, 'k2': 0.01, 'p1': 0.0, 'p2': 0.0, 'k3': 0.0},  # 对角视场角61°
+            'intrinsics_calibrated': False  # 内参和畸变系数是否为该型号的实测标定值，False时畸变校正结果标记为使用标称内参
         },
         'H20T': {
             'name': '大疆 H20T',
@@ -34,7 +40,11 @@ class Config:
             'format_support': ['jpg', 'jpeg'],
             'spectral_range': (8.0, 14.0),
             'thermal_sensitivity': 0.05,
-            'description': '大疆H20T热红外云台相机'
+            'description': '大疆H20T热红外云台相机',
+            'planck_constants': {'r1': 21106.77, 'r2': 0.012545258, 'b': 1501.0, 'f': 1.0, 'o': -7340.0},
+            'planck_calibrated': False,
+            'intrinsics': {'fx': 1125.0, 'fy': 1125.0, 'cx': None, 'cy': None, 'k1': -0.05, 'k2': 0.01, 'p1': 0.0, 'p2': 0.0, 'k3': 0.0},  # 焦距13.5mm
+            'intrinsics_calibrated': False
         },
         'H30T': {
             'name': '大疆 H30T',
@@ -44,7 +54,11 @@ class Config:
             'format_support': ['jpg', 'jpeg'],
             'spectral_range': (8.0, 14.0),
             'thermal_sensitivity': 0.05,
-            'description': '大疆H30T高温热红外云台相机'
+            'description': '大疆H30T高温热红外云台相机',
+            'planck_constants': {'r1': 21106.77, 'r2': 0.012545258, 'b': 1501.0, 'f': 1.0, 'o': -7340.0},
+            'planck_calibrated': False,
+            'intrinsics': {'fx': 2000.0, 'fy': 2000.0, 'cx': None, 'cy': None, 'k1': -0.05, 'k2': 0.01, 'p1': 0.0, 'p2': 0.0, 'k3': 0.0},  # 焦距24mm
+            'intrinsics_calibrated': False
         },
         'M2EA': {
             'name': '大疆 御2行业进阶版',
@@ -54,15 +68,55 @@ class Config:
             'format_support': ['jpg', 'jpeg'],
             'spectral_range': (8.0, 14.0),
             'thermal_sensitivity': 0.1,
-            'description': '大疆御2行业进阶版热红外相机'
+            'description': '大疆御2行业进阶版热红外相机',
+            'planck_constants': {'r1': 21106.77, 'r2': 0.012545258, 'b': 1501.0, 'f': 1.0, 'o': -7340.0},
+            'planck_calibrated': False,
+            'intrinsics': {'fx': 529.4, 'fy': 529.4, 'cx': None, 'cy': None, 'k1': -0.05, 'k2': 0.01, 'p1': 0.0, 'p2': 0.0, 'k3': 0.0},  # 焦距9mm
+            'intrinsics_calibrated': False
         }
     }
     
+    # EXIF Model字段 -> 型号（自动检测型号时使用）
+    EXIF_MODEL_ALIASES = {
+        'M30T': 'M30T',
+        'ZH20T': 'H20T',
+        'H20T': 'H20T',
+        'ZH30T': 'H30T',
+        'H30T': 'H30T',
+        'MAVIC2-ENTERPRISE-ADVANCED': 'M2EA',
+        'M2EA': 'M2EA',
+    }
+    
     # 默认设置
     DEFAULT_DRONE_MODEL = 'M30T'
     DEFAULT_COMPRESSION = 'lzw'
     DEFAULT_LOG_LEVEL = 'INFO'
     
+    # 默认测温参数（与DJI Thermal SDK默认值一致）
+    DEFAULT_MEASUREMENT_PARAMS = {
+        'distance': 5.0,       # 目标距离 m
+        'humidity': 70.0,      # 相对湿度 %
+        'emissivity': 1.0,     # 发射率
+        'reflection': 23.0,    # 反射温度 °C
+        'ambient_temp': 25.0   # 环境温度 °C
+    }
+    
+    # 测温参数有效范围
+    MEASUREMENT_PARAM_RANGES = {
+        'distance': (0.0, 1000.0),
+        'humidity': (0.0, 100.0),
+        'emissivity': (0.01, 1.0),
+        'reflection': (-40.0, 500.0),
+        'ambient_temp': (-40.0, 80.0)
+    }
+    
+    # DJI Thermal SDK（libdirp）接受的测温参数范围，超出时SDK拒绝设置，只能用普朗克定标
+    SDK_MEASUREMENT_PARAM_RANGES = {
+        'distance': (1.0, 25.0),
+        'humidity': (20.0, 100.0),
+        'emissivity': (0.10, 1.0),
+    }
+    
     # 文件格式设置
     SUPPORTED_INPUT_FORMATS = ['.jpg', '.jpeg', '.JPG', '.JPEG']
     OUTPUT_FORMAT = '.tiff'
@@ -88,7 +142,34 @@ class Config:
     
     # 批处理设置
     BATCH_PROGRESS_UPDATE_INTERVAL = 10  # 进度更新间隔（文件数）
-    MAX_CONCURRENT_CONVERSIONS = 4  # 最大并发转换数
+    MAX_CONCURRENT_CONVERSIONS = 4  # 最大并发转换数（批量转换默认的并行进程数 --jobs，以及SDK工作进程池大小）
+    LUT_CACHE_SIZE = 16  # 缓存的原始计数→温度查找表数量（每张256KB）
+    RAW_CACHE_MEMORY_MB = 512  # 原始计数内存缓存上限（MB）
+    REMAP_CACHE_SIZE = 8  # 缓存的畸变校正重映射表数量（按型号和分辨率）
+    SYNTHETIC_CACHE_SIZE = 8  # 缓存的合成温度帧数量（按分辨率、场景和种子）
+    MOCK_SCENARIO = 'default'  # 演示模式使用的合成场景（见 synthetic_scene.SCENARIOS）
+    MOCK_SEED = 0  # 演示模式合成场景的随机种子
+    BACKEND_BENCHMARK_REPEAT = 3  # 自动选择解码后端时每个后端的计时次数
+    BACKEND_MAX_DEVIATION = 1.0  # 相对SDK结果允许的平均温度偏差（°C）
+    SDK_WORKER_ISOLATION = True  # 在独立工作进程中调用SDK（原生库崩溃不会终止批量转换）
+    SDK_WORKER_START_TIMEOUT = 30.0  # SDK工作进程启动期限（秒）
+    FILE_TIMEOUT_SECONDS = 120.0  # 单个文件的SDK处理期限（秒），超时的工作进程被强制结束并替换
+    WORKER_MAX_TASKS = 500  # 工作进程处理的文件数上限，达到后由预热好的新进程替换（0表示不限制）
+    WORKER_MAX_RSS_MB = 2048  # 工作进程常驻内存上限（MB），超过后由预热好的新进程替换（0表示不限制）
+    USE_NUMBA = True  # 安装了Numba时使用编译的并行内核（重映射、坏点校正、热点标记），否则使用NumPy实现
+    USE_NUMEXPR = True  # 安装了numexpr时辐射定标和TIFF缩放的逐元素算式融合为分块多线程求值（结果与NumPy逐位相同）
+    DEFECT_CALIBRATION_FRAMES = 16  # 统计坏点掩膜使用的帧数（每台相机一次）
+    DEFECT_THRESHOLD_SIGMA = 6.0  # 与邻域中值的偏差超过该倍数的稳健标准差时记为可疑像素
+    DEFECT_MIN_DEVIATION = 0.05  # 稳健标准差下限（°C），避免平坦场景中误判
+    DEFECT_MIN_FRACTION = 0.5  # 在该比例以上的统计帧中可疑的像素判定为坏点
+    FLAT_FIELD_METHOD = 'clipped_mean'  # 平场估计的逐像素统计方法（'clipped_mean' / 'mean' / 'median'）
+    FLAT_FIELD_MIN_FRAMES = 10  # 估计平场所需的最少帧数（每种分辨率）
+    FLAT_FIELD_MIN_STEP = 0.05  # 近似中值的初始步长下限（°C）
+    HOTSPOT_MIN_AREA = 4  # 热点的最小面积（像素）
+    DENOISE_GAUSSIAN_SIGMA = 1.0  # 高斯降噪的标准差（像素）
+    DENOISE_BOX_RADIUS = 1  # 方框降噪的窗口半径（像素）
+    DENOISE_GUIDED_RADIUS = 2  # 引导滤波的窗口半径（像素）
+    DENOISE_GUIDED_EPS = 0.25  # 引导滤波的正则化参数（°C²），局部方差远大于该值的边缘被保留
     
     # 错误处理
     MAX_RETRY_ATTEMPTS = 3
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解码后端注册表
+每个后端声明自身能力（是否真实数据、支持的型号等），转换器据此筛选可用后端，
+并在首帧上做一次测速，选出对当前型号结果正确且最快的后端
+"""
+
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+class BackendCapabilities(NamedTuple):
+    """解码后端能力描述"""
+    name: str
+    description: str
+    real_data: bool                      # 输出真实温度（否则为演示数据）
+    reference: bool                      # 可作为其他后端结果的正确性参照
+    measurement_params: bool             # 支持自定义测温参数
+    models: Optional[Tuple[str, ...]]    # 支持的型号，None表示全部
+
+
+class DecoderBackend:
+    """
+    解码后端基类
+
+    子类声明 capabilities 并实现 decode；后端只持有转换器引用，
+    SDK会话池、查找表等资源仍由转换器统一管理。
+    """
+
+    capabilities: BackendCapabilities
+
+    def __init__(self, converter):
+        """
+        Args:
+            converter: 所属的 DJIThermalConverter
+        """
+        self.converter = converter
+
+    @property
+    def name(self) -> str:
+        return self.capabilities.name
+
+    def is_available(self) -> bool:
+        """当前环境下后端是否可用"""
+        return True
+
+    def supports_model(self, model: str) -> bool:
+        """是否支持指定型号"""
+        models = self.capabilities.models
+        return models is None or model in models
+
+    def param_violation(self, overrides: Dict) -> Optional[str]:
+        """测温参数超出后端接受的范围时返回说明，否则返回None"""
+        return None
+
+    def decode(self, rjpeg_data, resolution: Tuple[int, int], segments,
+               overrides: Dict, out=None,
+               model: Optional[str] = None) -> Tuple[np.ndarray, Optional[Dict]]:
+        """
+        解码温度数据
+
+        Args:
+            rjpeg_data: R-JPEG二进制数据
+            resolution: 图像分辨率 (width, height)
+            segments: JPEG段索引（可能为None）
+            overrides: 测温参数
+            out: 输出数组或 FrameBuffers
+            model: 设备型号，None表示转换器的默认型号
+
+        Returns:
+            Tuple[np.ndarray, Optional[Dict]]: float32温度数组和实际使用的测温参数
+        """
+        raise NotImplementedError
+
+
+# 名称 -> 后端类
+BACKEND_REGISTRY: Dict[str, type] = {}
+
+
+def register_backend(cls: type) -> type:
+    """注册解码后端（可作为类装饰器使用）"""
+    BACKEND_REGISTRY[cls.capabilities.name] = cls
+    return cls
+
+
+def _planck_models() -> Tuple[str, ...]:
+    """配置了普朗克标定常数的型号"""
+    return tuple(model for model, config in Config.DRONE_MODELS.items()
+                 if 'planck_constants' in config)
+
+
+@register_backend
+class SDKBackend(DecoderBackend):
+    """DJI Thermal SDK（ctypes调用libdirp）"""
+
+    capabilities = BackendCapabilities(
+        name='sdk',
+        description='DJI Thermal SDK v1.4',
+        real_data=True,
+        reference=True,
+        measurement_params=True,
+        models=tuple(Config.DRONE_MODELS),
+    )
+
+    def is_available(self) -> bool:
+        return self.converter.is_initialized
+
+    def param_violation(self, overrides: Dict) -> Optional[str]:
+        for name, (low, high) in Config.SDK_MEASUREMENT_PARAM_RANGES.items():
+            value = overrides.get(name)
+            if value is not None and not low <= float(value) <= high:
+                return f"测温参数 {name}={value} 超出SDK接受的范围 [{low:g}, {high:g}]"
+        return None
+
+    def decode(self, rjpeg_data, resolution, segments, overrides, out=None, model=None):
+        temperature_data = self.converter._parse_rjpeg_with_sdk(rjpeg_data, resolution, overrides, out)
+        return temperature_data, overrides or None
+
+
+@register_backend
+class RJPEGBackend(DecoderBackend):
+    """纯Python段解析 + 查找表辐射定标"""
+
+    capabilities = BackendCapabilities(
+        name='rjpeg',
+        description='Python R-JPEG Decoder (Planck Calibration)',
+        real_data=True,
+        reference=False,
+        measurement_params=True,
+        models=_planck_models(),
+    )
+
+    def decode(self, rjpeg_data, resolution, segments, overrides, out=None, model=None):
+        converter = self.converter
+        raw_data, _, embedded_params = converter._decode_raw(rjpeg_data, resolution, segments, out)
+        return converter._calibrate_raw(raw_data, embedded_params, overrides, out, model)
+
+
+@register_backend
+class MockBackend(DecoderBackend):
+    """演示用模拟数据"""
+
+    capabilities = BackendCapabilities(
+        name='mock',
+        description='Mock Data (SDK Not Installed)',
+        real_data=False,
+        reference=False,
+        measurement_params=False,
+        models=None,
+    )
+
+    def decode(self, rjpeg_data, resolution, segments, overrides, out=None, model=None):
+        return self.converter._create_mock_temperature_data(resolution, out), None
+
+
+def time_backend(decode: Callable[[], np.ndarray], repeat: int) -> Tuple[float, np.ndarray]:
+    """
+    测量后端解码耗时
+
+    Args:
+        decode: 无参数的解码调用
+        repeat: 计时次数（另有一次不计时的预热）
+
+    Returns:
+        Tuple[float, np.ndarray]: (单次最短耗时（毫秒）, 解码结果)
+    """
+    result = decode()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = decode()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0, result
+
+
+def rank_backends(timings: Dict[str, Tuple[float, np.ndarray]],
+                  backends: Dict[str, DecoderBackend]) -> List[str]:
+    """
+    按正确性和速度对测速结果排序
+
+    有参照后端（SDK）的结果时，平均偏差超过 Config.BACKEND_MAX_DEVIATION
+    的后端被排除；其余按耗时从快到慢排列。
+
+    Args:
+        timings: 后端名称 -> (耗时, 结果)
+        backends: 后端名称 -> 后端实例
+
+    Returns:
+        List[str]: 排序后的后端名称
+    """
+    reference = next((timings[name][1] for name in timings
+                      if backends[name].capabilities.reference), None)
+
+    accepted = []
+    for name, (elapsed, result) in timings.items():
+        if reference is not None and result is not reference:
+            deviation = float(np.mean(np.abs(result.astype(np.float64) - reference)))
+            if deviation > Config.BACKEND_MAX_DEVIATION:
+                continue
+        accepted.append((elapsed, name))
+    return [name for _, name in sorted(accepted)]
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+坏点校正
+为每台相机（按序列号）从一批图像或标定集中统计一次坏点掩膜并缓存到磁盘，
+之后每帧只对掩膜中的像素用邻域中值替换，开销远小于整帧滤波
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from numba_kernels import NUMBA_AVAILABLE, numba_enabled
+
+if NUMBA_AVAILABLE:
+    from numba_kernels import defect_median
+
+# 3×3邻域（不含中心）的偏移
+NEIGHBOUR_OFFSETS = tuple((dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx)
+
+
+def median3x3(frame: np.ndarray) -> np.ndarray:
+    """整帧3×3中值（边缘复制填充），只在统计坏点掩膜时使用"""
+    padded = np.pad(frame, 1, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (3, 3))
+    return np.median(windows.reshape(frame.shape + (9,)), axis=-1)
+
+
+class DefectMaskBuilder:
+    """
+    坏点掩膜统计器
+
+    逐帧计算像素与其3×3邻域中值的偏差，偏差超过该帧稳健标准差（MAD）
+    Config.DEFECT_THRESHOLD_SIGMA 倍的像素记为可疑；在至少
+    Config.DEFECT_MIN_FRACTION 比例的帧中可疑的像素判定为坏点（盲元/过热像素）。
+    """
+
+    def __init__(self, shape: Tuple[int, int]):
+        self.shape = shape
+        self.frame_count = 0
+        self._suspect_counts = np.zeros(shape, dtype=np.uint16)
+
+    def update(self, frame: np.ndarray):
+        """加入一帧（温度或原始计数）"""
+        if frame.shape != self.shape:
+            raise ValueError(f"帧尺寸 {frame.shape} 与掩膜尺寸 {self.shape} 不一致")
+        frame = frame.astype(np.float32, copy=False)
+        residual = np.abs(frame - median3x3(frame))
+        sigma = 1.4826 * float(np.median(residual))
+        # 平坦场景下MAD可能为0，给一个下限避免把量化噪声判为坏点
+        threshold = Config.DEFECT_THRESHOLD_SIGMA * max(sigma, Config.DEFECT_MIN_DEVIATION)
+        self._suspect_counts += residual > threshold
+        self.frame_count += 1
+
+    def build(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: bool坏点掩膜
+        """
+        if self.frame_count == 0:
+            return np.zeros(self.shape, dtype=bool)
+        return self._suspect_counts >= max(1, Config.DEFECT_MIN_FRACTION * self.frame_count)
+
+
+class DefectCorrector:
+    """
+    按坏点掩膜校正单帧
+
+    构造时预先计算坏点的线性索引和每个坏点的有效邻域（排除越界和同为坏点的邻居），
+    校正时只读取这些索引，向量化求中值后原地写回。
+    """
+
+    def __init__(self, mask: np.ndarray):
+        """
+        Args:
+            mask: bool坏点掩膜
+        """
+        self.mask = mask
+        self.shape = mask.shape
+        height, width = mask.shape
+        rows, cols = np.nonzero(mask)
+        self.indices = rows * width + cols
+
+        neighbour_rows = rows[:, None] + np.array([dy for dy, _ in NEIGHBOUR_OFFSETS])
+        neighbour_cols = cols[:, None] + np.array([dx for _, dx in NEIGHBOUR_OFFSETS])
+        inside = ((neighbour_rows >= 0) & (neighbour_rows < height)
+                  & (neighbour_cols >= 0) & (neighbour_cols < width))
+        neighbour_rows = np.clip(neighbour_rows, 0, height - 1)
+        neighbour_cols = np.clip(neighbour_cols, 0, width - 1)
+        valid = inside & ~mask[neighbour_rows, neighbour_cols]
+
+        self.neighbours = neighbour_rows * width + neighbour_cols
+        self.invalid = ~valid
+        counts = valid.sum(axis=1)
+        # 邻居全部无效的坏点（成片坏点）无法校正，保持原值
+        self.correctable = counts > 0
+        counts = np.maximum(counts, 1)
+        self.lower = (counts - 1) // 2
+        self.upper = counts // 2
+
+    @property
+    def defect_count(self) -> int:
+        return int(self.indices.size)
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """
+        原地校正坏点
+
+        Args:
+            frame: 形状与掩膜一致的可写数组
+
+        Returns:
+            np.ndarray: 校正后的同一数组
+        """
+        if self.indices.size == 0:
+            return frame
+        if frame.shape != self.shape:
+            raise ValueError(f"帧尺寸 {frame.shape} 与坏点掩膜尺寸 {self.shape} 不一致")
+
+        flat = frame.reshape(-1)
+        if numba_enabled():
+            defect_median(flat, self.indices, self.neighbours, self.invalid)
+            return frame
+        values = flat[self.neighbours].astype(np.float32)
+        # 无效邻居排到末尾，有效值的中值位于 lower/upper
+        values[self.invalid] = np.inf
+        values.sort(axis=1)
+        rows = np.arange(values.shape[0])
+        median = (values[rows, self.lower] + values[rows, self.upper]) * np.float32(0.5)
+        flat[self.indices[self.correctable]] = median[self.correctable]
+        return frame
+
+
+class DefectMaskCache:
+    """
+    每台相机的坏点掩膜缓存
+
+    掩膜保存在 cache_dir 中（每台相机、每种分辨率一个 .npz）。尚无掩膜的相机先用前
+    Config.DEFECT_CALIBRATION_FRAMES 帧统计，统计完成后写入磁盘，之后的帧都会被校正；
+    批量转换在转换前先统计好全部掩膜（见 DJIThermalConverter.prepare_defect_masks），
+    也可以先用一组标定图像运行一次来生成掩膜。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._correctors: Dict[Tuple[str, Tuple[int, int]], DefectCorrector] = {}
+        self._builders: Dict[Tuple[str, Tuple[int, int]], DefectMaskBuilder] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, camera_id: str, shape: Tuple[int, int]) -> str:
+        digest = hashlib.sha1(camera_id.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"defects_{digest}_{shape[1]}x{shape[0]}.npz")
+
+    def _load(self, camera_id: str, shape: Tuple[int, int]) -> Optional[DefectCorrector]:
+        disk_path = self._disk_path(camera_id, shape)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with np.load(disk_path, allow_pickle=False) as cached:
+                mask = np.unpackbits(cached['mask'], count=shape[0] * shape[1]).reshape(shape)
+        except (OSError, ValueError, KeyError):
+            return None
+        return DefectCorrector(mask.astype(bool))
+
+    def _save(self, camera_id: str, mask: np.ndarray):
+        disk_path = self._disk_path(camera_id, mask.shape)
+        temp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, mask=np.packbits(mask), camera=np.array(camera_id))
+        os.replace(temp_path, disk_path)
+
+    def corrector(self, camera_id: str, frame: np.ndarray) -> Optional[DefectCorrector]:
+        """
+        获取相机的坏点校正器；掩膜尚未统计完成时用该帧继续统计并返回None
+
+        Args:
+            camera_id: 相机标识（序列号）
+            frame: 当前帧
+        """
+        key = (camera_id, frame.shape)
+        corrector = self._correctors.get(key)
+        if corrector is not None:
+            return corrector
+
+        with self._lock:
+            corrector = self._correctors.get(key)
+            if corrector is None:
+                corrector = self._load(camera_id, frame.shape)
+            if corrector is None:
+                builder = self._builders.setdefault(key, DefectMaskBuilder(frame.shape))
+                builder.update(frame)
+                if builder.frame_count < Config.DEFECT_CALIBRATION_FRAMES:
+                    return None
+                mask = builder.build()
+                self._save(camera_id, mask)
+                del self._builders[key]
+                corrector = DefectCorrector(mask)
+            self._correctors[key] = corrector
+            return corrector
+
+    def finish(self) -> List[Tuple[str, int]]:
+        """
+        用已加入的帧生成尚未统计完成的掩膜（相机的帧数少于 Config.DEFECT_CALIBRATION_FRAMES 时）
+
+        Returns:
+            List[Tuple[str, int]]: 以不足帧数生成掩膜的 (相机标识, 帧数)
+        """
+        finished = []
+        with self._lock:
+            for (camera_id, shape), builder in self._builders.items():
+                mask = builder.build()
+                self._save(camera_id, mask)
+                self._correctors[(camera_id, shape)] = DefectCorrector(mask)
+                finished.append((camera_id, builder.frame_count))
+            self._builders.clear()
+        return finished
+
+    def correct(self, camera_id: str, frame: np.ndarray) -> int:
+        """
+        校正一帧（原地）
+
+        Returns:
+            int: 掩膜中的坏点数量；掩膜尚在统计时返回-1
+        """
+        corrector = self.corrector(camera_id, frame)
+        if corrector is None:
+            return -1
+        corrector.apply(frame)
+        return corrector.defect_count
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+空间降噪滤波
+可分离高斯、方框和引导滤波（双边滤波的快速近似，保边），全部为NumPy向量化实现，
+结果写回温度帧本身，在转换流程内完成降噪，无需再次读写TIFF
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from config import Config
+
+DENOISE_METHODS = ('gaussian', 'box', 'guided')
+
+# 不超过该半径的方框均值用平移累加，更大的半径用累积和
+BOX_SHIFT_MAX_RADIUS = 3
+
+
+@lru_cache(maxsize=16)
+def gaussian_kernel(sigma: float) -> np.ndarray:
+    """归一化的一维高斯核（半径为 ceil(3σ)）"""
+    radius = max(1, int(np.ceil(3.0 * sigma)))
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    kernel = (kernel / kernel.sum()).astype(np.float32)
+    kernel.setflags(write=False)
+    return kernel
+
+
+def _axis_slice(axis: int, start: int, stop: int):
+    return (slice(None),) * axis + (slice(start, stop),)
+
+
+def _convolve_axis(frame: np.ndarray, kernel: np.ndarray, axis: int, scratch: np.ndarray):
+    """沿一个轴原地做一维卷积（边缘镜像填充）"""
+    radius = len(kernel) // 2
+    size = frame.shape[axis]
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (radius, radius)
+    padded = np.pad(frame, pad, mode='reflect')
+
+    np.multiply(padded[_axis_slice(axis, 0, size)], kernel[0], out=frame)
+    for tap in range(1, len(kernel)):
+        np.multiply(padded[_axis_slice(axis, tap, tap + size)], kernel[tap], out=scratch)
+        frame += scratch
+
+
+def gaussian_filter(frame: np.ndarray, sigma: float = Config.DENOISE_GAUSSIAN_SIGMA) -> np.ndarray:
+    """
+    可分离高斯滤波（原地）
+
+    Args:
+        frame: 可写的float32温度帧
+        sigma: 高斯标准差（像素）
+
+    Returns:
+        np.ndarray: 滤波后的同一数组
+    """
+    kernel = gaussian_kernel(float(sigma))
+    scratch = np.empty_like(frame)
+    _convolve_axis(frame, kernel, 0, scratch)
+    _convolve_axis(frame, kernel, 1, scratch)
+    return frame
+
+
+def _box_mean(frame: np.ndarray, radius: int, out: np.ndarray) -> np.ndarray:
+    """
+    (2r+1)×(2r+1) 窗口均值（边缘镜像填充），out 可以就是 frame
+
+    小半径时按可分离的平移累加计算；大半径时用累积和，耗时与半径无关
+    """
+    window = 2 * radius + 1
+    if radius <= BOX_SHIFT_MAX_RADIUS:
+        kernel = np.full(window, 1.0 / window, dtype=np.float32)
+        scratch = np.empty_like(out)
+        if out is not frame:
+            np.copyto(out, frame)
+        _convolve_axis(out, kernel, 0, scratch)
+        _convolve_axis(out, kernel, 1, scratch)
+        return out
+
+    padded = np.pad(frame, radius, mode='reflect').astype(np.float64)
+    # 前置一行/一列0后做累积和，窗口和 = 两个累积和之差
+    sums = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.float64)
+    np.cumsum(padded, axis=0, out=sums[1:, 1:])
+    np.cumsum(sums[1:, 1:], axis=1, out=sums[1:, 1:])
+    height, width = frame.shape
+    total = (sums[window:window + height, window:window + width]
+             - sums[:height, window:window + width]
+             - sums[window:window + height, :width]
+             + sums[:height, :width])
+    np.multiply(total, 1.0 / (window * window), out=out, casting='same_kind')
+    return out
+
+
+def box_filter(frame: np.ndarray, radius: int = Config.DENOISE_BOX_RADIUS) -> np.ndarray:
+    """
+    方框（均值）滤波（原地）
+
+    Args:
+        frame: 可写的float32温度帧
+        radius: 窗口半径（像素）
+
+    Returns:
+        np.ndarray: 滤波后的同一数组
+    """
+    return _box_mean(frame, radius, frame)
+
+
+def guided_filter(frame: np.ndarray, radius: int = Config.DENOISE_GUIDED_RADIUS,
+                  eps: float = Config.DENOISE_GUIDED_EPS) -> np.ndarray:
+    """
+    以帧自身为引导图的引导滤波（原地）
+
+    局部方差远大于 eps 的区域（目标边缘）几乎不被平滑，平坦区域接近方框滤波，
+    效果近似双边滤波，但只需若干次方框滤波，耗时与窗口大小无关。
+
+    Args:
+        frame: 可写的float32温度帧
+        radius: 窗口半径（像素）
+        eps: 正则化参数（°C²），越大平滑越强
+
+    Returns:
+        np.ndarray: 滤波后的同一数组
+    """
+    mean = _box_mean(frame, radius, np.empty_like(frame))
+    variance = _box_mean(np.square(frame), radius, np.empty_like(frame))
+    variance -= np.square(mean)
+    # a = var / (var + eps)，b = mean - a * mean
+    gain = np.maximum(variance, 0, out=variance)
+    gain /= gain + np.float32(eps)
+    bias = mean
+    bias -= gain * mean
+    _box_mean(gain, radius, gain)
+    _box_mean(bias, radius, bias)
+    frame *= gain
+    frame += bias
+    return frame
+
+
+def denoise(frame: np.ndarray, method: str) -> np.ndarray:
+    """
+    按名称对温度帧做降噪（原地，参数取 Config 中的默认值）
+
+    Args:
+        frame: 可写的float32温度帧
+        method: 'gaussian'、'box' 或 'guided'
+
+    Returns:
+        np.ndarray: 滤波后的同一数组
+    """
+    if method == 'gaussian':
+        return gaussian_filter(frame)
+    if method == 'box':
+        return box_filter(frame)
+    if method == 'guided':
+        return guided_filter(frame)
+    raise ValueError(f"未知的降噪方法: {method}，可选: {', '.join(DENOISE_METHODS)}")
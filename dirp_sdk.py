@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DJI Thermal SDK (libdirp) 的ctypes绑定层
+负责函数签名声明、输出缓冲区复用以及多线程调用时的会话池
+"""
+
+import ctypes
+import queue
+import threading
+from contextlib import contextmanager
+from ctypes import Structure, POINTER, byref, c_int32, c_float, c_void_p
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# DIRP返回码
+DIRP_SUCCESS = 0
+DIRP_ERROR_MESSAGES = {
+    -1: '内存分配失败 (DIRP_ERROR_MALLOC)',
+    -2: '空指针 (DIRP_ERROR_POINTER_NULL)',
+    -3: '参数无效 (DIRP_ERROR_INVALID_PARAMS)',
+    -4: 'RAW数据无效 (DIRP_ERROR_INVALID_RAW)',
+    -5: '文件头无效 (DIRP_ERROR_INVALID_HEADER)',
+    -6: '标定曲线无效 (DIRP_ERROR_INVALID_CURVE)',
+    -7: 'R-JPEG解析失败 (DIRP_ERROR_RJPEG_PARSE)',
+    -8: '缓冲区大小错误 (DIRP_ERROR_SIZE)',
+    -9: '句柄无效 (DIRP_ERROR_INVALID_HANDLE)',
+    -10: '输入格式错误 (DIRP_ERROR_FORMAT_INPUT)',
+    -11: '输出格式错误 (DIRP_ERROR_FORMAT_OUTPUT)',
+    -12: '不支持的功能 (DIRP_ERROR_UNSUPPORTED_FUNC)',
+    -13: '资源未就绪 (DIRP_ERROR_NOT_READY)',
+    -14: '激活失败 (DIRP_ERROR_ACTIVATION)',
+    -32: '高级错误码 (DIRP_ERROR_ADVANCED)',
+}
+DIRP_ERROR_UNSUPPORTED_FUNC = -12
+
+
+class DirpResolution(Structure):
+    """dirp_resolution_t"""
+    _fields_ = [
+        ('width', c_int32),
+        ('height', c_int32),
+    ]
+
+
+class DirpMeasurementParams(Structure):
+    """dirp_measurement_params_t（ambient_temp 仅新版本SDK使用，旧版本会忽略）"""
+    _fields_ = [
+        ('distance', c_float),      # 目标距离 1~25 m
+        ('humidity', c_float),      # 相对湿度 20~100 %
+        ('emissivity', c_float),    # 发射率 0.10~1.00
+        ('reflection', c_float),    # 反射温度 °C
+        ('ambient_temp', c_float),  # 环境温度 °C
+    ]
+
+
+class DirpError(RuntimeError):
+    """DIRP接口调用失败"""
+
+    def __init__(self, func_name: str, code: int):
+        self.func_name = func_name
+        self.code = code
+        message = DIRP_ERROR_MESSAGES.get(code, '未知错误')
+        super().__init__(f"{func_name} 返回 {code}: {message}")
+
+
+def buffer_address(data) -> Tuple[int, int, object]:
+    """
+    获取任意缓冲区协议对象的内存地址（不复制数据）
+
+    Args:
+        data: bytes / bytearray / memoryview / mmap / np.ndarray 等
+
+    Returns:
+        Tuple[int, int, object]: (地址, 字节数, 需要在调用期间保持存活的引用)
+    """
+    view = np.frombuffer(data, dtype=np.uint8)
+    return view.ctypes.data, view.nbytes, view
+
+
+class DirpSDK:
+    """
+    libdirp 函数绑定
+
+    加载时一次性解析符号并声明 argtypes/restype，之后的每次调用
+    不再重复查找符号或进行参数类型推断。
+    """
+
+    def __init__(self, library: ctypes.CDLL):
+        """
+        Args:
+            library: 已加载的 libdirp 动态库
+        """
+        self.library = library
+
+        self._create_from_rjpeg = self._bind(
+            'dirp_create_from_rjpeg', [c_void_p, c_int32, POINTER(c_void_p)])
+        self._destroy = self._bind('dirp_destroy', [c_void_p])
+        self._get_rjpeg_resolution = self._bind(
+            'dirp_get_rjpeg_resolution', [c_void_p, POINTER(DirpResolution)])
+        self._measure = self._bind('dirp_measure', [c_void_p, c_void_p, c_int32])
+        self._measure_ex = self._bind('dirp_measure_ex', [c_void_p, c_void_p, c_int32])
+        self._get_original_raw = self._bind(
+            'dirp_get_original_raw', [c_void_p, c_void_p, c_int32])
+        self._get_measurement_params = self._bind(
+            'dirp_get_measurement_params', [c_void_p, POINTER(DirpMeasurementParams)])
+        self._set_measurement_params = self._bind(
+            'dirp_set_measurement_params', [c_void_p, POINTER(DirpMeasurementParams)])
+
+        self.supports_measure_ex = self._measure_ex is not None
+
+    def _bind(self, name: str, argtypes):
+        """解析符号并声明函数签名，缺失的可选符号返回None"""
+        func = getattr(self.library, name, None)
+        if func is None:
+            return None
+        func.argtypes = argtypes
+        func.restype = c_int32
+        return func
+
+    @staticmethod
+    def _check(func_name: str, code: int):
+        if code != DIRP_SUCCESS:
+            raise DirpError(func_name, code)
+
+    def create_from_rjpeg(self, data) -> c_void_p:
+        """从R-JPEG数据创建DIRP句柄"""
+        address, size, keepalive = buffer_address(data)
+        handle = c_void_p()
+        self._check('dirp_create_from_rjpeg',
+                    self._create_from_rjpeg(address, size, byref(handle)))
+        return handle
+
+    def destroy(self, handle: c_void_p):
+        """释放DIRP句柄"""
+        self._check('dirp_destroy', self._destroy(handle))
+
+    def get_rjpeg_resolution(self, handle: c_void_p) -> Tuple[int, int]:
+        """获取R-JPEG热图分辨率 (width, height)"""
+        resolution = DirpResolution()
+        self._check('dirp_get_rjpeg_resolution',
+                    self._get_rjpeg_resolution(handle, byref(resolution)))
+        return resolution.width, resolution.height
+
+    def measure(self, handle: c_void_p, out: np.ndarray):
+        """测温，结果为int16（0.1°C）写入out"""
+        self._check('dirp_measure',
+                    self._measure(handle, out.ctypes.data, out.nbytes))
+
+    def measure_ex(self, handle: c_void_p, out: np.ndarray):
+        """测温，结果为float32（°C）写入out"""
+        self._check('dirp_measure_ex',
+                    self._measure_ex(handle, out.ctypes.data, out.nbytes))
+
+    def get_original_raw(self, handle: c_void_p, out: np.ndarray):
+        """读取原始RAW数据（uint16）写入out"""
+        self._check('dirp_get_original_raw',
+                    self._get_original_raw(handle, out.ctypes.data, out.nbytes))
+
+    def get_measurement_params(self, handle: c_void_p) -> DirpMeasurementParams:
+        """读取测温参数"""
+        params = DirpMeasurementParams()
+        self._check('dirp_get_measurement_params',
+                    self._get_measurement_params(handle, byref(params)))
+        return params
+
+    def set_measurement_params(self, handle: c_void_p, params: DirpMeasurementParams):
+        """设置测温参数"""
+        self._check('dirp_set_measurement_params',
+                    self._set_measurement_params(handle, byref(params)))
+
+
+class DirpSession:
+    """
+    单线程使用的SDK会话
+
+    持有按分辨率缓存的输出缓冲区，同一会话处理的每一帧都复用这些缓冲区。
+    DIRP句柄与具体的R-JPEG数据绑定，因此在每次测温时创建并立即释放。
+    """
+
+    def __init__(self, sdk: DirpSDK):
+        self.sdk = sdk
+        self._buffers: Dict[Tuple[int, int, str], np.ndarray] = {}
+
+    def _buffer(self, width: int, height: int, dtype) -> np.ndarray:
+        """获取（必要时创建）指定分辨率和类型的输出缓冲区"""
+        key = (width, height, np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty((height, width), dtype=dtype)
+            self._buffers[key] = buffer
+        return buffer
+
+    def measure(self, rjpeg_data, out: Optional[np.ndarray] = None,
+                measurement_params: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        解析R-JPEG并测温
+
+        Args:
+            rjpeg_data: R-JPEG二进制数据（任意缓冲区协议对象）
+            out: 可选的float32输出数组，形状需为 (height, width)
+            measurement_params: 可选的测温参数，覆盖文件中记录的对应字段
+
+        Returns:
+            np.ndarray: float32温度数组（°C）。未提供out时返回会话内部缓冲区，
+                        其内容在本会话下一次测温时会被覆盖
+        """
+        sdk = self.sdk
+        handle = sdk.create_from_rjpeg(rjpeg_data)
+        try:
+            width, height = sdk.get_rjpeg_resolution(handle)
+            if out is None:
+                out = self._buffer(width, height, np.float32)
+            elif out.shape != (height, width) or out.dtype != np.float32:
+                raise ValueError(
+                    f"输出数组应为 float32 ({height}, {width})，实际为 {out.dtype} {out.shape}")
+
+            if measurement_params:
+                params = sdk.get_measurement_params(handle)
+                for name, value in measurement_params.items():
+                    if value is not None and hasattr(params, name):
+                        setattr(params, name, value)
+                sdk.set_measurement_params(handle, params)
+
+            if sdk.supports_measure_ex:
+                try:
+                    sdk.measure_ex(handle, out)
+                    return out
+                except DirpError as e:
+                    if e.code != DIRP_ERROR_UNSUPPORTED_FUNC:
+                        raise
+
+            # 旧版本SDK仅支持int16输出（0.1°C）
+            raw = self._buffer(width, height, np.int16)
+            sdk.measure(handle, raw)
+            np.multiply(raw, np.float32(0.1), out=out)
+            return out
+        finally:
+            sdk.destroy(handle)
+
+    def original_raw(self, rjpeg_data, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        解析R-JPEG并读取原始RAW数据
+
+        Args:
+            rjpeg_data: R-JPEG二进制数据（任意缓冲区协议对象）
+            out: 可选的uint16输出数组，形状需为 (height, width)
+
+        Returns:
+            np.ndarray: uint16原始计数。未提供out时返回会话内部缓冲区
+        """
+        sdk = self.sdk
+        handle = sdk.create_from_rjpeg(rjpeg_data)
+        try:
+            width, height = sdk.get_rjpeg_resolution(handle)
+            if out is None:
+                out = self._buffer(width, height, np.uint16)
+            elif out.shape != (height, width) or out.dtype != np.uint16:
+                raise ValueError(
+                    f"输出数组应为 uint16 ({height}, {width})，实际为 {out.dtype} {out.shape}")
+            sdk.get_original_raw(handle, out)
+            return out
+        finally:
+            sdk.destroy(handle)
+
+
+class DirpSessionPool:
+    """
+    SDK会话池
+
+    每个会话同一时间只被一个线程使用，使转换器可以被多个线程并发调用，
+    同时每个会话的输出缓冲区在其生命周期内持续复用。
+    """
+
+    def __init__(self, sdk: DirpSDK, size: int = 4):
+        """
+        Args:
+            sdk: SDK绑定
+            size: 会话数量（即最大并发调用数）
+        """
+        self.sdk = sdk
+        self.size = max(1, size)
+        self._sessions = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self):
+        """借出一个会话，用完后自动归还"""
+        session = self._acquire()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
+    def _acquire(self) -> DirpSession:
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return DirpSession(self.sdk)
+
+        return self._sessions.get()
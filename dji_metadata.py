@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DJI图像元数据提取
+直接读取EXIF IFD和DJI XMP数据包，获取GPS、高度、云台姿态、拍摄时间、相机型号和序列号，
+整次飞行的结果可以输出为按列组织的NumPy数组
+"""
+
+import os
+import re
+import struct
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from config import Config
+from rjpeg_parser import (EXIF_TAG_MAKE, EXIF_TAG_MODEL, MARKER_APP1, RJPEGSegments,
+                          exif_tiff, read_ifd, walk_segment_headers)
+
+# APP1中XMP数据包的标识
+XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+
+# EXIF标签
+EXIF_TAG_DATETIME = 0x0132
+EXIF_TAG_EXIF_IFD = 0x8769
+EXIF_TAG_GPS_IFD = 0x8825
+EXIF_TAG_DATETIME_ORIGINAL = 0x9003
+EXIF_TAG_BODY_SERIAL = 0xA431
+
+# GPS IFD标签
+GPS_TAG_LATITUDE_REF = 1
+GPS_TAG_LATITUDE = 2
+GPS_TAG_LONGITUDE_REF = 3
+GPS_TAG_LONGITUDE = 4
+GPS_TAG_ALTITUDE_REF = 5
+GPS_TAG_ALTITUDE = 6
+
+EXIF_DATETIME_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+# XMP中的 drone-dji 属性（attr="value" 或 <tag>value</tag> 两种写法）
+XMP_DJI_PATTERN = re.compile(rb'drone-dji:(\w+)(?:="([^"]*)"|>([^<]*)<)')
+
+# DJI XMP字段 -> ImageMetadata字段
+XMP_FIELDS = {
+    'AbsoluteAltitude': 'absolute_altitude',
+    'RelativeAltitude': 'relative_altitude',
+    'GimbalYawDegree': 'gimbal_yaw',
+    'GimbalPitchDegree': 'gimbal_pitch',
+    'GimbalRollDegree': 'gimbal_roll',
+    'FlightYawDegree': 'flight_yaw',
+    'FlightPitchDegree': 'flight_pitch',
+    'FlightRollDegree': 'flight_roll',
+    'GpsLatitude': 'latitude',
+    'GpsLongitude': 'longitude',
+    'GpsLongtitude': 'longitude',  # 部分固件的拼写
+}
+
+# XMP中可能记录的相机序列号字段
+XMP_SERIAL_FIELDS = ('CameraSerialNumber', 'DroneSerialNumber')
+
+
+class ImageMetadata(NamedTuple):
+    """单张图像的拍摄元数据，缺失的字段为None"""
+    make: Optional[str] = None
+    model: Optional[str] = None
+    serial: Optional[str] = None
+    capture_time: Optional[str] = None        # ISO 8601
+    latitude: Optional[float] = None          # 度，南纬为负
+    longitude: Optional[float] = None         # 度，西经为负
+    absolute_altitude: Optional[float] = None  # 米（海拔）
+    relative_altitude: Optional[float] = None  # 米（相对起飞点）
+    gimbal_yaw: Optional[float] = None
+    gimbal_pitch: Optional[float] = None
+    gimbal_roll: Optional[float] = None
+    flight_yaw: Optional[float] = None
+    flight_pitch: Optional[float] = None
+    flight_roll: Optional[float] = None
+
+
+STRING_FIELDS = ('make', 'model', 'serial')
+FLOAT_FIELDS = tuple(field for field in ImageMetadata._fields
+                     if field not in STRING_FIELDS and field != 'capture_time')
+
+
+def _dms_to_degrees(dms, ref: Optional[str]) -> Optional[float]:
+    """(度, 分, 秒) 转换为十进制度"""
+    if not dms or len(dms) != 3:
+        return None
+    degrees = dms[0] + dms[1] / 60.0 + dms[2] / 3600.0
+    return -degrees if ref in ('S', 'W') else degrees
+
+
+def _parse_exif_datetime(value) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value, EXIF_DATETIME_FORMAT).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_exif(payload) -> Dict[str, object]:
+    """
+    解析APP1 EXIF负载中的相机、时间和GPS信息
+
+    Returns:
+        Dict[str, object]: ImageMetadata字段 -> 值（只包含能读取到的字段）
+    """
+    parsed = exif_tiff(payload)
+    if parsed is None:
+        return {}
+    tiff, order = parsed
+    ifd0_offset, = struct.unpack_from(order + 'I', tiff, 4)
+    ifd0 = read_ifd(tiff, ifd0_offset, order)
+
+    fields = {}
+    if isinstance(ifd0.get(EXIF_TAG_MAKE), str):
+        fields['make'] = ifd0[EXIF_TAG_MAKE]
+    if isinstance(ifd0.get(EXIF_TAG_MODEL), str):
+        fields['model'] = ifd0[EXIF_TAG_MODEL]
+
+    capture_time = _parse_exif_datetime(ifd0.get(EXIF_TAG_DATETIME))
+    if EXIF_TAG_EXIF_IFD in ifd0:
+        exif_ifd = read_ifd(tiff, ifd0[EXIF_TAG_EXIF_IFD][0], order,
+                            (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_BODY_SERIAL))
+        capture_time = _parse_exif_datetime(exif_ifd.get(EXIF_TAG_DATETIME_ORIGINAL)) or capture_time
+        if exif_ifd.get(EXIF_TAG_BODY_SERIAL):
+            fields['serial'] = exif_ifd[EXIF_TAG_BODY_SERIAL]
+    if capture_time:
+        fields['capture_time'] = capture_time
+
+    if EXIF_TAG_GPS_IFD in ifd0:
+        gps = read_ifd(tiff, ifd0[EXIF_TAG_GPS_IFD][0], order)
+        latitude = _dms_to_degrees(gps.get(GPS_TAG_LATITUDE), gps.get(GPS_TAG_LATITUDE_REF))
+        longitude = _dms_to_degrees(gps.get(GPS_TAG_LONGITUDE), gps.get(GPS_TAG_LONGITUDE_REF))
+        if latitude is not None:
+            fields['latitude'] = latitude
+        if longitude is not None:
+            fields['longitude'] = longitude
+        if gps.get(GPS_TAG_ALTITUDE):
+            altitude = gps[GPS_TAG_ALTITUDE][0]
+            # 高度参考: 0为海平面以上，1为海平面以下（BYTE，个别相机写为UNDEFINED）
+            below_sea_level = gps.get(GPS_TAG_ALTITUDE_REF, (0,))[:1] in ((1,), b'\x01')
+            fields['absolute_altitude'] = -altitude if below_sea_level else altitude
+    return fields
+
+
+def parse_xmp(payload) -> Dict[str, object]:
+    """
+    解析APP1 XMP数据包中的 drone-dji 字段
+
+    Returns:
+        Dict[str, object]: ImageMetadata字段 -> 值（只包含能读取到的字段）
+    """
+    data = bytes(payload)
+    if not data.startswith(XMP_HEADER):
+        return {}
+
+    fields = {}
+    for match in XMP_DJI_PATTERN.finditer(data):
+        name = match.group(1).decode('ascii')
+        value = (match.group(2) if match.group(2) is not None else match.group(3)).strip()
+        if name in XMP_FIELDS:
+            try:
+                fields[XMP_FIELDS[name]] = float(value)
+            except ValueError:
+                pass
+        elif name in XMP_SERIAL_FIELDS and value and 'serial' not in fields:
+            fields['serial'] = value.decode('ascii', 'replace')
+    return fields
+
+
+def _merge(payloads: Iterable) -> ImageMetadata:
+    """合并各APP1段的解析结果（XMP中更精确的GPS/高度优先）"""
+    exif_fields: Dict[str, object] = {}
+    xmp_fields: Dict[str, object] = {}
+    for payload in payloads:
+        head = bytes(payload[:len(XMP_HEADER)])
+        if head.startswith(b'Exif') and not exif_fields:
+            exif_fields = parse_exif(payload)
+        elif head == XMP_HEADER and not xmp_fields:
+            xmp_fields = parse_xmp(payload)
+    return ImageMetadata(**{**exif_fields, **xmp_fields})
+
+
+def extract_metadata(data) -> ImageMetadata:
+    """
+    从已读取的R-JPEG缓冲区或段索引中提取元数据
+
+    Args:
+        data: R-JPEG二进制数据或 RJPEGSegments
+
+    Returns:
+        ImageMetadata: 拍摄元数据
+    """
+    segments = data if isinstance(data, RJPEGSegments) else RJPEGSegments(data)
+    return _merge(segments.get(MARKER_APP1))
+
+
+def read_metadata_file(file_path: str) -> ImageMetadata:
+    """
+    从文件中提取元数据，只读取APP1段，其余段（包括热红外数据）通过seek跳过
+
+    Args:
+        file_path: 图像文件路径
+
+    Returns:
+        ImageMetadata: 拍摄元数据
+    """
+    payloads = []
+    with open(file_path, 'rb', buffering=0) as f:
+        for marker, offset, length in walk_segment_headers(f):
+            if marker == MARKER_APP1:
+                payloads.append(f.read(length))
+    return _merge(payloads)
+
+
+def to_columns(records: List[ImageMetadata],
+               paths: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    将多张图像的元数据转换为按列组织的数组
+
+    Args:
+        records: 元数据列表
+        paths: 可选的文件路径列表（输出为 'path' 列）
+
+    Returns:
+        Dict[str, np.ndarray]: 数值列为float64（缺失为NaN），字符串列为str数组（缺失为空串），
+                               capture_time 为 datetime64[s]（缺失为NaT）
+    """
+    columns: Dict[str, np.ndarray] = {}
+    if paths is not None:
+        columns['path'] = np.array(paths, dtype=str)
+    for field in STRING_FIELDS:
+        columns[field] = np.array([getattr(r, field) or '' for r in records], dtype=str)
+    columns['capture_time'] = np.array([r.capture_time or 'NaT' for r in records],
+                                       dtype='datetime64[s]')
+    for field in FLOAT_FIELDS:
+        columns[field] = np.array([np.nan if getattr(r, field) is None else getattr(r, field)
+                                   for r in records], dtype=np.float64)
+    return columns
+
+
+def extract_survey_metadata(input_dir: str, recursive: bool = True) -> Dict[str, np.ndarray]:
+    """
+    提取整个目录（一次飞行）中所有JPG图像的元数据
+
+    Args:
+        input_dir: 图像目录
+        recursive: 是否递归处理子目录
+
+    Returns:
+        Dict[str, np.ndarray]: 按列组织的元数据（见 to_columns），按路径排序
+    """
+    paths = []
+    for root, dirs, files in os.walk(input_dir):
+        paths.extend(os.path.join(root, name) for name in files
+                     if name.lower().endswith(('.jpg', '.jpeg')))
+        if not recursive:
+            break
+    paths.sort()
+    return to_columns([read_metadata_file(path) for path in paths], paths)
+
+
+def detect_model(metadata: ImageMetadata) -> Optional[str]:
+    """
+    根据EXIF中的Model字段识别无人机型号
+
+    Args:
+        metadata: 拍摄元数据
+
+    Returns:
+        Optional[str]: Config.DRONE_MODELS 中的型号，无法识别时返回None
+    """
+    if not metadata.model:
+        return None
+    return Config.EXIF_MODEL_ALIASES.get(metadata.model.strip().upper().replace(' ', '-'))
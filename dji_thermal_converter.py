@@ -11,8 +11,10 @@ import sys
 import numpy as np
 from PIL import Image
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import io
 import json
+import threading
 from datetime import datetime
 
 # 尝试导入DJI Thermal SDK相关库
@@ -23,22 +25,184 @@ try:
 except ImportError:
     DJI_SDK_AVAILABLE = False
 
+from batch_pool import BatchWorkerError, BatchWorkerPool, resolve_jobs
+from config import Config
+from defect_correction import DefectMaskCache
+from denoise import DENOISE_METHODS, denoise as denoise_frame
+from decoder_backends import BACKEND_REGISTRY, rank_backends, time_backend
+from flat_field import FlatFieldCache, FlatFieldEstimator, apply_flat_field
+from dji_metadata import ImageMetadata, detect_model, extract_metadata, read_metadata_file
+from raw_cache import RawCountCache
+from raw_tiff import encode_raw_tiff
+from rjpeg_parser import (PrefillReader, RJPEGFormatError, RJPEGSegments, as_byte_view, map_file,
+                          sniff, sniff_file)
+from synthetic_scene import get_scene
+from thermal_calibration import MeasurementParams, apply_temperature_lut, get_temperature_lut, scale_to_int16
+from undistortion import undistort
+
+# 按普朗克常数定标温度的后端（结果精度取决于常数是否经过实测标定）
+PLANCK_BACKENDS = ('rjpeg', 'raw-cache')
+
+# 各解码后端在元数据中的说明
+BACKEND_DESCRIPTIONS = {
+    **{name: backend.capabilities.description for name, backend in BACKEND_REGISTRY.items()},
+    'raw-cache': 'Raw Count Cache (Planck Calibration)',
+}
+
+if DJI_SDK_AVAILABLE:
+    from dirp_sdk import DirpSDK, DirpSessionPool
+    from sdk_worker import SDKWorkerCrashed, SDKWorkerPool, SDKWorkerTimeout
+
+
+class FrameBuffers:
+    """
+    按形状和类型复用的帧缓冲区
+    
+    批量转换时作为 out 传入，每种分辨率只分配一次温度帧、原始计数和编码用的int16缓冲区，
+    文件内容也读入同一块复用的字节缓冲区，之后的每张图像都复用它们。
+    同一对象只应在一个线程中使用。
+    """
+    
+    def __init__(self):
+        self._buffers: Dict[Tuple[Tuple[int, ...], str], np.ndarray] = {}
+        self._file_buffer: Optional[np.ndarray] = None
+    
+    def get(self, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        """获取（必要时创建）指定形状和类型的缓冲区"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buffer
+        return buffer
+    
+    def read_file(self, file_path: str,
+                  screen: Optional[Callable[[PrefillReader], bool]] = None) -> Optional[memoryview]:
+        """
+        将文件读入复用的字节缓冲区（容量不足时按需扩大并预留余量）
+        
+        Args:
+            file_path: 文件路径
+            screen: 可选的筛选函数，通过 PrefillReader 读取文件头并判断是否继续读取；
+                    筛选时已读入的部分直接作为完整内容的开头，文件只打开和读取一次
+        
+        Returns:
+            Optional[memoryview]: 文件内容的只读视图（读取下一个文件前有效），被筛除时为None
+        """
+        with open(file_path, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if self._file_buffer is None or self._file_buffer.size < size:
+                self._file_buffer = np.empty(size + size // 4, dtype=np.uint8)
+            view = memoryview(self._file_buffer)[:size]
+            filled = 0
+            if screen is not None:
+                reader = PrefillReader(f, view)
+                if not screen(reader):
+                    return None
+                filled = reader.filled
+            while filled < size:
+                count = f.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+        return view[:filled].toreadonly()
+
+
+def resolve_output(out, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+    """
+    获取输出数组
+    
+    Args:
+        out: None（新分配）、FrameBuffers（复用缓冲区）或调用方提供的数组
+        shape: 需要的形状
+        dtype: 需要的类型
+        
+    Returns:
+        np.ndarray: 可写入结果的数组
+    """
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if isinstance(out, FrameBuffers):
+        return out.get(shape, dtype)
+    if out.shape != tuple(shape) or out.dtype != np.dtype(dtype) or not out.flags.c_contiguous:
+        raise ValueError(f"输出数组应为连续的 {np.dtype(dtype)} {tuple(shape)}，"
+                         f"实际为 {out.dtype} {out.shape}")
+    return out
+
 class DJIThermalConverter:
     """
     基于DJI Thermal SDK的热红外图像转换器
     支持M30T, H20T, H30T, 御2行业进阶版(M2EA)
     """
     
-    def __init__(self, sdk_path: str = None):
+    def __init__(self, sdk_path: str = None, measurement_params: Optional[Dict] = None,
+                 raw_cache_dir: Optional[str] = None, use_mmap: bool = False,
+                 backend: str = 'auto', isolate_sdk: bool = Config.SDK_WORKER_ISOLATION,
+                 file_timeout: Optional[float] = Config.FILE_TIMEOUT_SECONDS,
+                 model: str = 'auto', defect_mask_dir: Optional[str] = None,
+                 undistort: bool = False, flat_field_dir: Optional[str] = None,
+                 denoise: Optional[str] = None, raw_output: bool = False,
+                 selected_backends: Optional[Dict[str, str]] = None):
         """
         初始化DJI热红外转换器
         
         Args:
             sdk_path: DJI Thermal SDK路径
+            measurement_params: 默认测温参数（distance / humidity / emissivity /
+                                reflection / ambient_temp），覆盖文件中记录的值
+            raw_cache_dir: 原始计数缓存目录，指定后启用原始计数缓存
+            use_mmap: 是否以内存映射方式读取输入文件（零拷贝，适合大批量转换）
+            backend: 解码后端，'auto' 表示在首帧上测速后自动选择，
+                     也可指定 BACKEND_REGISTRY 中的名称（sdk / rjpeg / mock）
+            isolate_sdk: 是否在独立的工作进程中调用SDK（原生库崩溃时只重启工作进程）
+            file_timeout: 单个文件的SDK处理期限（秒），None表示不限制；仅在 isolate_sdk 时生效
+            model: 设备型号，'auto' 表示根据每个文件的EXIF自动识别（按相机序列号/目录缓存），
+                   无法识别时使用 Config.DEFAULT_DRONE_MODEL
+            defect_mask_dir: 坏点掩膜目录，指定后启用坏点校正（每台相机的掩膜只统计一次）
+            undistort: 是否按型号的镜头参数校正畸变（重映射表按型号和分辨率缓存）
+            flat_field_dir: 平场估计缓存目录，指定后批量转换分两阶段进行：
+                            先统计整批帧的平场偏移，再逐帧校正后保存
+            denoise: 保存前的降噪方法（'gaussian' / 'box' / 'guided'），None表示不降噪
+            raw_output: 是否输出原始计数TIFF（16位原始计数 + 定标参数标签，读取时再定标，
+                        见 raw_tiff.RawThermalImage），而不是温度TIFF
+            selected_backends: 自动模式下已测速选定的后端（型号 -> 后端名称），这些型号不再测速；
+                               批量转换的工作进程由此沿用父进程的选择
+            
+        Raises:
+            ValueError: 后端名称未注册、型号不受支持、降噪方法未知，
+                        或原始计数输出与作用于温度的校正同时启用
+            RuntimeError: 指定的后端在当前环境下不可用
         """
+        if backend != 'auto' and backend not in BACKEND_REGISTRY:
+            raise ValueError(f"未知的解码后端: {backend}，可选: auto, {', '.join(BACKEND_REGISTRY)}")
+        if model != 'auto' and model.upper() not in Config.DRONE_MODELS:
+            raise ValueError(f"不支持的无人机型号: {model}")
+        if denoise is not None and denoise not in DENOISE_METHODS:
+            raise ValueError(f"未知的降噪方法: {denoise}，可选: {', '.join(DENOISE_METHODS)}")
+        if raw_output and (defect_mask_dir or undistort or flat_field_dir or denoise):
+            raise ValueError("原始计数输出保存未经处理的计数，不能与坏点、畸变、平场校正或降噪同时使用")
+        
         self.logger = self._setup_logger()
         self.sdk_path = sdk_path
+        self.measurement_params = dict(measurement_params or {})
+        self.raw_cache = RawCountCache(raw_cache_dir) if raw_cache_dir else None
+        self.defect_masks = DefectMaskCache(defect_mask_dir) if defect_mask_dir else None
+        self.undistort = undistort
+        self.flat_field_cache = FlatFieldCache(flat_field_dir) if flat_field_dir else None
+        # 当前批次的平场偏移: (相机标识, 帧形状) -> 偏移图
+        self.flat_fields: Dict[Tuple[str, Tuple[int, int]], np.ndarray] = {}
+        self.denoise = denoise
+        self.raw_output = raw_output
+        self.use_mmap = use_mmap
+        self.isolate_sdk = isolate_sdk
+        self.file_timeout = file_timeout
+        # 导致SDK工作进程崩溃的文件: 路径 -> 原因
+        self.quarantined: Dict[str, str] = {}
+        # SDK处理超时的文件: 路径 -> 原因
+        self.timed_out: Dict[str, str] = {}
         self.sdk_handle = None
+        self.dirp = None
+        self.dirp_pool = None
         self.is_initialized = False
         
         # 支持的设备型号配置
@@ -69,12 +233,42 @@ class DJIThermalConverter:
             }
         }
         
-        # 默认设备型号
-        self.default_model = 'M30T'
+        # 设备型号：指定型号时所有文件使用该型号，自动模式下为无法识别时的回退型号
+        self.model = model if model == 'auto' else model.upper()
+        self.default_model = Config.DEFAULT_DRONE_MODEL if model == 'auto' else self.model
+        # 自动识别的型号缓存: 相机序列号和目录 -> 型号（EXIF无法识别型号时沿用）
+        self._model_cache: Dict[str, str] = {}
+        self._last_detected_model: Optional[str] = None
+        # 已提示过普朗克常数为标称值的型号（每个型号只提示一次）
+        self._approximate_models = set()
+        # 已提示过镜头内参为标称值的型号（每个型号只提示一次）
+        self._nominal_intrinsics_models = set()
+        # 已提示过超出SDK范围、改用普朗克定标的测温参数
+        self._sdk_param_warnings = set()
         
         # 初始化SDK
         self._init_sdk()
         
+        # 创建已注册的解码后端，自动模式下按型号缓存测速选出的后端
+        self.backend = backend
+        self.backends = {name: cls(self) for name, cls in BACKEND_REGISTRY.items()}
+        self._selected_backends: Dict[str, str] = dict(selected_backends or {})
+        self._backend_lock = threading.Lock()
+        if backend != 'auto' and not self.backends[backend].is_available():
+            raise RuntimeError(f"解码后端 {backend} 不可用")
+        
+    def enable_raw_cache(self, cache_dir: Optional[str] = None):
+        """
+        启用原始计数缓存
+        
+        启用后温度统一由原始计数经NumPy定标引擎计算：首次转换时缓存原始计数，
+        之后修改测温参数重新转换时直接重新定标，不再解析JPEG或调用SDK
+        
+        Args:
+            cache_dir: 磁盘缓存目录，为None时只缓存在内存中
+        """
+        self.raw_cache = RawCountCache(cache_dir)
+    
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
         logger = logging.getLogger('DJIThermalConverter')
@@ -111,6 +305,17 @@ class DJIThermalConverter:
             else:
                 self.sdk_handle = cdll.LoadLibrary(sdk_lib_path)
             
+            # 一次性声明函数签名，并创建可供多线程并发使用的会话池
+            self.dirp = DirpSDK(self.sdk_handle)
+            if self.isolate_sdk:
+                # SDK调用在常驻工作进程中执行，共享内存需容纳最大分辨率的float32帧
+                frame_bytes = max(w * h for w, h in
+                                  (m['resolution'] for m in Config.DRONE_MODELS.values())) * 4
+                self.dirp_pool = SDKWorkerPool(
+                    sdk_lib_path, Config.MAX_CONCURRENT_CONVERSIONS, frame_bytes, self.file_timeout)
+            else:
+                self.dirp_pool = DirpSessionPool(self.dirp, Config.MAX_CONCURRENT_CONVERSIONS)
+            
             self.is_initialized = True
             self.logger.info(f"DJI Thermal SDK 初始化成功: {sdk_lib_path}")
             
@@ -118,6 +323,11 @@ class DJIThermalConverter:
             self.logger.error(f"DJI Thermal SDK 初始化失败: {str(e)}")
             self.logger.info("请确保已正确安装DJI Thermal SDK")
     
+    def close(self):
+        """释放SDK工作进程等资源"""
+        if self.isolate_sdk and self.dirp_pool is not None:
+            self.dirp_pool.close()
+    
     def _find_sdk_library(self) -> Optional[str]:
         """查找DJI Thermal SDK库文件"""
         possible_paths = []
@@ -149,84 +359,648 @@ class DJIThermalConverter:
         
         return None
     
-    def _detect_image_resolution(self, image_path: str) -> Tuple[int, int]:
+    def _read_input(self, rjpeg_path: str, buffers=None, screen: bool = False):
         """
-        检测图像的实际分辨率
+        读取输入文件（每张图像只打开一次）
+        
+        分辨率、R-JPEG特征、元数据和热红外数据都从这一份缓冲区中解析。
+        启用 use_mmap 时返回只读内存映射，段解析和SDK调用直接使用映射页；
+        提供 FrameBuffers 时读入其中复用的字节缓冲区，不为每个文件分配新的bytes
         
         Args:
-            image_path: 图像文件路径
+            rjpeg_path: R-JPEG文件路径
+            buffers: 复用的帧缓冲区（可选，其他类型的值被忽略）
+            screen: 是否先根据文件头排除非R-JPEG文件（见 _is_likely_rjpeg）；
+                    文件头在读取过程中判断，不单独打开文件
             
         Returns:
-            Tuple[int, int]: (width, height)
+            bytes、memoryview 或 mmap.mmap: 文件内容；被筛除时为None
         """
+        if self.use_mmap:
+            rjpeg_data = map_file(rjpeg_path)
+            if screen:
+                view = as_byte_view(rjpeg_data)
+                if not self._is_likely_rjpeg(rjpeg_path, PrefillReader(None, view, len(view))):
+                    return None
+        elif screen:
+            if not isinstance(buffers, FrameBuffers):
+                buffers = FrameBuffers()
+            rjpeg_data = buffers.read_file(
+                rjpeg_path, lambda reader: self._is_likely_rjpeg(rjpeg_path, reader))
+            if rjpeg_data is None:
+                return None
+        elif isinstance(buffers, FrameBuffers):
+            rjpeg_data = buffers.read_file(rjpeg_path)
+        else:
+            with open(rjpeg_path, 'rb') as f:
+                rjpeg_data = f.read()
+        
+        self.logger.info(f"读取R-JPEG文件: {rjpeg_path}, 大小: {len(rjpeg_data)} bytes")
+        return rjpeg_data
+    
+    def _index_segments(self, rjpeg_data: bytes) -> Optional[RJPEGSegments]:
+        """建立JPEG段索引，数据不是JPEG时返回None"""
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                self.logger.info(f"检测到图像分辨率: {width}×{height}")
-                return width, height
-        except Exception as e:
-            self.logger.warning(f"无法检测图像分辨率: {e}, 使用默认分辨率")
-            # 回退到默认设备型号的分辨率
-            return self.device_configs[self.default_model]['resolution']
+            return RJPEGSegments(rjpeg_data)
+        except RJPEGFormatError as e:
+            self.logger.warning(f"无法解析JPEG段结构: {e}")
+            return None
     
-    def extract_temperature_data(self, rjpeg_path: str) -> Tuple[np.ndarray, Dict]:
+    def _detect_image_resolution(self, segments: Optional[RJPEGSegments],
+                                 model: Optional[str] = None) -> Tuple[int, int]:
+        """
+        检测图像的实际分辨率（读取已解析的JPEG帧头，不再重新打开文件）
+        
+        Args:
+            segments: JPEG段索引
+            model: 设备型号，无法检测时使用该型号的分辨率
+            
+        Returns:
+            Tuple[int, int]: (width, height)
+        """
+        resolution = segments.resolution if segments is not None else None
+        if resolution:
+            width, height = resolution
+            self.logger.info(f"检测到图像分辨率: {width}×{height}")
+            return width, height
+        
+        self.logger.warning("无法检测图像分辨率, 使用默认分辨率")
+        # 回退到设备型号的分辨率
+        return self.device_configs[model or self.default_model]['resolution']
+    
+    def extract_temperature_data(self, rjpeg_path: str,
+                                 measurement_params: Optional[Dict] = None,
+                                 out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict]:
         """
         从R-JPEG文件中提取真实的温度数据
         
         Args:
             rjpeg_path: R-JPEG文件路径
+            measurement_params: 本次调用的测温参数，覆盖转换器默认值和文件中记录的值
+            out: 可选的float32输出数组（形状为 (height, width)），提供时结果直接写入其中
             
         Returns:
             Tuple[np.ndarray, Dict]: 温度数据数组和元数据
         """
+        return self._extract(rjpeg_path, measurement_params, out=out)
+    
+    def _extract(self, rjpeg_path: Optional[str], measurement_params: Optional[Dict] = None,
+                 rjpeg_data=None, source_name: Optional[str] = None,
+                 out=None) -> Tuple[np.ndarray, Dict]:
+        """
+        提取温度数据
+        
+        Args:
+            rjpeg_path: R-JPEG文件路径，纯内存数据时为None
+            measurement_params: 本次调用的测温参数
+            rjpeg_data: 已读取的文件内容，提供时不再读取文件
+            source_name: 元数据中记录的来源名称，默认取文件名
+            out: 输出数组或 FrameBuffers
+        """
         try:
-            # 检测图像的实际分辨率
-            detected_width, detected_height = self._detect_image_resolution(rjpeg_path)
+            overrides = self._measurement_overrides(measurement_params)
+            if source_name is None:
+                source_name = os.path.basename(rjpeg_path)
             
-            # 读取R-JPEG文件
-            with open(rjpeg_path, 'rb') as f:
-                rjpeg_data = f.read()
+            # 命中原始计数缓存且该型号的温度由普朗克定标得到时只需重新定标；
+            # 使用SDK时缓存中的原始计数无法得到相同的温度，仍完整解码
+            if self.raw_cache is not None and rjpeg_path is not None:
+                cached = self.raw_cache.get(rjpeg_path)
+                if cached is not None:
+                    raw_data, raw_info = cached
+                    image_metadata = ImageMetadata(**(raw_info.get('image_metadata') or {}))
+                    model = self._resolve_model(rjpeg_path, image_metadata)
+                if cached is not None and self._uses_planck_path(model, overrides):
+                    self.logger.info(f"♻️ 命中原始计数缓存，仅重新定标: {rjpeg_path}")
+                    temperature_data, params = self._calibrate_raw(
+                        raw_data, raw_info.get('measurement_params'), overrides, out, model)
+                    temperature_data, corrections = self._postprocess(
+                        temperature_data, rjpeg_path, image_metadata, model)
+                    height, width = raw_data.shape
+                    return temperature_data, self._build_metadata(
+                        source_name, raw_info['file_size'], width, height,
+                        temperature_data, 'raw-cache', params, image_metadata, model, corrections)
             
-            self.logger.info(f"读取R-JPEG文件: {rjpeg_path}, 大小: {len(rjpeg_data)} bytes")
+            # 读取文件并建立段索引，后续所有解析都基于这一份缓冲区
+            if rjpeg_data is None:
+                rjpeg_data = self._read_input(rjpeg_path, out)
+            segments = self._index_segments(rjpeg_data)
+            image_metadata = extract_metadata(segments) if segments is not None else ImageMetadata()
+            model = self._resolve_model(rjpeg_path, image_metadata)
             
-            # 检查SDK状态并给出适当提示
-            if not self.is_initialized:
-                self.logger.info("ℹ️ DJI Thermal SDK未安装，将生成演示用温度数据")
-                self.logger.info("💡 注意：这是模拟数据，不是真实的温度值")
-            
-            # 使用DJI SDK解析R-JPEG（或使用模拟数据）
-            temperature_data = self._parse_rjpeg_with_sdk(rjpeg_data, (detected_width, detected_height))
-            
-            # 构建元数据
-            metadata = {
-                'original_file': os.path.basename(rjpeg_path),
-                'conversion_time': datetime.now().isoformat(),
-                'file_size': len(rjpeg_data),
-                'data_type': 'R-JPEG',
-                'sdk_version': 'DJI Thermal SDK v1.4' if self.is_initialized else 'Mock Data (SDK Not Installed)',
-                'temperature_unit': 'Celsius (0.1°C precision)',
-                'detected_resolution': f"{detected_width}×{detected_height}",
-                'detected_width': detected_width,
-                'detected_height': detected_height,
-                'device_model': self.default_model,
-                'data_shape': temperature_data.shape if temperature_data is not None else None,
-                'is_real_data': self.is_initialized,
-                'warning': '此为模拟数据，非真实温度值' if not self.is_initialized else None
-            }
+            # 检测图像的实际分辨率
+            detected_width, detected_height = self._detect_image_resolution(segments, model)
+            
+            # 解析温度数据（SDK / 纯Python解码 / 模拟数据）
+            temperature_data, backend, params = self._decode_temperature(
+                rjpeg_data, (detected_width, detected_height), overrides, rjpeg_path, segments, out,
+                image_metadata, model)
+            corrections = []
+            if backend != 'mock':
+                temperature_data, corrections = self._postprocess(
+                    temperature_data, rjpeg_path, image_metadata, model)
             
+            metadata = self._build_metadata(
+                source_name, len(rjpeg_data), detected_width, detected_height,
+                temperature_data, backend, params, image_metadata, model, corrections)
             return temperature_data, metadata
             
         except Exception as e:
+            if DJI_SDK_AVAILABLE and isinstance(e, SDKWorkerCrashed):
+                # 工作进程已自动重启，记录并隔离导致崩溃的文件
+                self.quarantined[rjpeg_path or source_name] = str(e)
+                self.logger.error(f"🚫 SDK处理时崩溃，已隔离文件: {rjpeg_path or source_name}")
+            elif DJI_SDK_AVAILABLE and isinstance(e, SDKWorkerTimeout):
+                # 卡住的工作进程已被结束并替换
+                self.timed_out[rjpeg_path or source_name] = str(e)
+                self.logger.error(f"⏱️ SDK处理超时，已跳过文件: {rjpeg_path or source_name}")
             self.logger.error(f"提取温度数据失败: {str(e)}")
             raise
     
-    def _parse_rjpeg_with_sdk(self, rjpeg_data: bytes, resolution: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    def _build_metadata(self, source_name: str, file_size: int, width: int, height: int,
+                        temperature_data: np.ndarray, backend: str,
+                        measurement_params: Optional[Dict],
+                        image_metadata: Optional[ImageMetadata] = None,
+                        model: Optional[str] = None,
+                        corrections: Optional[List[str]] = None) -> Dict:
+        """构建随TIFF保存的元数据"""
+        is_real_data = backend != 'mock'
+        image_metadata = image_metadata or ImageMetadata()
+        model = model or self.default_model
+        approximate = backend in PLANCK_BACKENDS and self._planck_approximate(model)
+        nominal_intrinsics = 'lens_distortion' in (corrections or []) and self._intrinsics_nominal(model)
+        warnings = []
+        if not is_real_data:
+            warnings.append('此为模拟数据，非真实温度值')
+        elif approximate:
+            warnings.append('普朗克常数为标称值，温度为近似值')
+        if nominal_intrinsics:
+            warnings.append('镜头畸变校正使用标称内参，几何位置为近似值')
+        warning = '；'.join(warnings) or None
+        return {
+            'original_file': source_name,
+            'conversion_time': datetime.now().isoformat(),
+            'file_size': file_size,
+            'data_type': 'R-JPEG',
+            'sdk_version': BACKEND_DESCRIPTIONS[backend],
+            'decoder_backend': backend,
+            'temperature_unit': 'Celsius (0.1°C precision)',
+            'detected_resolution': f"{width}×{height}",
+            'detected_width': width,
+            'detected_height': height,
+            'device_model': model,
+            'temperature_range': self.device_configs[model]['temperature_range'],
+            'camera_make': image_metadata.make,
+            'camera_model': image_metadata.model,
+            'camera_serial': image_metadata.serial,
+            'capture_time': image_metadata.capture_time,
+            'gps': {
+                'latitude': image_metadata.latitude,
+                'longitude': image_metadata.longitude,
+                'absolute_altitude': image_metadata.absolute_altitude,
+                'relative_altitude': image_metadata.relative_altitude,
+            },
+            'gimbal': {
+                'yaw': image_metadata.gimbal_yaw,
+                'pitch': image_metadata.gimbal_pitch,
+                'roll': image_metadata.gimbal_roll,
+            },
+            'flight': {
+                'yaw': image_metadata.flight_yaw,
+                'pitch': image_metadata.flight_pitch,
+                'roll': image_metadata.flight_roll,
+            },
+            'data_shape': temperature_data.shape if temperature_data is not None else None,
+            'measurement_params': measurement_params,
+            'corrections': corrections or [],
+            'is_real_data': is_real_data,
+            'approximate_calibration': approximate,
+            'nominal_intrinsics': nominal_intrinsics,
+            'warning': warning
+        }
+    
+    def _planck_approximate(self, model: str) -> bool:
+        """型号的普朗克常数是否为未经实测标定的标称值（每个型号首次遇到时提示一次）"""
+        if Config.get_model_config(model).get('planck_calibrated', False):
+            return False
+        if model not in self._approximate_models:
+            self._approximate_models.add(model)
+            self.logger.warning(f"⚠️ {model} 的普朗克常数为标称值，纯Python定标的温度为近似值"
+                                f"（可在 config.py 中替换为实测标定结果，或使用DJI Thermal SDK）")
+        return True
+    
+    def _intrinsics_nominal(self, model: str) -> bool:
+        """型号的镜头内参和畸变系数是否为未经实测标定的标称值（每个型号首次遇到时提示一次）"""
+        if Config.get_model_config(model).get('intrinsics_calibrated', False):
+            return False
+        if model not in self._nominal_intrinsics_models:
+            self._nominal_intrinsics_models.add(model)
+            self.logger.warning(f"⚠️ {model} 的镜头内参和畸变系数为标称值，畸变校正后的几何位置为近似值"
+                                f"（可在 config.py 中替换为实测标定结果）")
+        return True
+    
+    def _postprocess(self, temperature_data: np.ndarray, rjpeg_path: Optional[str],
+                     image_metadata: ImageMetadata, model: str) -> Tuple[np.ndarray, List[str]]:
+        """
+        对真实温度帧依次做已启用的校正（坏点 -> 镜头畸变），均原地进行
+        
+        Returns:
+            Tuple[np.ndarray, List[str]]: 校正后的温度数组和已应用的校正名称
+        """
+        corrections = []
+        if not (self.defect_masks is not None or self.undistort):
+            return temperature_data, corrections
+        if not temperature_data.flags.writeable:
+            temperature_data = temperature_data.copy()
+        
+        if self.defect_masks is not None and self._correct_defects(temperature_data, rjpeg_path, image_metadata):
+            corrections.append('defect_pixels')
+        if self.undistort:
+            undistort(temperature_data, model, out=temperature_data)
+            corrections.append('lens_distortion')
+        return temperature_data, corrections
+    
+    def _correct_defects(self, temperature_data: np.ndarray, rjpeg_path: Optional[str],
+                         image_metadata: ImageMetadata) -> bool:
+        """
+        按相机的坏点掩膜原地校正温度帧
+        
+        相机按序列号区分，没有序列号时以所在目录代表同一台相机；两者都没有时不校正
+        
+        Returns:
+            bool: 是否已校正（掩膜仍在统计中时为False）
+        """
+        camera_id = self._camera_id(rjpeg_path, image_metadata.serial)
+        if not camera_id:
+            return False
+        
+        defect_count = self.defect_masks.correct(camera_id, temperature_data)
+        if defect_count < 0:
+            self.logger.debug(f"坏点掩膜统计中: {camera_id}")
+            return False
+        if defect_count:
+            self.logger.debug(f"🩹 已校正 {defect_count} 个坏点")
+        return True
+    
+    @staticmethod
+    def _camera_id(rjpeg_path: Optional[str], serial: Optional[str]) -> Optional[str]:
+        """坏点掩膜和平场偏移的相机标识：序列号，没有序列号时为所在目录"""
+        if serial:
+            return serial
+        if rjpeg_path is not None:
+            return os.path.dirname(os.path.abspath(rjpeg_path))
+        return None
+    
+    def _resolve_model(self, rjpeg_path: Optional[str], image_metadata: ImageMetadata) -> str:
+        """
+        确定文件所属的设备型号
+        
+        指定型号时直接返回；自动模式下每个文件先按自身的EXIF识别（同一目录中可能混有
+        不同型号的文件），EXIF无法识别时才沿用同一相机序列号或同一目录中已识别的型号。
+        都无法确定时使用默认型号
+        
+        Returns:
+            str: Config.DRONE_MODELS 中的型号
+        """
+        if self.model != 'auto':
+            return self.model
+        
+        keys = [image_metadata.serial]
+        if rjpeg_path is not None:
+            keys.append(os.path.dirname(os.path.abspath(rjpeg_path)))
+        keys = [key for key in keys if key]
+        
+        model = detect_model(image_metadata)
+        if model is None:
+            for key in keys:
+                cached = self._model_cache.get(key)
+                if cached is not None:
+                    return cached
+            self.logger.debug(f"无法识别相机型号 ({image_metadata.model or '无EXIF型号'})，"
+                              f"使用默认型号 {self.default_model}")
+            return self.default_model
+        
+        # 型号相对缓存或上一帧（没有序列号和目录时）发生变化时才提示
+        if (any(self._model_cache.get(key) != model for key in keys)
+                or (not keys and model != self._last_detected_model)):
+            self.logger.info(f"🔎 识别到设备型号: {model} ({image_metadata.model})")
+        self._last_detected_model = model
+        for key in keys:
+            self._model_cache[key] = model
+        return model
+    
+    def _measurement_overrides(self, measurement_params: Optional[Dict]) -> Dict:
+        """合并转换器默认测温参数和本次调用的参数（后者优先）"""
+        overrides = dict(self.measurement_params)
+        if measurement_params:
+            overrides.update(measurement_params)
+        overrides = {k: v for k, v in overrides.items() if v is not None}
+        # 提前校验，避免无效参数进入SDK或定标引擎
+        MeasurementParams.from_dict(overrides)
+        if self.backend == 'sdk':
+            violation = self.backends['sdk'].param_violation(overrides)
+            if violation:
+                raise ValueError(f"{violation}，请使用 auto 或 rjpeg 后端")
+        return overrides
+    
+    def _calibrate_raw(self, raw_data: np.ndarray, embedded_params: Optional[Dict],
+                       overrides: Dict, out=None,
+                       model: Optional[str] = None) -> Tuple[np.ndarray, Dict]:
+        """
+        按测温参数将原始计数定标为温度
+        
+        参数优先级: 调用参数 > 文件中记录的参数 > Config.DEFAULT_MEASUREMENT_PARAMS
+        
+        Returns:
+            Tuple[np.ndarray, Dict]: float32温度数组和实际使用的测温参数
+        """
+        params = MeasurementParams.from_dict({**(embedded_params or {}), **overrides})
+        # 相同型号和测温参数的帧共用查找表，每帧只需一次查表
+        lut = get_temperature_lut(model or self.default_model, params)
+        temperature_data = resolve_output(out, raw_data.shape)
+        index = out.get(raw_data.shape, np.intp) if isinstance(out, FrameBuffers) else None
+        return apply_temperature_lut(raw_data, lut, temperature_data, index), params._asdict()
+    
+    def _decode_temperature(self, rjpeg_data: bytes, resolution: Tuple[int, int],
+                            overrides: Optional[Dict] = None,
+                            rjpeg_path: Optional[str] = None,
+                            segments: Optional[RJPEGSegments] = None,
+                            out=None, image_metadata: Optional[ImageMetadata] = None,
+                            model: Optional[str] = None) -> Tuple[np.ndarray, str, Optional[Dict]]:
+        """
+        选择可用的后端解析温度数据
+        
+        使用选定的解码后端（见 _select_backend）；文件中没有热红外数据时生成模拟数据。
+        启用原始计数缓存时同时缓存原始计数：普朗克定标路径先读取原始计数（写入缓存），
+        再通过缓存的查找表定标；SDK路径的温度仍由SDK计算，另行读取原始计数写入缓存
+        
+        Returns:
+            Tuple[np.ndarray, str, Optional[Dict]]: 温度数组、后端名称、所用测温参数
+        """
+        overrides = overrides or {}
+        
+        backend = self._select_backend(rjpeg_data, resolution, segments, overrides, model)
+        if backend is None:
+            return self._decode_mock(rjpeg_data, resolution, "没有后端能解析该文件", out)
+        
+        if self.raw_cache is not None and backend in PLANCK_BACKENDS:
+            try:
+                raw_data, raw_backend, embedded_params = self._decode_raw(rjpeg_data, resolution, segments, out)
+            except RJPEGFormatError as e:
+                return self._decode_mock(rjpeg_data, resolution, str(e), out)
+            self._cache_raw(rjpeg_path, raw_data, embedded_params, len(rjpeg_data), raw_backend, image_metadata)
+            
+            self.logger.info("🔥 使用原始计数和辐射定标计算温度数据")
+            temperature_data, params = self._calibrate_raw(raw_data, embedded_params, overrides, out, model)
+            return temperature_data, backend, params
+        
+        try:
+            temperature_data, params = self.backends[backend].decode(
+                rjpeg_data, resolution, segments, overrides, out, model)
+        except RJPEGFormatError as e:
+            return self._decode_mock(rjpeg_data, resolution, str(e), out)
+        
+        if self.raw_cache is not None and backend != 'mock' and rjpeg_path:
+            try:
+                raw_data, raw_backend, embedded_params = self._decode_raw(rjpeg_data, resolution, segments, out)
+            except RJPEGFormatError as e:
+                self.logger.debug(f"无法读取原始计数，不缓存: {e}")
+            else:
+                self._cache_raw(rjpeg_path, raw_data, embedded_params, len(rjpeg_data),
+                                raw_backend, image_metadata)
+        return temperature_data, backend, params
+    
+    def _uses_planck_path(self, model: str, overrides: Dict) -> bool:
+        """
+        该型号的温度是否由普朗克定标得到（此时命中原始计数缓存可以直接重新定标）
+        
+        自动模式下测温参数超出SDK范围时使用普朗克定标；尚未测速选出后端时，
+        SDK可用且支持该型号就按SDK处理
+        """
+        if self.backend != 'auto':
+            return self.backend in PLANCK_BACKENDS
+        sdk = self.backends['sdk']
+        if not (sdk.is_available() and sdk.supports_model(model)) or sdk.param_violation(overrides):
+            return True
+        return self._selected_backends.get(model, 'sdk') in PLANCK_BACKENDS
+    
+    def _cache_raw(self, rjpeg_path: Optional[str], raw_data: np.ndarray, embedded_params: Optional[Dict],
+                   file_size: int, raw_backend: str, image_metadata: Optional[ImageMetadata]):
+        """启用原始计数缓存时缓存解码得到的原始计数"""
+        if self.raw_cache is not None and rjpeg_path:
+            # 原始计数可能位于复用的缓冲区中，缓存保存副本
+            self.raw_cache.put(rjpeg_path, raw_data.copy(), {
+                'measurement_params': embedded_params,
+                'file_size': file_size,
+                'raw_backend': raw_backend,
+                'image_metadata': image_metadata._asdict() if image_metadata else None,
+            })
+    
+    def _decode_mock(self, rjpeg_data, resolution: Tuple[int, int], reason: str,
+                     out=None) -> Tuple[np.ndarray, str, Optional[Dict]]:
+        """文件中没有可解析的热红外数据时生成演示用温度数据"""
+        self.logger.info(f"ℹ️ 未找到可解析的热红外数据 ({reason})，将生成演示用温度数据")
+        self.logger.info("💡 注意：这是模拟数据，不是真实的温度值")
+        temperature_data, params = self.backends['mock'].decode(rjpeg_data, resolution, None, {}, out)
+        return temperature_data, 'mock', params
+    
+    def available_backends(self, model: Optional[str] = None) -> List[str]:
+        """
+        获取当前环境下可用的解码后端
+        
+        Args:
+            model: 可选的型号，提供时只返回支持该型号的后端
+            
+        Returns:
+            List[str]: 后端名称
+        """
+        return [name for name, backend in self.backends.items()
+                if backend.is_available() and (model is None or backend.supports_model(model))]
+    
+    def _select_backend(self, rjpeg_data, resolution: Tuple[int, int],
+                        segments: Optional[RJPEGSegments], overrides: Dict,
+                        model: Optional[str] = None) -> Optional[str]:
+        """
+        选择解码后端
+        
+        自动模式下，每个型号的首帧会用所有可用的真实数据后端各解码几次：
+        与SDK结果偏差过大的后端被排除，其余取最快者并缓存，之后的帧直接使用。
+        所有后端都无法解析该帧时返回None（不缓存，下一帧重新测速）
+        
+        Returns:
+            Optional[str]: 后端名称
+        """
+        if self.backend != 'auto':
+            return self.backend
+        
+        model = model or self.default_model
+        
+        # 测温参数超出SDK接受的范围时该帧改用普朗克定标（不影响已测速选出的后端）
+        sdk = self.backends['sdk']
+        if sdk.is_available() and sdk.supports_model(model):
+            violation = sdk.param_violation(overrides)
+            if violation:
+                if not self.backends['rjpeg'].supports_model(model):
+                    raise ValueError(f"{violation}，且 {model} 没有普朗克标定常数")
+                if violation not in self._sdk_param_warnings:
+                    self._sdk_param_warnings.add(violation)
+                    self.logger.warning(f"⚠️ {violation}，改用普朗克定标")
+                return 'rjpeg'
+        
+        selected = self._selected_backends.get(model)
+        if selected is not None:
+            return selected
+        
+        with self._backend_lock:
+            selected = self._selected_backends.get(model)
+            if selected is not None:
+                return selected
+            
+            candidates = {name: backend for name, backend in self.backends.items()
+                          if backend.capabilities.real_data and backend.is_available()
+                          and backend.supports_model(model)}
+            timings = {}
+            for name, backend in candidates.items():
+                try:
+                    timings[name] = time_backend(
+                        lambda: backend.decode(rjpeg_data, resolution, segments, overrides, None, model)[0],
+                        Config.BACKEND_BENCHMARK_REPEAT)
+                except Exception as e:
+                    # 工作进程崩溃或超时需要按隔离/超时处理该文件；SDK拒绝该帧等普通错误只排除该后端
+                    if DJI_SDK_AVAILABLE and isinstance(e, (SDKWorkerCrashed, SDKWorkerTimeout)):
+                        raise
+                    self.logger.debug(f"解码后端 {name} 无法解析测速帧: {e}")
+            
+            ranking = rank_backends(timings, candidates)
+            if not ranking:
+                return None
+            
+            summary = ', '.join(f"{name} {timings[name][0]:.1f}ms" for name in ranking)
+            self.logger.info(f"⚡ 解码后端测速 ({model}): {summary}，选用 {ranking[0]}")
+            self._selected_backends[model] = ranking[0]
+            return ranking[0]
+    
+    def extract_raw_data(self, rjpeg_path: str) -> Tuple[np.ndarray, Dict]:
+        """
+        从R-JPEG文件中提取原始热红外计数（未经辐射定标）
+        
+        Args:
+            rjpeg_path: R-JPEG文件路径
+            
+        Returns:
+            Tuple[np.ndarray, Dict]: uint16原始数据数组和元数据
+        """
+        rjpeg_data = self._read_input(rjpeg_path)
+        segments = self._index_segments(rjpeg_data)
+        image_metadata = extract_metadata(segments) if segments is not None else ImageMetadata()
+        raw_data, backend, embedded_params = self._decode_raw(rjpeg_data, segments=segments)
+        height, width = raw_data.shape
+        
+        metadata = {
+            'original_file': os.path.basename(rjpeg_path),
+            'file_size': len(rjpeg_data),
+            'data_type': 'R-JPEG RAW',
+            'raw_backend': backend,
+            'detected_resolution': f"{width}×{height}",
+            'detected_width': width,
+            'detected_height': height,
+            'device_model': self._resolve_model(rjpeg_path, image_metadata),
+            'measurement_params': embedded_params,
+        }
+        return raw_data, metadata
+    
+    def _extract_raw(self, rjpeg_path: Optional[str], measurement_params: Optional[Dict] = None,
+                     rjpeg_data=None, source_name: Optional[str] = None,
+                     buffers: Optional[FrameBuffers] = None) -> Tuple[np.ndarray, Dict]:
+        """
+        提取原始计数及其定标所需的参数（原始计数输出模式）
+        
+        测温参数按与温度输出相同的优先级合并并校验，随元数据保存，读取时据此定标
+        
+        Returns:
+            Tuple[np.ndarray, Dict]: uint16原始计数和元数据
+        """
+        overrides = self._measurement_overrides(measurement_params)
+        if source_name is None:
+            source_name = os.path.basename(rjpeg_path)
+        
+        cached = None
+        if self.raw_cache is not None and rjpeg_path is not None:
+            cached = self.raw_cache.get(rjpeg_path)
+        if cached is not None:
+            raw_data, raw_info = cached
+            self.logger.info(f"♻️ 命中原始计数缓存: {rjpeg_path}")
+            image_metadata = ImageMetadata(**(raw_info.get('image_metadata') or {}))
+            model = self._resolve_model(rjpeg_path, image_metadata)
+            embedded_params, file_size, backend = raw_info.get('measurement_params'), raw_info['file_size'], 'raw-cache'
+        else:
+            if rjpeg_data is None:
+                rjpeg_data = self._read_input(rjpeg_path, buffers)
+            segments = self._index_segments(rjpeg_data)
+            image_metadata = extract_metadata(segments) if segments is not None else ImageMetadata()
+            model = self._resolve_model(rjpeg_path, image_metadata)
+            resolution = self._detect_image_resolution(segments, model)
+            raw_data, backend, embedded_params = self._decode_raw(rjpeg_data, resolution, segments, buffers)
+            file_size = len(rjpeg_data)
+            self._cache_raw(rjpeg_path, raw_data, embedded_params, file_size, backend, image_metadata)
+        
+        params = MeasurementParams.from_dict({**(embedded_params or {}), **overrides})
+        height, width = raw_data.shape
+        metadata = self._build_metadata(source_name, file_size, width, height, raw_data, backend,
+                                        params._asdict(), image_metadata, model)
+        # 读取时按普朗克常数定标，与解码后端无关
+        approximate = self._planck_approximate(model)
+        metadata.update({
+            'data_type': 'R-JPEG RAW',
+            'temperature_unit': 'Raw counts (calibrate with raw_tiff.RawThermalImage)',
+            'approximate_calibration': approximate,
+            'warning': '普朗克常数为标称值，定标后的温度为近似值' if approximate else None,
+        })
+        return raw_data, metadata
+    
+    def _decode_raw(self, rjpeg_data: bytes,
+                    resolution: Optional[Tuple[int, int]] = None,
+                    segments: Optional[RJPEGSegments] = None,
+                    out=None) -> Tuple[np.ndarray, str, Optional[Dict]]:
+        """
+        解码原始热红外计数
+        
+        优先使用纯Python段解析器（无需SDK，且单段数据零拷贝），
+        段结构无法识别时回退到SDK的 dirp_get_original_raw
+        
+        Args:
+            rjpeg_data: R-JPEG二进制数据
+            resolution: 可选的热图分辨率 (width, height)
+            segments: 已建立的段索引，不提供时重新解析
+            out: 温度输出使用的 out；为 FrameBuffers 时原始计数也写入其中复用的缓冲区
+            
+        Returns:
+            Tuple[np.ndarray, str, Optional[Dict]]: uint16原始数据、所用的后端名称、
+                                                    文件中记录的测温参数
+        """
+        try:
+            if segments is None:
+                segments = RJPEGSegments(rjpeg_data)
+            raw_out = out if isinstance(out, FrameBuffers) else None
+            return segments.decode_raw_thermal(resolution, raw_out), 'rjpeg', segments.measurement_params
+        except RJPEGFormatError as e:
+            if not self.is_initialized:
+                raise
+            self.logger.debug(f"纯Python解析失败，改用SDK读取RAW数据: {e}")
+        
+        with self.dirp_pool.session() as session:
+            return session.original_raw(rjpeg_data).copy(), 'sdk', None
+    
+    def _parse_rjpeg_with_sdk(self, rjpeg_data: bytes, resolution: Optional[Tuple[int, int]] = None,
+                              measurement_params: Optional[Dict] = None, out=None) -> np.ndarray:
         """
         使用DJI SDK解析R-JPEG数据
         
         Args:
             rjpeg_data: R-JPEG二进制数据
             resolution: 图像分辨率 (width, height)
+            measurement_params: 可选的测温参数，覆盖文件中记录的对应字段
+            out: 输出数组或 FrameBuffers
             
         Returns:
             np.ndarray: 温度数据数组
@@ -237,29 +1011,32 @@ class DJIThermalConverter:
             self.logger.info("📁 下载地址: https://dl.djicdn.com/downloads/dji_assistant/20220929/dji_thermal_sdk_v1.4_20220929.zip")
             
             # 创建模拟数据并返回
-            return self._create_mock_temperature_data(resolution)
-        
-        # 这里需要根据DJI SDK的具体API来实现
-        # 由于我们没有实际的SDK库，这里提供一个框架
+            return self._create_mock_temperature_data(resolution, out)
         
         self.logger.info("🔥 使用DJI Thermal SDK解析真实温度数据")
         
-        # 模拟解析过程（实际需要SDK API）
-        # 实际代码应该类似：
-        # 1. dirp_create_from_rjpeg(rjpeg_data, len(rjpeg_data), &handle)
-        # 2. dirp_get_rjpeg_resolution(handle, &resolution)
-        # 3. dirp_get_measurement_params(handle, &params)
-        # 4. dirp_measure(handle, &temperature_data)
-        
-        # 临时返回模拟数据，使用检测到的分辨率
-        return self._create_mock_temperature_data(resolution)
+        with self.dirp_pool.session() as session:
+            if isinstance(out, np.ndarray):
+                # 调用方提供的数组由SDK直接写入
+                return session.measure(rjpeg_data, out=out, measurement_params=measurement_params)
+            
+            temperature_data = session.measure(rjpeg_data, measurement_params=measurement_params)
+            # 会话缓冲区归还后会被其他调用复用，复制到调用方的缓冲区（或新数组）
+            result = resolve_output(out, temperature_data.shape)
+            np.copyto(result, temperature_data)
+            return result
     
-    def _create_mock_temperature_data(self, resolution: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    def _create_mock_temperature_data(self, resolution: Optional[Tuple[int, int]] = None,
+                                      out=None) -> np.ndarray:
         """
         创建模拟的温度数据（用于演示）
         
         Args:
             resolution: 可选的分辨率 (width, height)，如果不提供则使用默认设备型号的分辨率
+            out: 可选的float32输出数组或 FrameBuffers
+            
+        Returns:
+            np.ndarray: float32温度数组；未提供out时为只读的缓存帧
         """
         if resolution is not None:
             width, height = resolution
@@ -269,34 +1046,18 @@ class DJIThermalConverter:
         
         self.logger.info(f"创建模拟温度数据，分辨率: {width}×{height}")
         
-        # 创建带有真实温度值的模拟数据
-        temperature_data = np.zeros((height, width), dtype=np.float32)
-        
-        # 添加温度梯度
-        for i in range(height):
-            for j in range(width):
-                # 模拟温度分布 (20°C to 40°C)
-                temp = 20.0 + 20.0 * (i / height) * (j / width)
-                temperature_data[i, j] = temp
-        
-        # 添加一些热点
-        center_x, center_y = width // 2, height // 2
-        y, x = np.ogrid[:height, :width]
-        
-        # 热点1
-        distance1 = np.sqrt((x - center_x)**2 + (y - center_y)**2)
-        hot_spot1 = 60.0 * np.exp(-distance1 / 50)
-        
-        # 热点2
-        distance2 = np.sqrt((x - center_x + 100)**2 + (y - center_y + 100)**2)
-        hot_spot2 = 45.0 * np.exp(-distance2 / 30)
-        
-        temperature_data += hot_spot1 + hot_spot2
+        # 温度梯度 + 热点，同一分辨率的帧只生成一次（只读缓存）
+        scene = get_scene(width, height, Config.MOCK_SCENARIO, Config.MOCK_SEED)
+        if out is None:
+            return scene
         
+        temperature_data = resolve_output(out, (height, width))
+        np.copyto(temperature_data, scene)
         return temperature_data
     
     def save_temperature_tiff(self, temperature_data: np.ndarray, metadata: Dict, 
-                            output_path: str, compression: str = 'lzw') -> bool:
+                            output_path: str, compression: str = 'lzw',
+                            scratch: Optional[np.ndarray] = None) -> bool:
         """
         将温度数据保存为TIFF文件
         
@@ -305,6 +1066,41 @@ class DJIThermalConverter:
             metadata: 元数据字典
             output_path: 输出文件路径
             compression: 压缩方式
+            scratch: 可选的int16缓冲区（形状与温度数据相同），用于存放缩放后的数据
+            
+        Returns:
+            bool: 保存是否成功
+        """
+        return self._save_tiff(
+            lambda path: self._encode_tiff(temperature_data, metadata, path, compression, scratch),
+            output_path, "温度TIFF文件")
+    
+    def save_raw_tiff(self, raw_data: np.ndarray, metadata: Dict, output_path: str,
+                      compression: str = 'lzw') -> bool:
+        """
+        将原始计数保存为16位TIFF，定标参数写入TIFF标签（用 raw_tiff.RawThermalImage 读取）
+        
+        Args:
+            raw_data: uint16原始计数
+            metadata: 元数据字典（由 _extract_raw 构建）
+            output_path: 输出文件路径
+            compression: 压缩方式
+            
+        Returns:
+            bool: 保存是否成功
+        """
+        return self._save_tiff(
+            lambda path: encode_raw_tiff(raw_data, metadata, path, compression),
+            output_path, "原始计数TIFF文件")
+    
+    def _save_tiff(self, encode: Callable[[str], None], output_path: str, description: str) -> bool:
+        """
+        写出TIFF文件；输出目录无权限或文件被占用时依次改用文档目录、新文件名或临时目录
+        
+        Args:
+            encode: 将TIFF写入给定路径的函数
+            output_path: 输出文件路径
+            description: 日志中的文件说明
             
         Returns:
             bool: 保存是否成功
@@ -359,30 +1155,9 @@ class DJIThermalConverter:
                 output_path = os.path.join(temp_dir, filename)
                 self.logger.info(f"⚠️ 无写入权限，已切换到临时目录: {output_path}")
             
-            # 将温度数据转换为适合TIFF的格式
-            # 温度数据乘以10以保持0.1°C精度（以int16格式保存）
-            temp_scaled = (temperature_data * 10).astype(np.int16)
-            
-            # 创建PIL图像
-            pil_image = Image.fromarray(temp_scaled, mode='I;16')
-            
-            # 准备TIFF标签 - 确保所有值都是字符串
-            tiff_tags = {
-                270: json.dumps(metadata, ensure_ascii=False),  # ImageDescription
-                305: 'DJI Thermal Converter with SDK v1.0',      # Software
-                306: datetime.now().strftime('%Y:%m:%d %H:%M:%S'), # DateTime
-                269: 'DJI R-JPEG Temperature Data',             # DocumentName
-            }
-            
-            # 保存TIFF文件
-            pil_image.save(
-                output_path,
-                format='TIFF',
-                compression=compression,
-                tiffinfo=tiff_tags
-            )
+            encode(output_path)
             
-            self.logger.info(f"✅ 温度TIFF文件保存成功: {output_path}")
+            self.logger.info(f"✅ {description}保存成功: {output_path}")
             return True
             
         except PermissionError as e:
@@ -396,25 +1171,147 @@ class DJIThermalConverter:
             self.logger.error(f"❌ 保存TIFF文件失败: {str(e)}")
             return False
     
-    def convert_rjpeg_to_tiff(self, input_path: str, output_path: str) -> bool:
+    def _encode_tiff(self, temperature_data: np.ndarray, metadata: Dict, fp,
+                     compression: str = 'lzw', scratch=None):
+        """
+        将温度数据编码为TIFF
+        
+        Args:
+            temperature_data: 温度数据数组
+            metadata: 元数据字典
+            fp: 输出文件路径或可写的文件对象
+            compression: 压缩方式
+            scratch: 可选的int16缓冲区或 FrameBuffers
+        """
+        # 将温度数据转换为适合TIFF的格式
+        # 温度数据乘以10以保持0.1°C精度（以int16格式保存），乘法与类型转换在同一次求值中完成
+        temp_scaled = resolve_output(scratch, temperature_data.shape, np.int16)
+        scale_to_int16(temperature_data, 10, out=temp_scaled)
+        
+        # 创建与缓冲区共享内存的PIL图像（不复制像素数据）
+        height, width = temp_scaled.shape
+        pil_image = Image.frombuffer('I;16', (width, height), temp_scaled, 'raw', 'I;16', 0, 1)
+        
+        # 准备TIFF标签 - 确保所有值都是字符串
+        tiff_tags = {
+            270: json.dumps(metadata, ensure_ascii=False),  # ImageDescription
+            305: 'DJI Thermal Converter with SDK v1.0',      # Software
+            306: datetime.now().strftime('%Y:%m:%d %H:%M:%S'), # DateTime
+            269: 'DJI R-JPEG Temperature Data',             # DocumentName
+        }
+        
+        # 保存TIFF文件
+        pil_image.save(
+            fp,
+            format='TIFF',
+            compression=compression,
+            tiffinfo=tiff_tags
+        )
+    
+    def extract_temperature_from_bytes(self, rjpeg_data, measurement_params: Optional[Dict] = None,
+                                       source_name: str = '<bytes>',
+                                       out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict]:
+        """
+        从内存中的R-JPEG数据提取温度数据（不读写磁盘）
+        
+        Args:
+            rjpeg_data: R-JPEG数据，任意缓冲区协议对象（bytes / bytearray / memoryview / np.ndarray 等）
+            measurement_params: 可选的测温参数
+            source_name: 写入元数据 original_file 字段的名称
+            out: 可选的float32输出数组
+            
+        Returns:
+            Tuple[np.ndarray, Dict]: 温度数据数组和元数据
+        """
+        return self._extract(None, measurement_params, as_byte_view(rjpeg_data), source_name, out)
+    
+    def convert_bytes(self, rjpeg_data, output_format: str = 'tiff',
+                      measurement_params: Optional[Dict] = None, compression: str = 'lzw',
+                      source_name: str = '<bytes>', out: Optional[np.ndarray] = None,
+                      scratch: Optional[np.ndarray] = None):
+        """
+        在内存中完成R-JPEG转换
+        
+        Args:
+            rjpeg_data: R-JPEG数据，任意缓冲区协议对象
+            output_format: 'tiff' 返回编码后的TIFF字节串（原始计数输出模式下为原始计数TIFF），
+                           'array' 返回温度数组
+            measurement_params: 可选的测温参数
+            compression: TIFF压缩方式
+            source_name: 写入元数据 original_file 字段的名称
+            out: 可选的float32温度输出数组
+            scratch: 可选的int16编码缓冲区
+            
+        Returns:
+            bytes 或 np.ndarray: TIFF字节串或float32温度数组
+        """
+        if output_format not in ('tiff', 'array'):
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        
+        buffer = io.BytesIO()
+        if self.raw_output and output_format == 'tiff':
+            raw_data, metadata = self._extract_raw(None, measurement_params, as_byte_view(rjpeg_data), source_name)
+            encode_raw_tiff(raw_data, metadata, buffer, compression)
+            return buffer.getvalue()
+        
+        temperature_data, metadata = self.extract_temperature_from_bytes(
+            rjpeg_data, measurement_params, source_name, out)
+        temperature_data = self._apply_flat_field(temperature_data, metadata, None)
+        temperature_data = self._apply_denoise(temperature_data, metadata)
+        if output_format == 'array':
+            return temperature_data
+        
+        self._encode_tiff(temperature_data, metadata, buffer, compression, scratch)
+        return buffer.getvalue()
+    
+    def convert_rjpeg_to_tiff(self, input_path: str, output_path: str,
+                              measurement_params: Optional[Dict] = None) -> bool:
         """
         将R-JPEG文件转换为TIFF格式
         
         Args:
             input_path: 输入R-JPEG文件路径
             output_path: 输出TIFF文件路径
+            measurement_params: 可选的测温参数
             
         Returns:
             bool: 转换是否成功
         """
+        return self._convert(input_path, output_path, measurement_params)
+    
+    def _convert(self, input_path: str, output_path: str,
+                 measurement_params: Optional[Dict] = None,
+                 rjpeg_data: Optional[bytes] = None,
+                 buffers: Optional[FrameBuffers] = None) -> bool:
+        """
+        转换单个文件
+        
+        Args:
+            rjpeg_data: 已读取的文件内容（可选）
+            buffers: 批量转换复用的帧缓冲区（可选）
+        """
         try:
             self.logger.info(f"开始转换R-JPEG: {input_path}")
             
+            if self.raw_output:
+                # 原始计数输出：不定标，定标参数随文件保存
+                raw_data, metadata = self._extract_raw(input_path, measurement_params, rjpeg_data,
+                                                       buffers=buffers)
+                success = self.save_raw_tiff(raw_data, metadata, output_path)
+                if success:
+                    self.logger.info(f"转换完成: {output_path}")
+                    self.logger.info(f"原始计数范围: {raw_data.min()} ~ {raw_data.max()}")
+                return success
+            
             # 提取温度数据
-            temperature_data, metadata = self.extract_temperature_data(input_path)
+            temperature_data, metadata = self._extract(
+                input_path, measurement_params, rjpeg_data, out=buffers)
+            temperature_data = self._apply_flat_field(temperature_data, metadata, input_path)
+            temperature_data = self._apply_denoise(temperature_data, metadata)
             
             # 保存为TIFF
-            success = self.save_temperature_tiff(temperature_data, metadata, output_path)
+            success = self.save_temperature_tiff(
+                temperature_data, metadata, output_path, scratch=buffers)
             
             if success:
                 self.logger.info(f"转换完成: {output_path}")
@@ -427,7 +1324,9 @@ class DJIThermalConverter:
             return False
     
     def batch_convert(self, input_dir: str, output_dir: str, 
-                     recursive: bool = True) -> Dict[str, int]:
+                     recursive: bool = True,
+                     measurement_params: Optional[Dict] = None,
+                     jobs: int = 1) -> Dict[str, int]:
         """
         批量转换R-JPEG文件
         
@@ -435,87 +1334,373 @@ class DJIThermalConverter:
             input_dir: 输入目录
             output_dir: 输出目录
             recursive: 是否递归处理子目录
+            measurement_params: 本批次的测温参数
+            jobs: 并行进程数，1表示在当前进程中逐个转换，0表示CPU核数
             
         Returns:
             Dict[str, int]: 转换结果统计
         """
-        results = {'success': 0, 'failed': 0, 'total': 0}
+        results = {'success': 0, 'failed': 0, 'skipped': 0, 'quarantined': 0, 'timed_out': 0, 'total': 0}
         
         try:
-            # 查找所有R-JPEG文件
+            # 查找所有JPG文件（只按扩展名筛选，不在此阶段打开文件）
             rjpeg_files = []
             for root, dirs, files in os.walk(input_dir):
                 for file in files:
                     if file.lower().endswith(('.jpg', '.jpeg')):
-                        file_path = os.path.join(root, file)
-                        # 简单检查是否可能是R-JPEG文件
-                        if self._is_likely_rjpeg(file_path):
-                            rjpeg_files.append(file_path)
+                        rjpeg_files.append(os.path.join(root, file))
                 
                 if not recursive:
                     break
                     
-            results['total'] = len(rjpeg_files)
-            self.logger.info(f"找到 {results['total']} 个可能的R-JPEG文件")
+            self.logger.info(f"找到 {len(rjpeg_files)} 个JPG文件")
             
-            # 转换每个文件
-            for rjpeg_file in rjpeg_files:
-                try:
-                    # 生成输出路径
-                    relative_path = os.path.relpath(rjpeg_file, input_dir)
-                    output_file = os.path.join(
-                        output_dir, 
-                        os.path.splitext(relative_path)[0] + '.tiff'
-                    )
-                    
-                    # 转换文件
-                    if self.convert_rjpeg_to_tiff(rjpeg_file, output_file):
-                        results['success'] += 1
-                    else:
-                        results['failed'] += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"处理文件 {rjpeg_file} 时出错: {str(e)}")
-                    results['failed'] += 1
-                    
-            self.logger.info(f"批量转换完成 - 成功: {results['success']}, 失败: {results['failed']}")
+            # 生成输出路径
+            file_pairs = [
+                (rjpeg_file, os.path.join(
+                    output_dir, os.path.splitext(os.path.relpath(rjpeg_file, input_dir))[0] + '.tiff'))
+                for rjpeg_file in rjpeg_files
+            ]
+            results = self.convert_files(file_pairs, measurement_params, jobs)
             
         except Exception as e:
             self.logger.error(f"批量转换失败: {str(e)}")
             
         return results
     
-    def _is_likely_rjpeg(self, file_path: str) -> bool:
+    def convert_files(self, file_pairs: List[Tuple[str, str]], measurement_params: Optional[Dict] = None,
+                      jobs: int = 1, screen_rjpeg: bool = True,
+                      callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, int]:
         """
-        简单检查文件是否可能是R-JPEG格式
+        转换一组文件（可多进程并行）
+        
+        jobs > 1 时每个工作进程创建一次自己的转换器（参数与本转换器相同）并逐个处理分派的文件；
+        自动模式的解码后端和启用平场校正时的平场偏移先在本进程中确定，再交给所有工作进程共用。
+        工作进程全部无法启动时，尚未完成的文件记为 failed
         
         Args:
-            file_path: 文件路径
+            file_pairs: (输入路径, 输出路径) 列表
+            measurement_params: 本批次的测温参数
+            jobs: 并行进程数，1表示在当前进程中逐个转换，0表示CPU核数
+            screen_rjpeg: 是否先只读文件头排除普通JPEG（排除的文件记为 skipped）
+            callback: 每个文件完成后的回调 (输入路径, 状态)，按完成顺序调用
+            
+        Returns:
+            Dict[str, int]: 转换结果统计（success / failed / skipped / quarantined / timed_out / total）
+        """
+        results = {'success': 0, 'failed': 0, 'skipped': 0, 'quarantined': 0, 'timed_out': 0,
+                   'total': len(file_pairs)}
+        jobs = min(resolve_jobs(jobs), len(file_pairs))
+        
+        # 每种分辨率只分配一次帧缓冲区，之后的文件全部复用
+        buffers = FrameBuffers()
+        
+        # 先统计好每台相机的坏点掩膜（工作进程从掩膜目录读取），保证每一帧都被校正
+        if self.defect_masks is not None:
+            self.prepare_defect_masks([input_path for input_path, _ in file_pairs], measurement_params, buffers)
+        
+        # 两阶段模式：先统计整批帧的平场偏移（命中缓存时跳过）
+        if self.flat_field_cache is not None:
+            self.prepare_flat_field([input_path for input_path, _ in file_pairs], measurement_params, buffers)
+        
+        # 并行转换时在本进程中选定解码后端，所有工作进程使用同一选择
+        if jobs > 1:
+            self.prepare_backends([input_path for input_path, _ in file_pairs], measurement_params, buffers)
+        
+        if jobs <= 1:
+            for input_path, output_path in file_pairs:
+                status = self.convert_batch_file(input_path, output_path, measurement_params,
+                                                 buffers, screen_rjpeg)
+                results[status] += 1
+                if callback is not None:
+                    callback(input_path, status)
+        else:
+            self.logger.info(f"🚀 使用 {jobs} 个工作进程并行转换")
+            finished = set()
+            try:
+                with BatchWorkerPool(self._worker_kwargs(), jobs, self.flat_fields, measurement_params,
+                                     screen_rjpeg) as pool:
+                    for input_path, status, reason in pool.imap(file_pairs):
+                        finished.add(input_path)
+                        results[status] += 1
+                        if status == 'quarantined':
+                            self.quarantined[input_path] = reason
+                        elif status == 'timed_out':
+                            self.timed_out[input_path] = reason
+                        if callback is not None:
+                            callback(input_path, status)
+            except BatchWorkerError as e:
+                # 没有可用的工作进程：尚未完成的文件记为失败，保留已完成部分的统计
+                unfinished = [input_path for input_path, _ in file_pairs if input_path not in finished]
+                self.logger.error(f"{e}，{len(unfinished)} 个文件未转换")
+                for input_path in unfinished:
+                    results['failed'] += 1
+                    if callback is not None:
+                        callback(input_path, 'failed')
+        
+        self.logger.info(f"批量转换完成 - 成功: {results['success']}, 失败: {results['failed']}, "
+                         f"跳过: {results['skipped']}, 隔离: {results['quarantined']}, "
+                         f"超时: {results['timed_out']}")
+        return results
+    
+    def convert_batch_file(self, input_path: str, output_path: str,
+                           measurement_params: Optional[Dict] = None,
+                           buffers: Optional[FrameBuffers] = None,
+                           screen_rjpeg: bool = True) -> str:
+        """
+        批量转换中的单个文件
+        
+        Args:
+            input_path: 输入R-JPEG文件路径
+            output_path: 输出TIFF文件路径
+            measurement_params: 本批次的测温参数
+            buffers: 复用的帧缓冲区
+            screen_rjpeg: 是否先只读文件头排除普通JPEG
             
         Returns:
-            bool: 是否可能是R-JPEG
+            str: 'success' / 'failed' / 'skipped' / 'quarantined' / 'timed_out'
         """
         try:
-            # 检查文件大小（R-JPEG通常较大）
-            file_size = os.path.getsize(file_path)
-            if file_size < 100000:  # 100KB
-                return False
+            if input_path in self.quarantined:
+                self.logger.info(f"跳过已隔离的文件: {input_path}")
+                return 'quarantined'
             
-            # 检查文件名模式
-            filename = os.path.basename(file_path).upper()
-            if 'DJI' in filename or '_T' in filename or '_R' in filename:
-                return True
+            # 读取时先根据文件头识别R-JPEG，普通JPEG在读完段头后即被排除；
+            # 通过识别的文件接着读完，整个文件只打开和读取一次
+            rjpeg_data = None
+            if screen_rjpeg and (self.raw_cache is None or self.raw_cache.get(input_path) is None):
+                rjpeg_data = self._read_input(input_path, buffers, screen=True)
+                if rjpeg_data is None:
+                    return 'skipped'
+
             
-            # 简单检查EXIF信息
-            with open(file_path, 'rb') as f:
-                header = f.read(1000)
-                if b'DJI' in header or b'FLIR' in header:
-                    return True
+            # 转换文件
+            if self._convert(input_path, output_path, measurement_params, rjpeg_data, buffers):
+                return 'success'
+            if input_path in self.quarantined:
+                return 'quarantined'
+            if input_path in self.timed_out:
+                return 'timed_out'
+            return 'failed'
             
-            return True  # 默认认为是R-JPEG
+        except Exception as e:
+            self.logger.error(f"处理文件 {input_path} 时出错: {str(e)}")
+            return 'failed'
+    
+    def _worker_kwargs(self) -> Dict:
+        """批量转换工作进程创建转换器的参数（与本转换器的设置相同）"""
+        return {
+            'sdk_path': self.sdk_path,
+            'measurement_params': self.measurement_params,
+            'raw_cache_dir': self.raw_cache.cache_dir if self.raw_cache is not None else None,
+            'use_mmap': self.use_mmap,
+            'backend': self.backend,
+            'isolate_sdk': self.isolate_sdk,
+            'file_timeout': self.file_timeout,
+            'model': self.model,
+            'defect_mask_dir': self.defect_masks.cache_dir if self.defect_masks is not None else None,
+            'undistort': self.undistort,
+            'flat_field_dir': self.flat_field_cache.cache_dir if self.flat_field_cache is not None else None,
+            'denoise': self.denoise,
+            'raw_output': self.raw_output,
+            'selected_backends': dict(self._selected_backends),
+        }
+    
+    def prepare_backends(self, rjpeg_files: List[str], measurement_params: Optional[Dict] = None,
+                         buffers: Optional[FrameBuffers] = None):
+        """
+        自动模式下为本批次的每个型号测速选定解码后端（见 _select_backend）
+        
+        只读取文件头确定型号，尚未选定后端的型号用其首个能解析的帧测速。
+        选定结果通过 _worker_kwargs 交给工作进程，避免每个工作进程重新测速而选出不同的后端
+        
+        Args:
+            rjpeg_files: 本批次的文件列表
+            measurement_params: 本批次的测温参数
+            buffers: 复用的帧缓冲区（可选）
+        """
+        if self.backend != 'auto':
+            return
+        
+        overrides = self._measurement_overrides(measurement_params)
+        # 测温参数超出SDK范围时直接使用普朗克定标、不测速，这些型号只需尝试一次
+        settled = set(self._selected_backends)
+        for rjpeg_file in rjpeg_files:
+            if rjpeg_file in self.quarantined:
+                continue
+            try:
+                model = self._resolve_model(rjpeg_file, read_metadata_file(rjpeg_file))
+                if model in settled:
+                    continue
+                rjpeg_data = self._read_input(rjpeg_file, buffers, screen=True)
+                if rjpeg_data is None:
+                    continue
+                segments = self._index_segments(rjpeg_data)
+                resolution = self._detect_image_resolution(segments, model)
+                if self._select_backend(rjpeg_data, resolution, segments, overrides, model) is not None:
+                    settled.add(model)
+            except Exception as e:
+                # 该文件留给工作进程处理（隔离、超时或失败）
+                self.logger.debug(f"无法用 {rjpeg_file} 测速解码后端: {e}")
+    
+    def prepare_defect_masks(self, rjpeg_files: List[str], measurement_params: Optional[Dict] = None,
+                             buffers: Optional[FrameBuffers] = None):
+        """
+        转换前统计本批次每台相机的坏点掩膜并写入掩膜目录
+        
+        只读取文件头确定相机，每台尚无掩膜的相机解码前 Config.DEFECT_CALIBRATION_FRAMES 帧；
+        已有掩膜的相机只解码一帧确认。批次中帧数不足的相机用已有的帧生成掩膜
+        
+        Args:
+            rjpeg_files: 本批次的文件列表
+            measurement_params: 本批次的测温参数
+            buffers: 复用的帧缓冲区（可选）
+        """
+        ready = set()
+        for rjpeg_file in rjpeg_files:
+            if rjpeg_file in self.quarantined:
+                continue
+            try:
+                camera_id = self._camera_id(rjpeg_file, read_metadata_file(rjpeg_file).serial)
+            except (OSError, ValueError):
+                continue
+            if not camera_id or camera_id in ready:
+                continue
+            try:
+                rjpeg_data = self._read_input(rjpeg_file, buffers, screen=True)
+                if rjpeg_data is None:
+                    continue
+                _, metadata = self._extract(rjpeg_file, measurement_params, rjpeg_data, out=buffers)
+            except Exception:
+                continue
+            if 'defect_pixels' in metadata['corrections']:
+                ready.add(camera_id)
+        
+        for camera_id, frame_count in self.defect_masks.finish():
+            self.logger.warning(f"⚠️ 相机 {camera_id} 只有 {frame_count} 帧，"
+                                f"少于 {Config.DEFECT_CALIBRATION_FRAMES} 帧，坏点掩膜可能不准确")
+            ready.add(camera_id)
+        if ready:
+            self.logger.info(f"🩹 坏点掩膜已就绪: {len(ready)} 台相机")
+    
+    def prepare_flat_field(self, rjpeg_files: List[str], measurement_params: Optional[Dict] = None,
+                           buffers: Optional[FrameBuffers] = None):
+        """
+        平场校正第一阶段：逐帧流式统计整批文件的平场偏移，结果写入 self.flat_fields 并缓存，
+        之后的转换在保存前逐帧校正。固定图案噪声属于单个传感器，按相机（见 _camera_id）
+        和分辨率分别统计
+        
+        缓存键包含文件集和影响温度值的设置，以相同设置重跑同一批文件时直接读取缓存
+        
+        Args:
+            rjpeg_files: 本批次的文件列表
+            measurement_params: 本批次的测温参数
+            buffers: 复用的帧缓冲区（可选）
+        """
+        settings = {
+            'measurement_params': self._measurement_overrides(measurement_params),
+            'model': self.model,
+            'defect_masks': self.defect_masks is not None,
+            'undistort': self.undistort,
+            'method': Config.FLAT_FIELD_METHOD,
+        }
+        key = FlatFieldCache.cache_key(rjpeg_files, settings)
+        cached = self.flat_field_cache.get(key)
+        if cached is not None:
+            self.logger.info("♻️ 使用缓存的平场估计，跳过统计阶段")
+            self.flat_fields = cached
+            return
+        
+        self.logger.info(f"📐 平场估计（第一阶段）: 统计 {len(rjpeg_files)} 个文件")
+        self.flat_fields = {}
+        estimators: Dict[Tuple[str, Tuple[int, int]], FlatFieldEstimator] = {}
+        for rjpeg_file in rjpeg_files:
+            if rjpeg_file in self.quarantined:
+                continue
+            try:
+                rjpeg_data = None
+                if self.raw_cache is None or self.raw_cache.get(rjpeg_file) is None:
+                    rjpeg_data = self._read_input(rjpeg_file, buffers, screen=True)
+                    if rjpeg_data is None:
+                        continue
+                temperature_data, metadata = self._extract(rjpeg_file, measurement_params, rjpeg_data,
+                                                           out=buffers)
+            except Exception:
+                continue
+            camera_id = self._camera_id(rjpeg_file, metadata['camera_serial'])
+            if not metadata['is_real_data'] or not camera_id:
+                continue
+            estimator = estimators.get((camera_id, temperature_data.shape))
+            if estimator is None:
+                estimator = FlatFieldEstimator(temperature_data.shape)
+                estimators[(camera_id, temperature_data.shape)] = estimator
+            estimator.update(temperature_data)
+        
+        offsets = {}
+        for (camera_id, shape), estimator in estimators.items():
+            if estimator.frame_count < Config.FLAT_FIELD_MIN_FRAMES:
+                self.logger.warning(f"⚠️ 相机 {camera_id} ({shape[1]}×{shape[0]}) 只有 {estimator.frame_count} 帧，"
+                                    f"少于 {Config.FLAT_FIELD_MIN_FRAMES} 帧，不做平场校正")
+                continue
+            offset = offsets[(camera_id, shape)] = estimator.estimate()
+            self.logger.info(f"📐 平场估计完成 (相机 {camera_id}, {shape[1]}×{shape[0]}, "
+                             f"{estimator.frame_count} 帧): 偏移范围 {offset.min():.2f} ~ {offset.max():.2f}°C")
+        
+        self.flat_field_cache.put(key, offsets)
+        self.flat_fields = offsets
+    
+    def _apply_flat_field(self, temperature_data: np.ndarray, metadata: Dict,
+                          rjpeg_path: Optional[str]) -> np.ndarray:
+        """平场校正第二阶段：原地减去该相机对应分辨率的平场偏移（没有估计时直接返回）"""
+        camera_id = self._camera_id(rjpeg_path, metadata.get('camera_serial'))
+        offset = self.flat_fields.get((camera_id, temperature_data.shape))
+        if offset is None or not metadata['is_real_data']:
+            return temperature_data
+        if not temperature_data.flags.writeable:
+            temperature_data = temperature_data.copy()
+        apply_flat_field(temperature_data, offset)
+        metadata['corrections'].append('flat_field')
+        return temperature_data
+    
+    def _apply_denoise(self, temperature_data: np.ndarray, metadata: Dict) -> np.ndarray:
+        """保存前对温度帧原地降噪（未启用或为模拟数据时直接返回）"""
+        if self.denoise is None or not metadata['is_real_data']:
+            return temperature_data
+        if not temperature_data.flags.writeable:
+            temperature_data = temperature_data.copy()
+        denoise_frame(temperature_data, self.denoise)
+        metadata['corrections'].append(f"denoise:{self.denoise}")
+        return temperature_data
+    
+    def _is_likely_rjpeg(self, file_path: str, reader: Optional[PrefillReader] = None) -> bool:
+        """
+        通过文件头判断文件是否为可转换的DJI R-JPEG
+        
+        只读取JPEG段头和EXIF开头的几KB（见 rjpeg_parser.sniff），
+        不读取整个文件
+        
+        Args:
+            file_path: 文件路径
+            reader: 正在读入缓冲区的文件（见 FrameBuffers.read_file），不提供时单独打开文件
             
-        except Exception:
+        Returns:
+            bool: 是否为包含原始热红外数据的DJI R-JPEG
+        """
+        try:
+            result = sniff(reader) if reader is not None else sniff_file(file_path)
+        except OSError as e:
+            self.logger.warning(f"无法读取文件头: {file_path} ({e})")
             return False
+        
+        camera = ' '.join(filter(None, (result.make, result.model))) or '未知相机'
+        if result.is_dji_rjpeg:
+            self.logger.debug(f"识别为DJI R-JPEG: {file_path} ({camera})")
+            return True
+        if result.vendor == 'FLIR':
+            self.logger.info(f"跳过FLIR热像图（暂不支持）: {file_path} ({camera})")
+        else:
+            self.logger.info(f"跳过非R-JPEG文件: {file_path} ({camera})")
+        return False
     
     def get_installation_guide(self) -> str:
         """获取SDK安装指南"""
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+平场（非均匀性）校正
+第一阶段对整次飞行的所有帧做逐像素的流式统计（均值、截尾均值或近似中值，内存只与分辨率有关），
+得到暗角和固定图案噪声的偏移估计；第二阶段逐帧减去该偏移。估计结果按输入文件集缓存。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+FLAT_FIELD_METHODS = ('clipped_mean', 'mean', 'median')
+
+# 截尾均值的截断阈值（帧内偏差稳健标准差的倍数），排除高温目标等离群值
+CLIP_SIGMA = 4.0
+
+
+class FlatFieldEstimator:
+    """
+    逐像素流式统计每帧相对其自身均值的偏差
+
+    场景内容随飞行变化而被平均掉，留下与像素位置绑定的偏移（暗角、固定图案噪声）。
+    'mean' 累加float64和；'clipped_mean' 先把偏差截断在帧内稳健标准差的 CLIP_SIGMA 倍以内
+    再累加，高温目标等离群值不会污染估计；'median' 用步长按 1/sqrt(n) 递减的随机逼近
+    更新近似中值（收敛较慢，适合帧数很多的飞行）。三种方法都只保存与一帧同尺寸的状态。
+    """
+
+    def __init__(self, shape: Tuple[int, int], method: str = Config.FLAT_FIELD_METHOD):
+        if method not in FLAT_FIELD_METHODS:
+            raise ValueError(f"未知的平场统计方法: {method}，可选: {', '.join(FLAT_FIELD_METHODS)}")
+        self.shape = shape
+        self.method = method
+        self.frame_count = 0
+        self._state: Optional[np.ndarray] = None
+        self._scratch = np.empty(shape, dtype=np.float32)
+        self._step = 0.0
+
+    def update(self, frame: np.ndarray):
+        """加入一帧温度数据"""
+        if frame.shape != self.shape:
+            raise ValueError(f"帧尺寸 {frame.shape} 与平场尺寸 {self.shape} 不一致")
+        deviation = self._scratch
+        np.subtract(frame, np.float32(frame.mean(dtype=np.float64)), out=deviation)
+        self.frame_count += 1
+
+        if self.method == 'clipped_mean':
+            center = np.float32(np.median(deviation))
+            deviation -= center
+            limit = np.float32(CLIP_SIGMA * 1.4826 * float(np.median(np.abs(deviation))))
+            np.clip(deviation, -limit, limit, out=deviation)
+            deviation -= np.float32(deviation.mean(dtype=np.float64))
+
+        if self._state is None:
+            self._state = deviation.astype(np.float32 if self.method == 'median' else np.float64)
+            if self.method == 'median':
+                # 初始步长取首帧偏差的稳健标准差
+                self._step = max(1.4826 * float(np.median(np.abs(deviation))), Config.FLAT_FIELD_MIN_STEP)
+            return
+
+        if self.method != 'median':
+            self._state += deviation
+        else:
+            deviation -= self._state
+            np.sign(deviation, out=deviation)
+            deviation *= np.float32(self._step / np.sqrt(self.frame_count))
+            self._state += deviation
+
+    def estimate(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: 零均值的float32偏移图（校正时从每帧中减去）
+        """
+        if self._state is None:
+            return np.zeros(self.shape, dtype=np.float32)
+        offset = self._state if self.method == 'median' else self._state / self.frame_count
+        offset = offset.astype(np.float32)
+        offset -= np.float32(offset.mean(dtype=np.float64))
+        return offset
+
+
+def apply_flat_field(frame: np.ndarray, offset: np.ndarray) -> np.ndarray:
+    """
+    原地减去平场偏移
+
+    Args:
+        frame: 可写的float32温度帧
+        offset: 同尺寸的偏移图
+
+    Returns:
+        np.ndarray: 校正后的同一数组
+    """
+    return np.subtract(frame, offset, out=frame)
+
+
+class FlatFieldCache:
+    """
+    平场估计的磁盘缓存
+
+    缓存键由输入文件集（路径、大小、修改时间）和影响温度值的设置组成，
+    同一批文件以相同设置重跑时直接读取，跳过第一阶段。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(file_paths: Iterable[str], settings: Dict) -> str:
+        """根据文件集和设置生成缓存键"""
+        digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        for file_path in sorted(file_paths):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"flat_field_{key}.npz")
+
+    def get(self, key: str) -> Optional[Dict[Tuple[str, Tuple[int, int]], np.ndarray]]:
+        """
+        Returns:
+            Optional[Dict[Tuple[str, Tuple[int, int]], np.ndarray]]: (相机标识, 帧形状) -> 偏移图，
+            未命中时返回None
+        """
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with np.load(disk_path, allow_pickle=False) as cached:
+                if cached.files and 'camera_0' not in cached.files:
+                    return None  # 旧版缓存只按分辨率保存，没有相机标识
+                offsets = {}
+                for index in range(sum(name.startswith('offset_') for name in cached.files)):
+                    offset = cached[f"offset_{index}"]
+                    offsets[(str(cached[f"camera_{index}"]), offset.shape)] = offset
+                return offsets
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, offsets: Dict[Tuple[str, Tuple[int, int]], np.ndarray]):
+        """写入缓存（每个相机、每种分辨率一张偏移图，附带相机标识）"""
+        disk_path = self._disk_path(key)
+        temp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        arrays = {}
+        for index, ((camera_id, _), offset) in enumerate(offsets.items()):
+            arrays[f"offset_{index}"] = offset
+            arrays[f"camera_{index}"] = np.array(camera_id)
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, disk_path)
@@ -8,6 +8,8 @@ import os
 from pathlib import Path
 import logging
 
+from config import Config
+
 # 导入DJI转换器
 try:
     from dji_thermal_converter import DJIThermalConverter
@@ -54,9 +56,9 @@ class ThermalConverterGUI:
         
         # 无人机型号选择
         ttk.Label(main_frame, text="无人机型号:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.model_var = tk.StringVar(value="M30T")
+        self.model_var = tk.StringVar(value="auto")
         model_combo = ttk.Combobox(main_frame, textvariable=self.model_var, 
-                                  values=["M30T", "H20T", "H30T", "M2EA"], 
+                                  values=["auto", "M30T", "H20T", "H30T", "M2EA"], 
                                   state="readonly", width=15)
         model_combo.grid(row=1, column=1, sticky=tk.W, pady=5)
         
@@ -103,6 +105,12 @@ class ThermalConverterGUI:
                                         values=["lzw", "zip", "none"], state="readonly", width=10)
         compression_combo.grid(row=1, column=1, sticky=tk.W, pady=5)
         
+        # 并行进程数（批量转换）
+        ttk.Label(options_frame, text="并行进程数:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.jobs_var = tk.IntVar(value=Config.MAX_CONCURRENT_CONVERSIONS)
+        ttk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.jobs_var,
+                    width=8).grid(row=2, column=1, sticky=tk.W, pady=5)
+        
         # 转换按钮
         self.convert_button = ttk.Button(main_frame, text="开始转换", command=self.start_conversion)
         self.convert_button.grid(row=5, column=0, columnspan=3, pady=20)
@@ -186,17 +194,17 @@ class ThermalConverterGUI:
         
     def convert_images(self):
         """转换图像（在单独线程中运行）"""
+        converter = None
         try:
             # 创建DJI转换器
             self.log_message("初始化DJI转换器...")
-            converter = DJIThermalConverter()
+            converter = DJIThermalConverter(model=self.model_var.get())
             
-            if not converter.is_initialized:
-                self.log_message("错误: DJI SDK未初始化")
-                self.log_message("请确保libdirp.dll文件在程序目录下")
-                return
-                
-            self.log_message("DJI SDK初始化成功")
+            if converter.is_initialized:
+                self.log_message("DJI SDK初始化成功")
+            else:
+                self.log_message("⚠️ DJI SDK未初始化，将使用纯Python解码器（近似辐射定标）")
+                self.log_message("如需SDK精度，请确保libdirp.dll文件在程序目录下")
             
             input_path = self.input_var.get().strip()
             
@@ -229,29 +237,26 @@ class ThermalConverterGUI:
                     
                 self.log_message(f"找到 {len(image_files)} 个图像文件")
                 
-                success_count = 0
-                for i, image_file in enumerate(image_files):
-                    try:
-                        # 生成输出文件名
-                        relative_path = image_file.relative_to(input_dir)
-                        output_file = output_dir / relative_path.with_suffix('.tiff')
-                        
-                        # 确保输出目录存在
-                        output_file.parent.mkdir(parents=True, exist_ok=True)
-                        
-                        self.log_message(f"转换 ({i+1}/{len(image_files)}): {image_file.name}")
-                        
-                        # 转换图像
-                        if converter.convert_rjpeg_to_tiff(str(image_file), str(output_file)):
-                            success_count += 1
-                            self.log_message(f"✅ 转换成功: {image_file.name}")
-                        else:
-                            self.log_message(f"❌ 转换失败: {image_file.name}")
-                        
-                    except Exception as e:
-                        self.log_message(f"转换失败 {image_file.name}: {str(e)}")
+                file_pairs = [(str(image_file), str(output_dir / image_file.relative_to(input_dir).with_suffix('.tiff')))
+                              for image_file in image_files]
+                finished = []
+                
+                def report(image_file: str, status: str):
+                    finished.append(image_file)
+                    name = os.path.basename(image_file)
+                    if status == 'success':
+                        self.log_message(f"✅ 转换成功 ({len(finished)}/{len(file_pairs)}): {name}")
+                    elif status == 'skipped':
+                        self.log_message(f"⏭️ 跳过非R-JPEG文件 ({len(finished)}/{len(file_pairs)}): {name}")
+                    else:
+                        self.log_message(f"❌ 转换失败 ({len(finished)}/{len(file_pairs)}): {name}")
+                
+                # 多个工作进程并行转换，每个进程只初始化一次转换器；普通可见光JPEG根据文件头跳过
+                results = converter.convert_files(file_pairs, jobs=self.jobs_var.get(), callback=report)
+                success_count = results['success']
                 
-                self.log_message(f"批量转换完成: {success_count}/{len(image_files)} 个文件成功")
+                self.log_message(f"批量转换完成: {success_count}/{len(image_files)} 个文件成功"
+                                 f"（跳过 {results['skipped']} 个非R-JPEG文件）")
                 
             else:
                 # 单文件转换模式
@@ -271,6 +276,9 @@ class ThermalConverterGUI:
             self.log_message(f"转换失败: {str(e)}")
             
         finally:
+            # 释放SDK工作进程和共享内存
+            if converter is not None:
+                converter.close()
             # 重置UI状态
             self.is_converting = False
             self.convert_button.config(text="开始转换", state="normal")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+热点检测
+对温度帧按阈值做8连通域标记，并向量化统计每个热点的面积、温度、质心和外接框
+"""
+
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from config import Config
+from numba_kernels import NUMBA_AVAILABLE, numba_enabled
+
+if NUMBA_AVAILABLE:
+    from numba_kernels import label_components
+
+
+class Hotspot(NamedTuple):
+    """单个热点的统计"""
+    label: int
+    area: int                                  # 像素数
+    max_temp: float                            # °C
+    mean_temp: float                           # °C
+    centroid: Tuple[float, float]              # (x, y)
+    bbox: Tuple[int, int, int, int]            # (left, top, right, bottom)，右下为开区间
+
+
+def _label_components_numpy(mask: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    8连通域标记的NumPy实现
+
+    每个像素的标签初始化为自身的线性索引，反复取3×3邻域内的最小标签并做指针跳跃，
+    直到不再变化；最后按最小索引（即光栅顺序中第一个像素）重新编号为 1..count
+    """
+    height, width = mask.shape
+    background = height * width
+    flat_mask = mask.reshape(-1)
+    labels = np.where(flat_mask, np.arange(background), background)
+    shifts = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+    while True:
+        padded = np.pad(labels.reshape(height, width), 1, constant_values=background)
+        updated = labels.reshape(height, width).copy()
+        for dy, dx in shifts:
+            np.minimum(updated, padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width], out=updated)
+        updated = updated.reshape(-1)
+        updated[~flat_mask] = background
+        # 指针跳跃：标签指向的像素的标签，连通域越长收敛越快
+        updated[flat_mask] = updated[updated[flat_mask]]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    result = np.zeros(background, dtype=np.int32)
+    roots, inverse = np.unique(labels[flat_mask], return_inverse=True)
+    result[flat_mask] = inverse.astype(np.int32) + 1
+    return result.reshape(height, width), len(roots)
+
+
+def label_hotspots(temperature_data: np.ndarray, threshold: float) -> Tuple[np.ndarray, int]:
+    """
+    标记高于阈值的8连通区域
+
+    Args:
+        temperature_data: 温度帧（°C）
+        threshold: 温度阈值（°C）
+
+    Returns:
+        Tuple[np.ndarray, int]: int32标签图（背景为0，热点按光栅顺序从1编号）和热点数量
+    """
+    mask = temperature_data > threshold
+    if numba_enabled():
+        return label_components(mask)
+    return _label_components_numpy(mask)
+
+
+def find_hotspots(temperature_data: np.ndarray, threshold: float,
+                  min_area: int = Config.HOTSPOT_MIN_AREA) -> List[Hotspot]:
+    """
+    检测热点
+
+    Args:
+        temperature_data: 温度帧（°C）
+        threshold: 温度阈值（°C）
+        min_area: 最小面积（像素），更小的区域视为噪声
+
+    Returns:
+        List[Hotspot]: 按最高温度从高到低排列的热点
+    """
+    labels, count = label_hotspots(temperature_data, threshold)
+    if count == 0:
+        return []
+
+    flat_labels = labels.reshape(-1)
+    selected = flat_labels > 0
+    hot_labels = flat_labels[selected]
+    temperatures = temperature_data.reshape(-1)[selected].astype(np.float64)
+    ys, xs = np.divmod(np.flatnonzero(selected), temperature_data.shape[1])
+
+    size = count + 1
+    area = np.bincount(hot_labels, minlength=size)
+    total = np.bincount(hot_labels, temperatures, minlength=size)
+    sum_x = np.bincount(hot_labels, xs, minlength=size)
+    sum_y = np.bincount(hot_labels, ys, minlength=size)
+    max_temp = np.full(size, -np.inf)
+    np.maximum.at(max_temp, hot_labels, temperatures)
+    left = np.full(size, temperature_data.shape[1])
+    top = np.full(size, temperature_data.shape[0])
+    right = np.zeros(size, dtype=np.int64)
+    bottom = np.zeros(size, dtype=np.int64)
+    np.minimum.at(left, hot_labels, xs)
+    np.minimum.at(top, hot_labels, ys)
+    np.maximum.at(right, hot_labels, xs + 1)
+    np.maximum.at(bottom, hot_labels, ys + 1)
+
+    hotspots = [
+        Hotspot(label, int(area[label]), float(max_temp[label]), float(total[label] / area[label]),
+                (float(sum_x[label] / area[label]), float(sum_y[label] / area[label])),
+                (int(left[label]), int(top[label]), int(right[label]), int(bottom[label])))
+        for label in range(1, size) if area[label] >= min_area
+    ]
+    hotspots.sort(key=lambda hotspot: hotspot.max_temp, reverse=True)
+    return hotspots
@@ -19,6 +19,9 @@ try:
 except ImportError:
     DJI_CONVERTER_AVAILABLE = False
 
+from config import Config
+from decoder_backends import BACKEND_REGISTRY
+
 def setup_logging(log_level: str = 'INFO'):
     """设置日志记录"""
     logging.basicConfig(
@@ -121,6 +124,12 @@ def main():
   # 递归转换子目录
   python main.py -i input_dir -o output_dir --batch --recursive
   
+  # 指定测温参数，并缓存原始计数以便修改参数后快速重跑
+  python main.py -i input_dir --batch --emissivity 0.95 --distance 10 --raw-cache .raw_cache
+  
+  # 强制使用纯Python解码器（默认 auto 会在首帧测速后自动选择）
+  python main.py -i input_dir --batch --backend rjpeg
+  
 支持的无人机型号:
   M30T  - 大疆 M30T (-20°C ~ 400°C)
   H20T  - 大疆 H20T (-20°C ~ 550°C)
@@ -148,9 +157,9 @@ def main():
     
     parser.add_argument(
         '-m', '--model',
-        default='M30T',
-        choices=['M30T', 'H20T', 'H30T', 'M2EA'],
-        help='无人机型号（默认: M30T）'
+        default='auto',
+        choices=['auto'] + Config.get_supported_models(),
+        help=f'无人机型号（默认: auto，根据EXIF自动识别，无法识别时为 {Config.DEFAULT_DRONE_MODEL}）'
     )
     
     parser.add_argument(
@@ -179,6 +188,102 @@ def main():
         help='TIFF压缩方式 (默认: lzw)'
     )
     
+    parser.add_argument(
+        '--emissivity',
+        type=float,
+        help='发射率 0.01~1.0（默认使用文件中记录的值）'
+    )
+    
+    parser.add_argument(
+        '--distance',
+        type=float,
+        help='目标距离（米）'
+    )
+    
+    parser.add_argument(
+        '--humidity',
+        type=float,
+        help='相对湿度（%%）'
+    )
+    
+    parser.add_argument(
+        '--reflected-temp',
+        type=float,
+        help='反射温度（°C）'
+    )
+    
+    parser.add_argument(
+        '--ambient-temp',
+        type=float,
+        help='环境温度（°C）'
+    )
+    
+    parser.add_argument(
+        '--raw-cache',
+        help='原始计数缓存目录；启用后修改测温参数重跑时只重新定标，不再解析JPEG'
+    )
+    
+    parser.add_argument(
+        '--defect-masks',
+        help='坏点掩膜目录；启用坏点校正，每台相机的掩膜从前几帧（或先运行的标定集）统计一次并缓存'
+    )
+    
+    parser.add_argument(
+        '--undistort',
+        action='store_true',
+        help='按型号的镜头参数校正畸变（用于测绘拼图）'
+    )
+    
+    parser.add_argument(
+        '--flat-field',
+        help='平场估计缓存目录；批量转换先统计整批帧的平场（暗角/固定图案噪声）再逐帧校正'
+    )
+    
+    parser.add_argument(
+        '--denoise',
+        choices=['gaussian', 'box', 'guided'],
+        help='保存前对温度帧降噪：gaussian（高斯）、box（方框）或 guided（引导滤波，保边）'
+    )
+    
+    parser.add_argument(
+        '--raw-output',
+        action='store_true',
+        help='输出16位原始计数TIFF（定标参数写入TIFF标签，读取时再定标），不输出温度TIFF'
+    )
+    
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=Config.MAX_CONCURRENT_CONVERSIONS,
+        help=f'批量转换的并行进程数（默认: {Config.MAX_CONCURRENT_CONVERSIONS}，1表示单进程，0表示CPU核数）'
+    )
+    
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='以内存映射方式读取输入文件（零拷贝，适合大批量转换）'
+    )
+    
+    parser.add_argument(
+        '--in-process-sdk',
+        action='store_true',
+        help='在主进程中直接调用SDK（默认在独立工作进程中调用，原生库崩溃时只重启工作进程）'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=Config.FILE_TIMEOUT_SECONDS,
+        help=f'单个文件的SDK处理期限（秒，默认: {Config.FILE_TIMEOUT_SECONDS:g}，0表示不限制）'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=['auto'] + list(BACKEND_REGISTRY),
+        default='auto',
+        help='解码后端（默认: auto，首帧测速后选择结果正确且最快的后端）'
+    )
+    
     parser.add_argument(
         '--check-requirements',
         action='store_true',
@@ -217,20 +322,46 @@ def main():
             sys.exit(1)
         
         logger.info("使用DJI Thermal SDK转换器")
-        converter = DJIThermalConverter(sdk_path=args.sdk_path)
+        converter = DJIThermalConverter(
+            sdk_path=args.sdk_path,
+            measurement_params=get_measurement_params(args),
+            raw_cache_dir=args.raw_cache,
+            use_mmap=args.mmap,
+            backend=args.backend,
+            isolate_sdk=not args.in_process_sdk,
+            file_timeout=args.timeout or None,
+            model=args.model,
+            defect_mask_dir=args.defect_masks,
+            undistort=args.undistort,
+            flat_field_dir=args.flat_field,
+            denoise=args.denoise,
+            raw_output=args.raw_output
+        )
         
         if not converter.is_initialized:
-            logger.error("DJI Thermal SDK未初始化")
-            print(converter.get_installation_guide())
-            sys.exit(1)
+            logger.warning("DJI Thermal SDK未初始化，将使用纯Python解码器和近似辐射定标")
         
         # 执行转换
-        run_dji_conversion(converter, input_path, output_path, args)
+        try:
+            run_dji_conversion(converter, input_path, output_path, args)
+        finally:
+            converter.close()
         
     except Exception as e:
         logger.error(f"程序执行失败: {str(e)}")
         sys.exit(1)
 
+def get_measurement_params(args) -> dict:
+    """从命令行参数收集测温参数（只包含用户指定的项）"""
+    params = {
+        'emissivity': args.emissivity,
+        'distance': args.distance,
+        'humidity': args.humidity,
+        'reflection': args.reflected_temp,
+        'ambient_temp': args.ambient_temp,
+    }
+    return {k: v for k, v in params.items() if v is not None}
+
 def run_dji_conversion(converter, input_path: str, output_path: str, args):
     """运行DJI SDK转换"""
     logger = logging.getLogger(__name__)
@@ -255,27 +386,28 @@ def run_dji_conversion(converter, input_path: str, output_path: str, args):
         
         logger.info(f"找到 {len(image_files)} 个图像文件")
         
-        success_count = 0
-        for image_file in image_files:
-            try:
-                # 生成输出文件名
-                relative_path = image_file.relative_to(input_dir)
-                output_file = output_dir / relative_path.with_suffix('.tiff')
-                
-                # 确保输出目录存在
-                output_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                # 转换图像
-                if converter.convert_rjpeg_to_tiff(str(image_file), str(output_file)):
-                    logger.info(f"转换完成: {image_file} -> {output_file}")
-                    success_count += 1
-                else:
-                    logger.error(f"转换失败: {image_file}")
-                
-            except Exception as e:
-                logger.error(f"转换失败 {image_file}: {str(e)}")
+        # 生成输出文件名（两阶段平场校正和多进程并行都在 convert_files 中完成）
+        file_pairs = [(str(image_file), str(output_dir / image_file.relative_to(input_dir).with_suffix('.tiff')))
+                      for image_file in image_files]
         
-        logger.info(f"批量转换完成: {success_count}/{len(image_files)} 个文件成功")
+        def report(image_file: str, status: str):
+            if status == 'success':
+                logger.info(f"转换完成: {image_file}")
+            elif status == 'skipped':
+                logger.info(f"跳过非R-JPEG文件: {image_file}")
+            else:
+                logger.error(f"转换失败: {image_file}")
+        
+        # 根据文件头排除普通可见光JPEG，不为它们生成模拟数据
+        results = converter.convert_files(file_pairs, jobs=args.jobs, callback=report)
+        success_count = results['success']
+        
+        logger.info(f"批量转换完成: {success_count}/{len(image_files)} 个文件成功"
+                    f"（跳过 {results['skipped']} 个非R-JPEG文件）")
+        for path, reason in converter.quarantined.items():
+            logger.warning(f"已隔离: {path} ({reason})")
+        for path, reason in converter.timed_out.items():
+            logger.warning(f"超时: {path} ({reason})")
         
     else:
         # 单文件转换模式
@@ -312,6 +444,12 @@ def check_system_requirements():
         except ImportError:
             print(f"❌ {desc} ({lib}) - 未安装")
     
+    # 检查可选的Numba/numexpr加速
+    from numba_kernels import NUMBA_AVAILABLE, kernel_backend
+    print(f"{'✅' if NUMBA_AVAILABLE else '⚠️'} 逐像素内核: {kernel_backend()}")
+    from numexpr_kernels import NUMEXPR_AVAILABLE, expression_backend
+    print(f"{'✅' if NUMEXPR_AVAILABLE else '⚠️'} 逐元素表达式: {expression_backend()}")
+    
     # 检查DJI转换器
     if DJI_CONVERTER_AVAILABLE:
         try:
@@ -320,7 +458,8 @@ def check_system_requirements():
             if converter.is_initialized:
                 print("✅ DJI Thermal SDK - 已初始化")
             else:
-                print("⚠️ DJI Thermal SDK - 未初始化（可能需要DLL文件）")
+                print("⚠️ DJI Thermal SDK - 未初始化（可能需要DLL文件），将使用纯Python解码器")
+            print(f"✅ 可用解码后端: {', '.join(converter.available_backends())}")
         except Exception as e:
             print(f"❌ DJI Thermal SDK - 初始化失败: {e}")
     else:
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+可选的Numba加速内核
+逐像素循环难以用NumPy高效表达的运算（双线性重映射、坏点邻域中值、热点连通域标记）
+在安装了Numba时编译为并行机器码；未安装或被 Config.USE_NUMBA 关闭时调用方自动回退到NumPy实现
+"""
+
+import numpy as np
+
+from config import Config
+
+try:
+    import numba
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def numba_enabled() -> bool:
+    """是否使用Numba内核"""
+    return NUMBA_AVAILABLE and Config.USE_NUMBA
+
+
+def kernel_backend() -> str:
+    """当前使用的内核实现说明（用于 --check-requirements 和基准测试）"""
+    if numba_enabled():
+        return f"numba {numba.__version__}（{numba.config.NUMBA_NUM_THREADS} 线程）"
+    if NUMBA_AVAILABLE:
+        return "numpy（Numba已安装但被 Config.USE_NUMBA 关闭）"
+    return "numpy（未安装Numba）"
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True)
+    def remap_bilinear(flat, indices, weights, out):
+        """按重映射表逐像素取4个源像素做加权和"""
+        for i in prange(indices.shape[0]):
+            out[i] = (flat[indices[i, 0]] * weights[i, 0] + flat[indices[i, 1]] * weights[i, 1]
+                      + flat[indices[i, 2]] * weights[i, 2] + flat[indices[i, 3]] * weights[i, 3])
+
+    @njit(parallel=True, cache=True)
+    def defect_median(flat, indices, neighbours, invalid):
+        """
+        原地用有效邻居的中值替换坏点
+
+        有效邻居不包含坏点，因此读写互不干扰，可以并行逐点写回
+        """
+        for i in prange(indices.shape[0]):
+            values = np.empty(neighbours.shape[1], dtype=np.float32)
+            count = 0
+            for k in range(neighbours.shape[1]):
+                if invalid[i, k]:
+                    continue
+                value = np.float32(flat[neighbours[i, k]])
+                # 插入排序（最多8个值）
+                j = count
+                while j > 0 and values[j - 1] > value:
+                    values[j] = values[j - 1]
+                    j -= 1
+                values[j] = value
+                count += 1
+            if count > 0:
+                flat[indices[i]] = (values[(count - 1) // 2] + values[count // 2]) * np.float32(0.5)
+
+    @njit(cache=True)
+    def _find_root(parent, label):
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    @njit(cache=True)
+    def label_components(mask):
+        """
+        8连通域标记（两遍扫描 + 并查集）
+
+        标签按连通域中第一个像素的光栅顺序从1开始编号，与NumPy实现的结果一致。
+        并查集的合并依赖扫描顺序，因此这一内核是串行的。
+
+        Returns:
+            Tuple[np.ndarray, int]: int32标签图（背景为0）和连通域数量
+        """
+        height, width = mask.shape
+        labels = np.zeros((height, width), dtype=np.int32)
+        parent = np.zeros(height * width // 2 + 2, dtype=np.int32)
+        next_label = 1
+
+        for y in range(height):
+            for x in range(width):
+                if not mask[y, x]:
+                    continue
+                best = 0
+                for dy, dx in ((-1, -1), (-1, 0), (-1, 1), (0, -1)):
+                    ny, nx = y + dy, x + dx
+                    if ny < 0 or nx < 0 or nx >= width:
+                        continue
+                    neighbour = labels[ny, nx]
+                    if neighbour == 0:
+                        continue
+                    root = _find_root(parent, neighbour)
+                    if best == 0 or root < best:
+                        best = root
+                if best == 0:
+                    parent[next_label] = next_label
+                    labels[y, x] = next_label
+                    next_label += 1
+                    continue
+                labels[y, x] = best
+                for dy, dx in ((-1, -1), (-1, 0), (-1, 1), (0, -1)):
+                    ny, nx = y + dy, x + dx
+                    if ny < 0 or nx < 0 or nx >= width:
+                        continue
+                    neighbour = labels[ny, nx]
+                    if neighbour != 0:
+                        root = _find_root(parent, neighbour)
+                        if root != best:
+                            parent[root] = best
+
+        # 根标签重新编号为 1..count（根总是该连通域中最早出现的标签）
+        relabel = np.zeros(next_label, dtype=np.int32)
+        count = 0
+        for label in range(1, next_label):
+            root = _find_root(parent, label)
+            if root == label:
+                count += 1
+                relabel[label] = count
+            else:
+                relabel[label] = relabel[root]
+        for y in range(height):
+            for x in range(width):
+                labels[y, x] = relabel[labels[y, x]]
+        return labels, count
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+可选的numexpr融合表达式
+辐射定标和TIFF缩放中的逐元素算式在安装了numexpr时按缓存大小的分块多线程求值，
+不产生整帧临时数组；未安装或被 Config.USE_NUMEXPR 关闭时调用方自动回退到NumPy实现。
+
+所有常数都以float32传入，运算顺序与NumPy实现逐步一致，因此结果逐位相同。
+numexpr的float32对数与NumPy的SIMD实现存在1 ULP级差异，对数一步仍由NumPy原地计算。
+"""
+
+import numpy as np
+
+from config import Config
+
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+
+def numexpr_enabled() -> bool:
+    """是否使用numexpr求值（只有一个线程时NumPy的SIMD实现更快，不使用）"""
+    return NUMEXPR_AVAILABLE and Config.USE_NUMEXPR and numexpr.get_num_threads() > 1
+
+
+def expression_backend() -> str:
+    """当前使用的表达式求值实现说明（用于 --check-requirements 和基准测试）"""
+    if numexpr_enabled():
+        return f"numexpr {numexpr.__version__}（{numexpr.get_num_threads()} 线程）"
+    if NUMEXPR_AVAILABLE and not Config.USE_NUMEXPR:
+        return "numpy（numexpr已安装但被 Config.USE_NUMEXPR 关闭）"
+    if NUMEXPR_AVAILABLE:
+        return "numpy（numexpr只有1个线程，NumPy实现更快）"
+    return "numpy（未安装numexpr）"
+
+
+if NUMEXPR_AVAILABLE:
+
+    def scale_cast(values: np.ndarray, scale: float, out: np.ndarray) -> np.ndarray:
+        """out = values * scale，按 out 的类型截断（与 np.multiply(..., casting='unsafe') 一致）"""
+        return numexpr.evaluate('values * scale', out=out, casting='unsafe',
+                                local_dict={'values': values, 'scale': np.float32(scale)})
+
+    def planck_denominator(raw: np.ndarray, gain: float, offset: float, lower: float,
+                           ratio: float, f: float, out: np.ndarray) -> np.ndarray:
+        """out = ratio / max(raw * gain + offset, lower) + f（普朗克反演中对数的自变量）"""
+        return numexpr.evaluate(
+            'ratio / where(raw * gain + offset > lower, raw * gain + offset, lower) + f', out=out,
+            local_dict={'raw': raw, 'gain': np.float32(gain), 'offset': np.float32(offset),
+                        'lower': np.float32(lower), 'ratio': np.float32(ratio), 'f': np.float32(f)})
+
+    def planck_finish(log_values: np.ndarray, b: float, kelvin: float, out: np.ndarray) -> np.ndarray:
+        """out = b / log_values - kelvin（普朗克反演的最后一步，可原地）"""
+        return numexpr.evaluate('b / log_values - kelvin', out=out,
+                                local_dict={'log_values': log_values, 'b': np.float32(b),
+                                            'kelvin': np.float32(kelvin)})
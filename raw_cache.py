@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+原始计数缓存
+缓存每个R-JPEG解码后的原始16位计数，修改测温参数后重新定标时无需再次解析JPEG或调用SDK
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+class RawCountCache:
+    """
+    两级原始计数缓存
+
+    内存中按LRU保留最近使用的帧（总大小受限），可选的磁盘目录中为每个文件
+    保存一个 .npz，进程重启后的重跑同样可以命中。缓存键由文件绝对路径、
+    大小和修改时间组成，源文件被替换后自动失效。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_memory_mb: int = Config.RAW_CACHE_MEMORY_MB):
+        """
+        Args:
+            cache_dir: 磁盘缓存目录，为None时只使用内存缓存
+            max_memory_mb: 内存缓存上限（MB）
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._memory: 'OrderedDict[str, Tuple[np.ndarray, Dict]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(file_path: str) -> Optional[str]:
+        """根据文件路径、大小和修改时间生成缓存键，文件不存在时返回None"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, file_path: str) -> Optional[Tuple[np.ndarray, Dict]]:
+        """
+        读取缓存
+
+        Returns:
+            Optional[Tuple[np.ndarray, Dict]]: (只读uint16原始计数, 附加信息)，未命中时返回None
+        """
+        key = self.cache_key(file_path)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if not self.cache_dir:
+            return None
+
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+
+        try:
+            with np.load(disk_path, allow_pickle=False) as cached:
+                raw_data = cached['raw']
+                info = json.loads(str(cached['info']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        raw_data.setflags(write=False)
+        self._remember(key, raw_data, info)
+        return raw_data, info
+
+    def put(self, file_path: str, raw_data: np.ndarray, info: Dict):
+        """
+        写入缓存
+
+        Args:
+            file_path: 源R-JPEG文件路径
+            raw_data: uint16原始计数
+            info: 附加信息（需可JSON序列化），例如文件内嵌的测温参数
+        """
+        key = self.cache_key(file_path)
+        if key is None:
+            return
+
+        # 零拷贝视图会让整个源文件缓冲区常驻内存，缓存前复制为独立数组
+        if not raw_data.flags.owndata:
+            raw_data = raw_data.copy()
+        raw_data.setflags(write=False)
+
+        if self.cache_dir:
+            disk_path = self._disk_path(key)
+            temp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, raw=raw_data, info=np.array(json.dumps(info, ensure_ascii=False)))
+            os.replace(temp_path, disk_path)
+
+        self._remember(key, raw_data, info)
+
+    def _remember(self, key: str, raw_data: np.ndarray, info: Dict):
+        """放入内存LRU，超出上限时淘汰最久未用的条目"""
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[0].nbytes
+
+            if raw_data.nbytes > self.max_memory_bytes:
+                return
+
+            self._memory[key] = (raw_data, info)
+            self._memory_bytes += raw_data.nbytes
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+
+    def clear_memory(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+原始计数TIFF
+保存未经定标的16位原始计数，并把型号、普朗克常数和测温参数写入TIFF标签；
+读取时在首次访问温度时才定标，修改测温参数重新定标也无需原始R-JPEG
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from thermal_calibration import (MeasurementParams, PlanckConstants, apply_temperature_lut,
+                                 build_temperature_lut)
+
+# 私有TIFF标签（>=32768），保存JSON格式的定标参数
+RAW_CALIBRATION_TAG = 65000
+
+# 定标参数标签的格式版本
+RAW_FORMAT_VERSION = 1
+
+
+def calibration_tag(model: str, measurement_params: Optional[Dict]) -> Dict:
+    """
+    生成定标参数标签的内容
+
+    Args:
+        model: 无人机型号
+        measurement_params: 测温参数
+
+    Returns:
+        Dict: 可JSON序列化的定标参数
+    """
+    return {
+        'version': RAW_FORMAT_VERSION,
+        'model': model,
+        'planck_constants': PlanckConstants.for_model(model)._asdict(),
+        'measurement_params': MeasurementParams.from_dict(measurement_params)._asdict(),
+    }
+
+
+def encode_raw_tiff(raw_data: np.ndarray, metadata: Dict, fp, compression: str = 'lzw'):
+    """
+    将原始计数编码为16位TIFF（不做定标和缩放）
+
+    Args:
+        raw_data: uint16原始计数
+        metadata: 元数据字典（写入ImageDescription），需含 device_model 和 measurement_params
+        fp: 输出文件路径或可写的文件对象
+        compression: 压缩方式
+    """
+    # 解码得到的零拷贝视图本身就是连续的小端uint16，此时不复制
+    raw_data = np.ascontiguousarray(raw_data, dtype='<u2')
+    height, width = raw_data.shape
+    pil_image = Image.frombuffer('I;16', (width, height), raw_data, 'raw', 'I;16', 0, 1)
+
+    calibration = calibration_tag(metadata['device_model'], metadata.get('measurement_params'))
+    tiff_tags = {
+        270: json.dumps(metadata, ensure_ascii=False),              # ImageDescription
+        305: 'DJI Thermal Converter with SDK v1.0',                 # Software
+        306: datetime.now().strftime('%Y:%m:%d %H:%M:%S'),          # DateTime
+        269: 'DJI R-JPEG Raw Counts',                               # DocumentName
+        RAW_CALIBRATION_TAG: json.dumps(calibration),
+    }
+    pil_image.save(fp, format='TIFF', compression=compression, tiffinfo=tiff_tags)
+
+
+@lru_cache(maxsize=Config.LUT_CACHE_SIZE)
+def _calibration_lut(planck: PlanckConstants, params: MeasurementParams) -> np.ndarray:
+    """按文件中保存的常数构建的查找表（不依赖当前 config.py 中的常数）"""
+    lut = build_temperature_lut(planck, params)
+    lut.setflags(write=False)
+    return lut
+
+
+class RawThermalImage:
+    """
+    原始计数TIFF的惰性读取器
+
+    打开时只解析TIFF标签；原始计数在首次访问 raw 时才读取，温度在首次访问
+    temperature 时才定标并缓存。只需要相对值的分析可以直接使用 raw，完全跳过定标；
+    calibrate() 可以用不同的测温参数重新定标。
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source: TIFF文件路径或可读的文件对象
+
+        Raises:
+            ValueError: 文件中没有定标参数标签（不是原始计数TIFF）
+        """
+        self._image = Image.open(source)
+        tag = self._image.tag_v2.get(RAW_CALIBRATION_TAG)
+        if tag is None:
+            self._image.close()
+            raise ValueError("不是原始计数TIFF（缺少定标参数标签）")
+
+        calibration = json.loads(tag)
+        self.model: str = calibration['model']
+        self.planck = PlanckConstants(**calibration['planck_constants'])
+        self.measurement_params = MeasurementParams(**calibration['measurement_params'])
+        description = self._image.tag_v2.get(270)
+        self.metadata: Dict = json.loads(description) if description else {}
+        self._raw: Optional[np.ndarray] = None
+        self._temperature: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        width, height = self._image.size
+        return height, width
+
+    @property
+    def raw(self) -> np.ndarray:
+        """只读uint16原始计数（首次访问时读取像素数据）"""
+        if self._raw is None:
+            self._raw = np.asarray(self._image)
+            self._raw.setflags(write=False)
+        return self._raw
+
+    @property
+    def temperature(self) -> np.ndarray:
+        """按文件中的测温参数定标的只读float32温度（°C），首次访问时计算"""
+        if self._temperature is None:
+            self._temperature = self.calibrate()
+            self._temperature.setflags(write=False)
+        return self._temperature
+
+    def calibrate(self, measurement_params: Optional[Dict] = None,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        定标为温度
+
+        Args:
+            measurement_params: 覆盖文件中测温参数的字段，None表示使用文件中的参数
+            out: 可选的float32输出数组
+
+        Returns:
+            np.ndarray: float32温度数组（°C）
+        """
+        params = self.measurement_params
+        if measurement_params:
+            params = MeasurementParams.from_dict({**params._asdict(), **measurement_params})
+        return apply_temperature_lut(self.raw, _calibration_lut(self.planck, params), out)
+
+    def close(self):
+        self._image.close()
+
+    def __enter__(self) -> 'RawThermalImage':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
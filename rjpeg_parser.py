@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+纯Python的DJI R-JPEG解析器
+遍历JPEG段结构，直接从APP3段中取出原始16位热红外数据，不依赖DJI Thermal SDK
+"""
+
+import io
+import math
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+# JPEG标记
+MARKER_SOI = 0xD8
+MARKER_EOI = 0xD9
+MARKER_SOS = 0xDA
+MARKER_APP1 = 0xE1
+MARKER_APP3 = 0xE3
+MARKER_APP4 = 0xE4
+
+# 没有长度字段的独立标记（TEM、RST0~RST7）
+STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+
+# 帧头标记（SOF0~SOF15，排除DHT/JPG/DAC）
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# DJI热像仪常见的热图分辨率 (width, height)
+KNOWN_THERMAL_RESOLUTIONS = [(640, 512), (1280, 1024), (320, 256), (160, 120)]
+
+RAW_DTYPE = np.dtype('<u2')
+
+# 最小的已知热图原始数据量（字节），APP3总量低于此值不视为热红外数据
+MIN_RAW_THERMAL_BYTES = min(w * h for w, h in KNOWN_THERMAL_RESOLUTIONS) * RAW_DTYPE.itemsize
+
+# APP1负载标识
+EXIF_HEADER = b'Exif\x00\x00'
+FLIR_HEADER = b'FLIR\x00'
+
+# EXIF IFD0中的厂商和型号标签
+EXIF_TAG_MAKE = 0x010F
+EXIF_TAG_MODEL = 0x0110
+
+# 嗅探时每个APP1段最多读取的字节数（Make/Model位于EXIF开头）
+SNIFF_APP1_BYTES = 4096
+
+# 边嗅探边读入缓冲区时每次至少读取的字节数（普通JPEG的段头通常在第一次读取内）
+SNIFF_READ_BYTES = 64 * 1024
+
+# APP4中DJI测温参数的已知整数布局: 魔数 -> 字段偏移
+# 字段依次为 湿度(%)、距离(0.1m)、发射率(0.01)、反射温度(0.1°C)
+DJI_APP4_INT_LAYOUTS = {
+    b'\xaa\x55\x12\x06': 0x24,
+    b'\xaa\x55\x38\x00': 0x04,
+}
+
+
+class RJPEGFormatError(ValueError):
+    """R-JPEG结构错误或不包含热红外数据"""
+
+
+def map_file(file_path: str):
+    """
+    以只读方式内存映射文件
+
+    段解析和SDK调用都直接在映射页上进行，不产生整文件的bytes副本。
+    映射在最后一个引用（包括从中切出的memoryview/数组视图）释放时自动解除。
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        mmap.mmap 或 bytes: 映射对象；空文件无法映射时返回空bytes
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''
+
+    # 提示内核预读整个文件，批处理时由页缓存完成顺序读取
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+        mapped.madvise(mmap.MADV_WILLNEED)
+    return mapped
+
+
+def as_byte_view(data) -> memoryview:
+    """将任意缓冲区协议对象转换为按字节寻址的memoryview（不复制数据）"""
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def iter_segments(data) -> Iterator[Tuple[int, memoryview]]:
+    """
+    遍历JPEG段（到SOS为止）
+
+    Args:
+        data: JPEG二进制数据
+
+    Yields:
+        Tuple[int, memoryview]: (标记, 段负载的零拷贝切片)
+    """
+    view = as_byte_view(data)
+    size = len(view)
+    if size < 4 or view[0] != 0xFF or view[1] != MARKER_SOI:
+        raise RJPEGFormatError("不是有效的JPEG文件（缺少SOI标记）")
+
+    pos = 2
+    while pos + 4 <= size:
+        if view[pos] != 0xFF:
+            raise RJPEGFormatError(f"偏移 {pos} 处缺少段标记")
+
+        marker = view[pos + 1]
+        if marker == 0xFF:
+            # 填充字节
+            pos += 1
+            continue
+        if marker in STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if marker == MARKER_EOI:
+            return
+
+        length = (view[pos + 2] << 8) | view[pos + 3]
+        end = pos + 2 + length
+        if length < 2 or end > size:
+            raise RJPEGFormatError(f"偏移 {pos} 处的段长度无效: {length}")
+
+        yield marker, view[pos + 4:end]
+
+        if marker == MARKER_SOS:
+            return
+        pos = end
+
+
+class RJPEGSegments:
+    """
+    R-JPEG段索引
+
+    对缓冲区只遍历一次，按标记保存各段负载的零拷贝切片。
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data: R-JPEG二进制数据（bytes / memoryview / mmap 等）
+        """
+        self.data = data
+        self.segments: Dict[int, List[memoryview]] = {}
+        for marker, payload in iter_segments(data):
+            self.segments.setdefault(marker, []).append(payload)
+
+    def get(self, marker: int) -> List[memoryview]:
+        """获取指定标记的全部段负载"""
+        return self.segments.get(marker, [])
+
+    @property
+    def resolution(self) -> Optional[Tuple[int, int]]:
+        """JPEG帧头中的分辨率 (width, height)"""
+        for marker in SOF_MARKERS:
+            payloads = self.segments.get(marker)
+            if payloads:
+                payload = payloads[0]
+                height = (payload[1] << 8) | payload[2]
+                width = (payload[3] << 8) | payload[4]
+                return width, height
+        return None
+
+    @property
+    def raw_thermal_size(self) -> int:
+        """APP3段中原始热红外数据的总字节数"""
+        return sum(len(chunk) for chunk in self.get(MARKER_APP3))
+
+    @property
+    def measurement_params(self) -> Optional[Dict[str, float]]:
+        """
+        APP4段中DJI记录的测温参数
+
+        Returns:
+            Optional[Dict[str, float]]: 包含 distance / humidity / emissivity / reflection
+                                        （可能包含 ambient_temp），无法识别时返回None
+        """
+        for payload in self.get(MARKER_APP4):
+            params = parse_dji_measurement_params(payload)
+            if params:
+                return params
+        return None
+
+    def decode_raw_thermal(self, resolution: Optional[Tuple[int, int]] = None, out=None) -> np.ndarray:
+        """
+        拼接APP3段，得到原始16位热红外数据
+
+        Args:
+            resolution: 可选的热图分辨率 (width, height)，不提供时自动推断
+            out: 数据分布在多个APP3段时的输出位置：None（新分配）、
+                 带 get(shape, dtype) 方法的缓冲区池（如 FrameBuffers）或形状匹配的uint16数组
+
+        Returns:
+            np.ndarray: 形状为 (height, width) 的uint16数组。
+                        数据只有一个APP3段时为原缓冲区的零拷贝视图
+        """
+        chunks = self.get(MARKER_APP3)
+        total = sum(len(chunk) for chunk in chunks)
+        if total == 0:
+            raise RJPEGFormatError("未找到APP3热红外数据段")
+
+        width, height = self._infer_raw_resolution(total, resolution)
+        nbytes = width * height * RAW_DTYPE.itemsize
+
+        if len(chunks[0]) >= nbytes:
+            raw = np.frombuffer(chunks[0], dtype=RAW_DTYPE, count=width * height)
+            return raw.reshape(height, width)
+
+        # 多个APP3段在文件中不连续，直接逐段写入最终数组，不产生中间bytes
+        if out is None:
+            raw = np.empty((height, width), dtype=RAW_DTYPE)
+        elif isinstance(out, np.ndarray):
+            if out.shape != (height, width) or out.dtype != RAW_DTYPE or not out.flags.c_contiguous:
+                raise ValueError(f"输出数组应为连续的 {RAW_DTYPE} {(height, width)}，"
+                                 f"实际为 {out.dtype} {out.shape}")
+            raw = out
+        else:
+            raw = out.get((height, width), RAW_DTYPE)
+        target = raw.reshape(-1).view(np.uint8)
+        offset = 0
+        for chunk in chunks:
+            count = min(len(chunk), nbytes - offset)
+            target[offset:offset + count] = chunk[:count]
+            offset += count
+            if offset >= nbytes:
+                break
+        return raw
+
+    def _infer_raw_resolution(self, total: int,
+                              resolution: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+        """根据APP3数据量推断热图分辨率"""
+        candidates = []
+        if resolution:
+            candidates.append(tuple(resolution))
+        if self.resolution:
+            candidates.append(self.resolution)
+        candidates.extend(KNOWN_THERMAL_RESOLUTIONS)
+
+        # 优先匹配数据量完全一致的分辨率，其次允许段末尾存在填充
+        for exact in (True, False):
+            for width, height in candidates:
+                nbytes = width * height * RAW_DTYPE.itemsize
+                if total == nbytes or (not exact and total > nbytes):
+                    return width, height
+
+        raise RJPEGFormatError(f"无法根据APP3数据量推断热图分辨率: {total} bytes")
+
+
+def parse_dji_measurement_params(payload: memoryview) -> Optional[Dict[str, float]]:
+    """
+    解析APP4段中的DJI测温参数
+
+    已知两种整数布局（以魔数区分）以及一种float32布局
+    （环境温度、距离、发射率、湿度、反射温度）。float32布局没有魔数，未知布局的负载
+    同样能按它解出数值，因此每个字段都必须是有限值且落在 Config.MEASUREMENT_PARAM_RANGES
+    规定的范围内，否则视为无法识别（使用默认参数）。
+
+    Args:
+        payload: APP4段负载
+
+    Returns:
+        Optional[Dict[str, float]]: 测温参数，无法识别时返回None
+    """
+    header = bytes(payload[:4])
+    offset = DJI_APP4_INT_LAYOUTS.get(header)
+    if offset is not None and len(payload) >= offset + 8:
+        humidity, distance, emissivity, reflection = struct.unpack_from('<3Hh', payload, offset)
+        params = {
+            'humidity': float(humidity),
+            'distance': distance / 10.0,
+            'emissivity': emissivity / 100.0,
+            'reflection': reflection / 10.0,
+        }
+    elif len(payload) >= 20:
+        ambient_temp, distance, emissivity, humidity, reflection = struct.unpack_from('<5f', payload, 0)
+        params = {
+            'ambient_temp': ambient_temp,
+            'distance': distance,
+            'emissivity': emissivity,
+            'humidity': humidity,
+            'reflection': reflection,
+        }
+    else:
+        return None
+
+    for name, value in params.items():
+        low, high = Config.MEASUREMENT_PARAM_RANGES[name]
+        if not (math.isfinite(value) and low <= value <= high):
+            return None
+    return params
+
+
+class RJPEGSniff(NamedTuple):
+    """文件头嗅探结果"""
+    vendor: Optional[str]           # 'DJI' / 'FLIR'，无法识别时为None
+    make: Optional[str]             # EXIF 厂商
+    model: Optional[str]            # EXIF 型号（相机/无人机型号）
+    raw_thermal_bytes: int          # APP3段中原始热红外数据的总字节数
+    has_measurement_params: bool    # 是否包含可识别的APP4测温参数
+    bytes_read: int                 # 嗅探实际读取的字节数
+
+    @property
+    def is_dji_rjpeg(self) -> bool:
+        """是否为包含原始热红外数据的DJI R-JPEG"""
+        return self.raw_thermal_bytes >= MIN_RAW_THERMAL_BYTES
+
+    @property
+    def is_thermal(self) -> bool:
+        """是否为任一厂商的辐射热像图"""
+        return self.is_dji_rjpeg or self.vendor == 'FLIR'
+
+
+# EXIF字段类型 -> (单个值的字节数, struct格式)
+EXIF_TYPES = {
+    1: (1, 'B'),    # BYTE
+    2: (1, 's'),    # ASCII
+    3: (2, 'H'),    # SHORT
+    4: (4, 'I'),    # LONG
+    5: (8, 'II'),   # RATIONAL
+    7: (1, 's'),    # UNDEFINED
+    9: (4, 'i'),    # SLONG
+    10: (8, 'ii'),  # SRATIONAL
+}
+
+
+def exif_tiff(payload) -> Optional[Tuple[bytes, str]]:
+    """
+    取出APP1 EXIF负载中的TIFF结构
+
+    Returns:
+        Optional[Tuple[bytes, str]]: (TIFF数据, struct字节序 '<' 或 '>')，不是EXIF时返回None
+    """
+    data = bytes(payload)
+    if not data.startswith(EXIF_HEADER):
+        return None
+    tiff = data[len(EXIF_HEADER):]
+    if len(tiff) < 8 or tiff[:2] not in (b'II', b'MM'):
+        return None
+    return tiff, '<' if tiff[:2] == b'II' else '>'
+
+
+def read_ifd(tiff: bytes, offset: int, order: str, tags=None) -> Dict[int, object]:
+    """
+    读取一个IFD中的条目
+
+    Args:
+        tiff: TIFF数据
+        offset: IFD偏移
+        order: struct字节序
+        tags: 可选，只读取这些标签
+
+    Returns:
+        Dict[int, object]: 标签 -> 值。ASCII为str，UNDEFINED为bytes，
+                           数值类型为tuple（有理数已换算为float）；数据不完整的条目被忽略
+    """
+    result = {}
+    try:
+        count, = struct.unpack_from(order + 'H', tiff, offset)
+    except struct.error:
+        return result
+
+    for index in range(count):
+        entry = offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, field_type, length = struct.unpack_from(order + 'HHI', tiff, entry)
+        if (tags is not None and tag not in tags) or field_type not in EXIF_TYPES:
+            continue
+
+        size, fmt = EXIF_TYPES[field_type]
+        nbytes = size * length
+        # 不超过4字节的值直接存放在条目中，否则为偏移
+        if nbytes <= 4:
+            start = entry + 8
+        else:
+            start, = struct.unpack_from(order + 'I', tiff, entry + 8)
+        raw = tiff[start:start + nbytes]
+        if len(raw) != nbytes:
+            continue
+
+        if field_type == 2:
+            result[tag] = raw.split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+        elif field_type == 7:
+            result[tag] = raw
+        elif field_type in (5, 10):
+            values = struct.unpack(order + fmt[0] * (2 * length), raw)
+            result[tag] = tuple(num / den if den else 0.0
+                                for num, den in zip(values[::2], values[1::2]))
+        else:
+            result[tag] = struct.unpack(order + fmt * length, raw)
+    return result
+
+
+def parse_exif_strings(payload, tags=(EXIF_TAG_MAKE, EXIF_TAG_MODEL)) -> Dict[int, str]:
+    """
+    读取EXIF IFD0中的ASCII标签
+
+    Args:
+        payload: APP1段负载（以 'Exif\\0\\0' 开头），可以只包含开头部分
+        tags: 需要读取的标签
+
+    Returns:
+        Dict[int, str]: 标签 -> 字符串，无法读取的标签不出现在结果中
+    """
+    parsed = exif_tiff(payload)
+    if parsed is None:
+        return {}
+    tiff, order = parsed
+    ifd_offset, = struct.unpack_from(order + 'I', tiff, 4)
+    values = read_ifd(tiff, ifd_offset, order, tags)
+    return {tag: value for tag, value in values.items() if isinstance(value, str)}
+
+
+def walk_segment_headers(f: BinaryIO) -> Iterator[Tuple[int, int, int]]:
+    """
+    只读取段头遍历JPEG段（到SOS为止），段负载通过seek跳过
+
+    Yields:
+        Tuple[int, int, int]: (标记, 负载偏移, 负载长度)
+    """
+    if f.read(2) != b'\xff\xd8':
+        return
+    while True:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return
+        marker = header[1]
+        if marker == 0xFF:
+            f.seek(-3, io.SEEK_CUR)
+            continue
+        if marker in STANDALONE_MARKERS:
+            f.seek(-2, io.SEEK_CUR)
+            continue
+        if marker == MARKER_EOI:
+            return
+        length = (header[2] << 8) | header[3]
+        if length < 2:
+            return
+        offset = f.tell()
+        yield marker, offset, length - 2
+        if marker == MARKER_SOS:
+            return
+        f.seek(offset + length - 2)
+
+
+def sniff(f: BinaryIO) -> RJPEGSniff:
+    """
+    仅凭文件头识别R-JPEG
+
+    遍历段头：APP1中读取EXIF厂商/型号并识别FLIR标识，APP3只累计长度，
+    APP4读取测温参数；其余段直接跳过。普通JPEG只需读取几KB即可判定。
+
+    Args:
+        f: 以二进制方式打开、位于文件开头的文件对象（建议无缓冲）
+
+    Returns:
+        RJPEGSniff: 嗅探结果
+    """
+    vendor = make = model = None
+    raw_thermal_bytes = 0
+    has_params = False
+    bytes_read = 2
+
+    for marker, offset, length in walk_segment_headers(f):
+        bytes_read += 4
+        if marker == MARKER_APP3:
+            raw_thermal_bytes += length
+        elif marker == MARKER_APP1 and (make is None or vendor != 'FLIR'):
+            payload = f.read(min(length, SNIFF_APP1_BYTES))
+            bytes_read += len(payload)
+            if payload.startswith(FLIR_HEADER):
+                vendor = 'FLIR'
+            elif payload.startswith(EXIF_HEADER) and make is None:
+                strings = parse_exif_strings(payload)
+                make = strings.get(EXIF_TAG_MAKE) or None
+                model = strings.get(EXIF_TAG_MODEL) or None
+        elif marker == MARKER_APP4 and not has_params:
+            payload = f.read(min(length, 64))
+            bytes_read += len(payload)
+            has_params = parse_dji_measurement_params(payload) is not None
+
+    if vendor is None and (raw_thermal_bytes >= MIN_RAW_THERMAL_BYTES
+                           or (make or '').upper().startswith('DJI')):
+        vendor = 'DJI'
+    return RJPEGSniff(vendor, make, model, raw_thermal_bytes, has_params, bytes_read)
+
+
+class PrefillReader:
+    """
+    供 sniff 使用的文件对象：把文件按需顺序读入调用方的缓冲区
+
+    seek 越过尚未读取的部分时不跳过，而是在下一次 read 时把中间的数据一并读入缓冲区
+    （每次至少 SNIFF_READ_BYTES）。嗅探通过后缓冲区中已有的前缀就是完整读取的开头，
+    文件只打开一次、每个字节只读取一次。
+    """
+
+    def __init__(self, f: Optional[BinaryIO], buffer: memoryview, filled: int = 0):
+        """
+        Args:
+            f: 位于文件开头的无缓冲文件对象；buffer 已包含全部内容时可为None
+            buffer: 与文件等长的可写字节缓冲区
+            filled: 缓冲区中已有的字节数
+        """
+        self._f = f
+        self._buffer = buffer
+        self.filled = filled
+        self._pos = 0
+
+    def _fill(self, end: int):
+        """把文件读入缓冲区直到至少 end 字节（文件结束时提前停止）"""
+        end = min(end, len(self._buffer))
+        target = min(len(self._buffer), max(end, self.filled + SNIFF_READ_BYTES))
+        while self.filled < end:
+            count = self._f.readinto(self._buffer[self.filled:target])
+            if not count:
+                break
+            self.filled += count
+
+    def read(self, size: int) -> bytes:
+        self._fill(self._pos + size)
+        data = bytes(self._buffer[self._pos:min(self._pos + size, self.filled)])
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def sniff_file(file_path: str) -> RJPEGSniff:
+    """
+    嗅探文件头（无缓冲读取，只读取段头和少量负载）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        RJPEGSniff: 嗅探结果
+    """
+    with open(file_path, 'rb', buffering=0) as f:
+        return sniff(f)
+
+
+def decode_raw_thermal(data, resolution: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """
+    从R-JPEG数据中提取原始16位热红外数据
+
+    Args:
+        data: R-JPEG二进制数据
+        resolution: 可选的热图分辨率 (width, height)
+
+    Returns:
+        np.ndarray: 形状为 (height, width) 的uint16数组
+    """
+    return RJPEGSegments(data).decode_raw_thermal(resolution)
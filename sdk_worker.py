@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+隔离的DJI Thermal SDK工作进程
+libdirp 在畸形文件上可能直接段错误。SDK调用在受监管的常驻子进程中执行，
+温度帧通过共享内存返回；子进程崩溃后由父进程自动重启，不影响批量转换的其余文件
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import Config
+from dirp_sdk import DirpError
+from rjpeg_parser import as_byte_view
+
+
+class SDKWorkerError(RuntimeError):
+    """SDK工作进程异常"""
+
+
+class SDKWorkerCrashed(SDKWorkerError):
+    """工作进程在处理请求时意外退出（通常是原生库崩溃）"""
+
+    def __init__(self, exitcode: Optional[int]):
+        self.exitcode = exitcode
+        super().__init__(f"SDK工作进程异常退出 (exitcode={exitcode})")
+
+
+class SDKWorkerTimeout(SDKWorkerError):
+    """工作进程在期限内没有返回结果（已被强制结束并替换）"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        super().__init__(f"SDK处理超时 ({timeout:g}秒)")
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB），无法获取时返回0"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return 0.0
+
+
+_rss_warning_logged = False
+
+
+def check_rss_limit(max_rss_mb: float):
+    """
+    设置了常驻内存上限但当前平台无法获取常驻内存时记录一次警告
+    （没有 /proc 且未安装psutil时按内存回收工作进程的策略不生效）
+
+    Args:
+        max_rss_mb: 进程常驻内存上限（MB），0表示不限制
+    """
+    global _rss_warning_logged
+    if not max_rss_mb or _rss_warning_logged or current_rss_mb() > 0:
+        return
+    _rss_warning_logged = True
+    logging.getLogger('DJIThermalConverter').warning(
+        f"⚠️ 无法获取进程常驻内存，工作进程不会按内存上限 ({max_rss_mb:g}MB) 回收，"
+        f"只按处理文件数回收（安装psutil可启用）")
+
+
+def _worker_main(conn, library_path: str, shm_name: str):
+    """
+    工作进程入口
+
+    加载SDK并创建一个会话，之后循环处理父进程的请求：
+    请求为 (操作, 测温参数) 加一段R-JPEG字节，结果帧写入共享内存，
+    管道中只返回形状、类型和本进程的常驻内存。'warmup' 请求只执行测温、
+    不写共享内存，用于预热即将接替旧进程的备用进程。
+    """
+    import ctypes
+    from dirp_sdk import DirpSDK, DirpSession
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        session = DirpSession(DirpSDK(ctypes.CDLL(library_path)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        shm.close()
+        return
+    conn.send(('ready',))
+
+    while True:
+        try:
+            op, measurement_params = conn.recv()
+            if op == 'stop':
+                break
+            rjpeg_data = conn.recv_bytes()
+        except (EOFError, OSError):
+            break
+
+        try:
+            if op == 'warmup':
+                session.measure(rjpeg_data, measurement_params=measurement_params)
+                conn.send(('ok', None, None, current_rss_mb()))
+                continue
+            if op == 'measure':
+                frame = session.measure(rjpeg_data, measurement_params=measurement_params)
+            elif op == 'original_raw':
+                frame = session.original_raw(rjpeg_data)
+            else:
+                raise ValueError(f"未知的请求: {op}")
+
+            if frame.nbytes > shm.size:
+                raise ValueError(f"结果帧 {frame.shape} 超出共享内存大小 {shm.size} bytes")
+            target = np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)
+            np.copyto(target, frame)
+            del target
+            conn.send(('ok', frame.shape, frame.dtype.str, current_rss_mb()))
+        except DirpError as e:
+            conn.send(('dirp', e.func_name, e.code))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+    shm.close()
+
+
+class SDKWorker:
+    """
+    单个SDK工作进程的父进程端代理
+
+    与 DirpSession 接口相同（measure / original_raw），可直接替换会话使用。
+    共享内存由父进程创建并在工作进程重启后继续复用。
+
+    工作进程处理的文件数或常驻内存达到回收阈值后，后台启动一个备用进程并用
+    最近处理过的文件预热；备用进程就绪前旧进程继续工作，就绪后直接替换，
+    回收过程不阻塞调用方。
+    """
+
+    def __init__(self, library_path: str, frame_bytes: int, timeout: Optional[float] = None,
+                 max_tasks: int = Config.WORKER_MAX_TASKS,
+                 max_rss_mb: float = Config.WORKER_MAX_RSS_MB, context=None):
+        """
+        Args:
+            library_path: libdirp 动态库路径
+            frame_bytes: 共享内存大小（需容纳最大分辨率的float32帧）
+            timeout: 单次调用的期限（秒），None表示不限制
+            max_tasks: 每个进程处理的文件数上限，0表示不限制
+            max_rss_mb: 进程常驻内存上限（MB），0表示不限制
+            context: multiprocessing 上下文，默认使用 spawn（子进程不继承父进程的原生库状态）
+        """
+        self.library_path = library_path
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.context = context or multiprocessing.get_context('spawn')
+        check_rss_limit(max_rss_mb)
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes)
+        self.process = None
+        self.conn = None
+        self.tasks = 0
+        self.rss_mb = 0.0
+        self.recycled = 0
+        # 备用进程: (进程, 管道, 状态 'starting' / 'warming', 状态开始时间)
+        self._standby = None
+        self._warmup_data = None
+        # 已被替换、正在退出的旧进程
+        self._retiring = []
+        # 启动失败（包括进程创建失败和中断）时释放共享内存和已启动的进程
+        try:
+            self._start()
+        except BaseException:
+            self.close()
+            raise
+
+    def _spawn(self):
+        """启动工作进程（不等待就绪）"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main, args=(child_conn, self.library_path, self.shm.name), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _start(self):
+        """启动工作进程并等待SDK加载完成"""
+        self.process, self.conn = self._spawn()
+        self.tasks = 0
+        self.rss_mb = 0.0
+
+        # 启动阶段失败不自动重启，避免无法加载SDK时反复拉起进程
+        try:
+            if not self.conn.poll(Config.SDK_WORKER_START_TIMEOUT):
+                raise TimeoutError(f"{Config.SDK_WORKER_START_TIMEOUT}秒内未就绪")
+            reply = self.conn.recv()
+        except TimeoutError as e:
+            reply = ('error', str(e))
+        except (EOFError, OSError):
+            self.process.join(timeout=1.0)
+            reply = ('error', f"工作进程启动时退出 (exitcode={self.process.exitcode})")
+        if reply[0] != 'ready':
+            self._terminate()
+            raise SDKWorkerError(f"SDK工作进程启动失败: {reply[1]}")
+
+    def _receive(self):
+        """
+        接收回复
+
+        进程已退出时重启并抛出 SDKWorkerCrashed；超过期限时强制结束、
+        重启并抛出 SDKWorkerTimeout
+        """
+        try:
+            if not self.conn.poll(self.timeout):
+                self._terminate()
+                self._start()
+                raise SDKWorkerTimeout(self.timeout)
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self._crashed()
+
+    def _crashed(self):
+        """记录退出码、重启工作进程并抛出异常"""
+        self.process.join(timeout=1.0)
+        exitcode = self.process.exitcode
+        self._terminate()
+        self._start()
+        raise SDKWorkerCrashed(exitcode)
+
+    @staticmethod
+    def _stop_process(process, conn, graceful: bool = True):
+        """结束进程并关闭管道，graceful 时先请求进程自行退出"""
+        if graceful and process.is_alive():
+            try:
+                conn.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=1.0)
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+
+    def _terminate(self):
+        """强制结束工作进程"""
+        if self.process is not None:
+            self._stop_process(self.process, self.conn, graceful=False)
+
+    def _needs_recycle(self) -> bool:
+        return ((self.max_tasks and self.tasks >= self.max_tasks)
+                or (self.max_rss_mb and self.rss_mb >= self.max_rss_mb))
+
+    def _service_standby(self):
+        """推进备用进程的启动和预热，预热完成后替换当前进程"""
+        # 回收已退出的旧进程（is_alive 会以非阻塞方式回收子进程）
+        self._retiring = [process for process in self._retiring if process.is_alive()]
+        if self._standby is None:
+            return
+        process, conn, state, since = self._standby
+
+        try:
+            if not conn.poll(0):
+                # 启动或预热卡住时放弃该备用进程，之后重新创建
+                limit = Config.SDK_WORKER_START_TIMEOUT if state == 'starting' else self.timeout
+                if limit and time.monotonic() - since > limit:
+                    self._stop_process(process, conn, graceful=False)
+                    self._standby = None
+                return
+            reply = conn.recv()
+        except (EOFError, OSError):
+            self._stop_process(process, conn, graceful=False)
+            self._standby = None
+            return
+
+        if reply[0] != 'ready' and reply[0] != 'ok':
+            # 预热失败（SDK错误等）不影响替换，进程本身是健康的
+            if state == 'starting':
+                self._stop_process(process, conn, graceful=False)
+                self._standby = None
+                return
+
+        if state == 'starting' and self._warmup_data is not None:
+            try:
+                conn.send(('warmup', None))
+                conn.send_bytes(self._warmup_data)
+            except (BrokenPipeError, OSError):
+                self._stop_process(process, conn, graceful=False)
+                self._standby = None
+                return
+            self._standby = (process, conn, 'warming', time.monotonic())
+            return
+
+        # 备用进程已就绪，替换当前进程；旧进程收到 stop 后自行退出，不等待
+        try:
+            self.conn.send(('stop', None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+        self._retiring.append(self.process)
+        self.process, self.conn = process, conn
+        self.tasks = 0
+        self.rss_mb = 0.0
+        self.recycled += 1
+        self._standby = None
+        self._warmup_data = None
+
+    def _call(self, op: str, rjpeg_data, measurement_params: Optional[Dict] = None) -> np.ndarray:
+        """发送请求并返回共享内存中的结果帧视图"""
+        self._service_standby()
+
+        data = as_byte_view(rjpeg_data)
+        try:
+            self.conn.send((op, measurement_params))
+            self.conn.send_bytes(data)
+        except (BrokenPipeError, OSError):
+            self._crashed()
+
+        reply = self._receive()
+        status = reply[0]
+        if status == 'dirp':
+            raise DirpError(reply[1], reply[2])
+        if status == 'error':
+            raise SDKWorkerError(reply[1])
+
+        _, shape, dtype, self.rss_mb = reply
+        self.tasks += 1
+        if self._standby is None and self._needs_recycle():
+            # 达到回收阈值：后台启动备用进程，并保留本次文件用于预热
+            self._warmup_data = bytes(data) if op == 'measure' else None
+            process, conn = self._spawn()
+            self._standby = (process, conn, 'starting', time.monotonic())
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+
+    def _result(self, frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        if out is None:
+            return frame
+        if out.shape != frame.shape or out.dtype != frame.dtype:
+            raise ValueError(f"输出数组应为 {frame.dtype} {frame.shape}，实际为 {out.dtype} {out.shape}")
+        np.copyto(out, frame)
+        return out
+
+    def measure(self, rjpeg_data, out: Optional[np.ndarray] = None,
+                measurement_params: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        在工作进程中解析R-JPEG并测温
+
+        Returns:
+            np.ndarray: float32温度数组。未提供out时返回共享内存视图，
+                        其内容在本工作进程下一次调用时会被覆盖
+        """
+        return self._result(self._call('measure', rjpeg_data, measurement_params), out)
+
+    def original_raw(self, rjpeg_data, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """在工作进程中读取原始RAW数据（uint16）"""
+        return self._result(self._call('original_raw', rjpeg_data), out)
+
+    def close(self):
+        """停止工作进程（包括备用进程）并释放共享内存"""
+        if self._standby is not None:
+            process, conn, _, _ = self._standby
+            self._stop_process(process, conn, graceful=False)
+            self._standby = None
+        if self.process is not None:
+            self._stop_process(self.process, self.conn)
+            self.process = None
+        for process in self._retiring:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._retiring = []
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            self.shm.close()
+        except BufferError:
+            # 调用方仍持有结果帧视图，映射在视图释放后由解释器回收
+            pass
+
+
+class SDKWorkerPool:
+    """
+    SDK工作进程池
+
+    接口与 DirpSessionPool 相同：session() 借出一个工作进程，用完后归还。
+    工作进程按需创建，之后常驻复用（SDK只加载一次），并按回收策略定期替换。
+    """
+
+    def __init__(self, library_path: str, size: int = 4, frame_bytes: int = 1280 * 1024 * 4,
+                 timeout: Optional[float] = None,
+                 max_tasks: int = Config.WORKER_MAX_TASKS,
+                 max_rss_mb: float = Config.WORKER_MAX_RSS_MB):
+        """
+        Args:
+            library_path: libdirp 动态库路径
+            size: 工作进程数量（即最大并发调用数）
+            frame_bytes: 每个工作进程的共享内存大小
+            timeout: 单次调用的期限（秒），None表示不限制
+            max_tasks: 每个进程处理的文件数上限，0表示不限制
+            max_rss_mb: 进程常驻内存上限（MB），0表示不限制
+        """
+        self.library_path = library_path
+        self.size = max(1, size)
+        self.frame_bytes = frame_bytes
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self._workers = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self):
+        """借出一个工作进程，用完后自动归还"""
+        worker = self._acquire()
+        try:
+            yield worker
+        finally:
+            self._workers.put(worker)
+
+    def _acquire(self) -> SDKWorker:
+        try:
+            return self._workers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.size:
+                worker = SDKWorker(self.library_path, self.frame_bytes, self.timeout,
+                                   self.max_tasks, self.max_rss_mb)
+                self._all.append(worker)
+                return worker
+
+        return self._workers.get()
+
+    def close(self):
+        """停止全部工作进程"""
+        with self._lock:
+            for worker in self._all:
+                worker.close()
+            self._all = []
+            self._workers = queue.LifoQueue()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成热红外场景生成器
+为演示（mock）模式和测试生成温度帧：整帧向量化、全程float32，
+并按 (分辨率, 场景, 种子) 缓存生成结果
+"""
+
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+class SceneSpec(NamedTuple):
+    """合成场景参数"""
+    base_temp: float = 20.0            # 左上角温度（°C）
+    gradient_span: float = 20.0        # 对角温度梯度幅度（°C）
+    fixed_hotspots: bool = True        # 是否包含原演示数据的两个固定热点
+    random_hotspots: int = 0           # 随机热点数量
+    noise_sigma: float = 0.0           # 高斯噪声标准差（°C）
+    saturated_regions: int = 0         # 饱和区域数量
+    saturation_temp: float = 150.0     # 饱和区域温度（°C）
+
+
+# 预置场景
+SCENARIOS: Dict[str, SceneSpec] = {
+    'default': SceneSpec(),
+    'hotspots': SceneSpec(random_hotspots=8),
+    'noisy': SceneSpec(noise_sigma=0.5),
+    'saturated': SceneSpec(random_hotspots=4, noise_sigma=0.2, saturated_regions=2),
+}
+
+# 原演示数据的固定热点: (相对中心的x偏移, y偏移, 幅度, 衰减距离)
+FIXED_HOTSPOTS = ((0, 0, 60.0, 50.0), (-100, -100, 45.0, 30.0))
+
+
+def _add_hotspot(out: np.ndarray, scratch: np.ndarray, x: np.ndarray, y: np.ndarray,
+                 center: Tuple[float, float], amplitude: float, falloff: float):
+    """叠加一个按距离指数衰减的热点: amplitude * exp(-distance / falloff)"""
+    dx2 = np.square(x - np.float32(center[0]))
+    dy2 = np.square(y - np.float32(center[1]))
+    np.add(dy2, dx2, out=scratch)
+    np.sqrt(scratch, out=scratch)
+    scratch *= np.float32(-1.0 / falloff)
+    np.exp(scratch, out=scratch)
+    scratch *= np.float32(amplitude)
+    out += scratch
+
+
+def generate_scene(width: int, height: int, scenario: str = 'default', seed: int = 0,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    生成合成温度帧
+
+    Args:
+        width: 宽度
+        height: 高度
+        scenario: 场景名称（见 SCENARIOS）
+        seed: 随机种子（随机热点、噪声和饱和区域）
+        out: 可选的float32输出数组
+
+    Returns:
+        np.ndarray: 形状为 (height, width) 的float32温度数组（°C）
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"未知的合成场景: {scenario}，可选: {', '.join(SCENARIOS)}")
+    spec = SCENARIOS[scenario]
+    if out is None:
+        out = np.empty((height, width), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+
+    # 对角梯度: base + span * (i / height) * (j / width)
+    y = np.arange(height, dtype=np.float32)[:, None]
+    x = np.arange(width, dtype=np.float32)[None, :]
+    np.multiply(y * np.float32(spec.gradient_span / height), x * np.float32(1.0 / width), out=out)
+    out += np.float32(spec.base_temp)
+
+    scratch = np.empty_like(out)
+    center_x, center_y = width // 2, height // 2
+    if spec.fixed_hotspots:
+        for offset_x, offset_y, amplitude, falloff in FIXED_HOTSPOTS:
+            _add_hotspot(out, scratch, x, y, (center_x + offset_x, center_y + offset_y),
+                         amplitude, falloff)
+
+    for _ in range(spec.random_hotspots):
+        center = (rng.uniform(0, width), rng.uniform(0, height))
+        _add_hotspot(out, scratch, x, y, center, rng.uniform(10.0, 80.0),
+                     rng.uniform(0.02, 0.08) * max(width, height))
+
+    if spec.noise_sigma > 0:
+        rng.standard_normal(out.shape, dtype=np.float32, out=scratch)
+        scratch *= np.float32(spec.noise_sigma)
+        out += scratch
+
+    for _ in range(spec.saturated_regions):
+        region_w = int(rng.integers(width // 20, width // 6 + 1))
+        region_h = int(rng.integers(height // 20, height // 6 + 1))
+        left = int(rng.integers(0, width - region_w + 1))
+        top = int(rng.integers(0, height - region_h + 1))
+        out[top:top + region_h, left:left + region_w] = np.float32(spec.saturation_temp)
+
+    return out
+
+
+@lru_cache(maxsize=Config.SYNTHETIC_CACHE_SIZE)
+def get_scene(width: int, height: int, scenario: str = 'default', seed: int = 0) -> np.ndarray:
+    """
+    获取（必要时生成）缓存的合成温度帧
+
+    同一 (分辨率, 场景, 种子) 只生成一次，返回的数组为只读，
+    需要修改时请复制或使用 generate_scene 的 out 参数
+
+    Returns:
+        np.ndarray: 只读float32温度数组
+    """
+    scene = generate_scene(width, height, scenario, seed)
+    scene.setflags(write=False)
+    return scene
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+镜头畸变校正
+按 (型号, 分辨率) 从 Config.DRONE_MODELS 中的内参和畸变系数（Brown-Conrady模型）
+预先计算一次双线性重映射表并缓存，每帧只需一次向量化的取值和加权
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from numba_kernels import NUMBA_AVAILABLE, numba_enabled
+
+if NUMBA_AVAILABLE:
+    from numba_kernels import remap_bilinear
+
+
+class LensIntrinsics(NamedTuple):
+    """镜头内参（像素单位，对应型号的标称分辨率）和畸变系数"""
+    fx: float
+    fy: float
+    cx: Optional[float] = None   # None表示图像中心
+    cy: Optional[float] = None
+    k1: float = 0.0
+    k2: float = 0.0
+    p1: float = 0.0
+    p2: float = 0.0
+    k3: float = 0.0
+
+    @classmethod
+    def for_model(cls, model: str) -> 'LensIntrinsics':
+        """获取指定型号的镜头参数"""
+        return cls(**Config.get_model_config(model)['intrinsics'])
+
+    def scaled(self, nominal: Tuple[int, int], resolution: Tuple[int, int]) -> 'LensIntrinsics':
+        """换算到实际分辨率（畸变系数作用于归一化坐标，不受缩放影响）"""
+        scale_x = resolution[0] / nominal[0]
+        scale_y = resolution[1] / nominal[1]
+        cx = (nominal[0] - 1) / 2.0 if self.cx is None else self.cx
+        cy = (nominal[1] - 1) / 2.0 if self.cy is None else self.cy
+        return self._replace(fx=self.fx * scale_x, fy=self.fy * scale_y,
+                             cx=(cx + 0.5) * scale_x - 0.5, cy=(cy + 0.5) * scale_y - 0.5)
+
+
+class RemapTable:
+    """
+    双线性重映射表
+
+    对输出帧的每个像素保存源图像中4个相邻像素的线性索引和双线性权重；
+    权重之和为1，校正后的温度是源温度的凸组合，不改变辐射量。
+    超出源图像的位置取最近的边缘像素。
+    """
+
+    def __init__(self, source_x: np.ndarray, source_y: np.ndarray, shape: Tuple[int, int]):
+        """
+        Args:
+            source_x: 每个输出像素对应的源x坐标
+            source_y: 每个输出像素对应的源y坐标
+            shape: 帧形状 (height, width)
+        """
+        height, width = shape
+        self.shape = shape
+        source_x = np.clip(source_x, 0, width - 1)
+        source_y = np.clip(source_y, 0, height - 1)
+        x0 = np.minimum(np.floor(source_x).astype(np.int32), width - 2)
+        y0 = np.minimum(np.floor(source_y).astype(np.int32), height - 2)
+        fx = (source_x - x0).astype(np.float32).reshape(-1)
+        fy = (source_y - y0).astype(np.float32).reshape(-1)
+
+        top_left = (y0 * width + x0).reshape(-1)
+        # (像素数, 4): 左上、右上、左下、右下
+        self.indices = np.stack([top_left, top_left + 1, top_left + width, top_left + width + 1], axis=1)
+        self.weights = np.stack([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy], axis=1)
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        重映射一帧
+
+        Args:
+            frame: 形状与重映射表一致的数组
+            out: 可选的float32输出数组，可以就是 frame 本身（原地校正）
+
+        Returns:
+            np.ndarray: 校正后的float32数组
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"帧尺寸 {frame.shape} 与重映射表尺寸 {self.shape} 不一致")
+        if out is None:
+            out = np.empty(self.shape, dtype=np.float32)
+        if numba_enabled():
+            # 并行内核逐像素读取源帧，原地校正时需要先复制源帧
+            source = frame.reshape(-1)
+            if np.shares_memory(frame, out):
+                source = source.copy()
+            remap_bilinear(source, self.indices, self.weights, out.reshape(-1))
+            return out
+        # 先取出全部源值（独立数组），因此 out 与 frame 相同时也可以安全写回
+        values = np.take(frame.reshape(-1), self.indices).astype(np.float32, copy=False)
+        np.einsum('ij,ij->i', values, self.weights, out=out.reshape(-1))
+        return out
+
+
+def undistort_points(u: np.ndarray, v: np.ndarray, lens: LensIntrinsics) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算无畸变图像中的像素在原始（有畸变）图像中的位置
+
+    Args:
+        u: 无畸变图像的x坐标
+        v: 无畸变图像的y坐标
+        lens: 镜头参数（cx/cy已确定）
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 原始图像中的 (x, y) 坐标
+    """
+    x = (u - lens.cx) / lens.fx
+    y = (v - lens.cy) / lens.fy
+    r2 = x * x + y * y
+    radial = 1 + r2 * (lens.k1 + r2 * (lens.k2 + r2 * lens.k3))
+    xy = x * y
+    distorted_x = x * radial + 2 * lens.p1 * xy + lens.p2 * (r2 + 2 * x * x)
+    distorted_y = y * radial + lens.p1 * (r2 + 2 * y * y) + 2 * lens.p2 * xy
+    return distorted_x * lens.fx + lens.cx, distorted_y * lens.fy + lens.cy
+
+
+@lru_cache(maxsize=Config.REMAP_CACHE_SIZE)
+def get_remap_table(model: str, width: int, height: int) -> RemapTable:
+    """
+    获取（必要时计算）指定型号和分辨率的重映射表
+
+    Args:
+        model: 无人机型号
+        width: 帧宽度
+        height: 帧高度
+
+    Returns:
+        RemapTable: 缓存的重映射表
+    """
+    nominal = Config.get_model_config(model)['resolution']
+    lens = LensIntrinsics.for_model(model).scaled(nominal, (width, height))
+    v, u = np.mgrid[0:height, 0:width].astype(np.float64)
+    source_x, source_y = undistort_points(u, v, lens)
+    return RemapTable(source_x, source_y, (height, width))
+
+
+def undistort(frame: np.ndarray, model: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    校正一帧的镜头畸变
+
+    Args:
+        frame: 温度帧
+        model: 无人机型号
+        out: 可选的float32输出数组，可以就是 frame 本身
+
+    Returns:
+        np.ndarray: 校正后的float32数组
+    """
+    height, width = frame.shape
+    return get_remap_table(model, width, height).apply(frame, out)